@@ -23,8 +23,10 @@ if config.config_file_name is not None:
 # target_metadata is the MetaData object of your models
 target_metadata = Base.metadata
 
-# Override sqlalchemy.url with the one from settings
-config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URI)
+# Override sqlalchemy.url with the one from settings.
+# Shards are migrated one at a time: alembic -x shard=north upgrade head
+shard = context.get_x_argument(as_dictionary=True).get("shard", "default")
+config.set_main_option("sqlalchemy.url", settings.SHARD_DATABASES[shard]["uri"])
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -1,11 +1,13 @@
 """
 Admin API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
 from db.session import get_db
-from models.course import Course
+from db.shards import shard_router, shard_of, DEFAULT_SHARD
+from models.course import Course, ARCHIVED
 from models.curriculum_module import CurriculumModule
 from models.content_item import ContentItem, ContentType
 from models.user import User, UserRole
@@ -14,31 +16,59 @@ from models.teacher_profile import TeacherProfile
 from models.question_bank import QuestionBank
 from models.question_option import QuestionOption
 from models.activity_log import ActivityLog
+from models.progress_event import ProgressEvent
 from services.config_service import config_service
+from services.quiz_variant_pool import quiz_variant_pool, QUIZ_BANK_CHANNEL
+from db.notify import notify
+from services.retrieval_service import retrieval_service, RETRIEVAL_CHANNEL
+from services.search_service import search_service, SEARCH_TYPES, escape_like
+from services.admission_service import admission_service
+from services.question_import_service import question_import_service, QuestionImportError
+from services.course_purge_service import course_purge_service, CoursePurgeError
+from services.progress_log import progress_log
+from services.course_snapshot_service import course_snapshot_service, COURSE_CHANNEL
+from core.responses import FastJSONResponse, rows_response
+from core.query_stats import query_metrics
 from api.v1.schemas import (
     CourseCreate, CourseUpdate, ModuleCreate, ContentCreate,
     UserCreate, QuestionCreate, ConfigUpdate
 )
-from typing import List, Optional
+from typing import Optional
+from datetime import datetime
+import os
 
 router = APIRouter()
 
 
+def ensure_school_shard(db: AsyncSession, school_id: Optional[int]) -> None:
+    """Reject writes for a school whose rows live on another shard than the session's"""
+    shard = shard_router.shard_for_school(school_id)
+    if shard != shard_of(db):
+        raise HTTPException(
+            status_code=400,
+            detail=f"School {school_id} is on shard '{shard}'; repeat the request with ?school_id={school_id}"
+        )
+
+
 @router.get("/dashboard")
-async def get_dashboard(db: AsyncSession = Depends(get_db)):
-    """Get admin dashboard overview"""
-    # Get totals
-    result = await db.execute(select(func.count(User.id)))
-    total_users = result.scalar() or 0
+async def get_dashboard():
+    """Get admin dashboard overview, totalled across every shard"""
+    async def totals(db: AsyncSession):
+        result = await db.execute(select(func.count(User.id)))
+        total_users = result.scalar() or 0
+        
+        result = await db.execute(select(func.count(Course.id)))
+        total_courses = result.scalar() or 0
+        return {"total_users": total_users, "total_courses": total_courses}
     
-    result = await db.execute(select(func.count(Course.id)))
-    total_courses = result.scalar() or 0
+    by_shard = dict(await shard_router.fan_out(totals))
     
     return {
-        "total_users": total_users,
-        "total_courses": total_courses,
+        "total_users": sum(t["total_users"] for t in by_shard.values()),
+        "total_courses": sum(t["total_courses"] for t in by_shard.values()),
         "total_modules": 0,
-        "total_questions": 0
+        "total_questions": 0,
+        "shards": by_shard
     }
 
 
@@ -67,6 +97,7 @@ async def create_course(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new course"""
+    ensure_school_shard(db, course_data.school_id)
     course = Course(
         school_id=course_data.school_id,
         title=course_data.title,
@@ -105,10 +136,18 @@ async def update_course(
         course.subject = course_data.subject
     if course_data.level:
         course.level = course_data.level
+    status_changed = bool(course_data.status) and course_data.status != course.status
     if course_data.status:
         course.status = course_data.status
     
+    await notify(db, COURSE_CHANNEL, str(course_id))
+    if status_changed:
+        # Archiving or restoring also opens or closes the course's chatbot
+        await notify(db, RETRIEVAL_CHANNEL, f"{course_id}:{os.getpid()}")
     await db.commit()
+    course_snapshot_service.invalidate(course_id)
+    if status_changed:
+        retrieval_service.invalidate(course_id)
     
     return {"success": True}
 
@@ -118,7 +157,12 @@ async def delete_course(
     course_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    """Archive a course"""
+    """
+    Archive a course
+    
+    Archived courses drop out of school course lists but keep their data;
+    POST /courses/{course_id}/purge deletes it for good.
+    """
     result = await db.execute(
         select(Course).where(Course.id == course_id)
     )
@@ -127,12 +171,59 @@ async def delete_course(
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    course.status = "Archived"
+    course.status = ARCHIVED
+    # Outlines and chatbot indexes of the course are cached on every worker
+    await notify(db, COURSE_CHANNEL, str(course_id))
+    await notify(db, RETRIEVAL_CHANNEL, f"{course_id}:{os.getpid()}")
     await db.commit()
+    course_snapshot_service.invalidate(course_id)
+    retrieval_service.invalidate(course_id)
     
     return {"success": True}
 
 
+@router.post("/courses/{course_id}/purge", status_code=202)
+async def purge_course(
+    course_id: int,
+    school_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Permanently delete an archived course and all of its data
+    
+    Runs in the background in small batches; poll GET on the same path for
+    progress. Pass school_id to reach the course's shard. Starting a purge
+    again resumes one that was interrupted.
+    """
+    result = await db.execute(
+        select(Course).where(Course.id == course_id)
+    )
+    course = result.scalar_one_or_none()
+    
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    
+    try:
+        job = course_purge_service.start(course, shard_of(db))
+    except CoursePurgeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return job.to_dict()
+
+
+@router.get("/courses/{course_id}/purge")
+async def get_purge_progress(
+    course_id: int,
+    school_id: Optional[int] = None
+):
+    """Progress of a course purge started on this worker"""
+    job = course_purge_service.get_job(course_id, shard_router.shard_for_school(school_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="No purge of this course on this worker")
+    
+    return job.to_dict()
+
+
 # Module Management
 @router.get("/course/{course_id}/modules")
 async def get_modules(
@@ -174,6 +265,7 @@ async def create_module(
     db.add(module)
     await db.commit()
     await db.refresh(module)
+    await retrieval_service.source_changed(db, "module", module.id)
     
     return {"success": True, "module_id": module.id}
 
@@ -219,34 +311,32 @@ async def create_content(
     db.add(content)
     await db.commit()
     await db.refresh(content)
+    await retrieval_service.source_changed(db, "content", content.id)
     
     return {"success": True, "content_id": content.id}
 
 
 # User Management
 @router.get("/users")
-async def get_users(
-    role: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get all users, optionally filtered by role"""
-    query = select(User)
+async def get_users(role: Optional[str] = None):
+    """Get all users on every shard, optionally filtered by role"""
+    query = select(User.id, User.email, User.name, User.role, User.status)
     if role:
         query = query.where(User.role == UserRole[role.upper()])
     
-    result = await db.execute(query)
-    users = result.scalars().all()
+    async def fetch(db: AsyncSession):
+        result = await db.execute(query)
+        return result.all()
     
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
-            "role": user.role.value,
-            "status": user.status
-        }
-        for user in users
+    # User ids repeat across shards, so each row names its shard
+    rows = [
+        (*row, shard)
+        for shard, shard_rows in await shard_router.fan_out(fetch)
+        for row in shard_rows
     ]
+    
+    # Trusted rows, serialized straight to bytes
+    return rows_response(("id", "email", "name", "role", "status", "shard"), rows)
 
 
 @router.post("/users")
@@ -255,6 +345,7 @@ async def create_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new user"""
+    ensure_school_shard(db, user_data.school_id)
     user = User(
         email=user_data.email,
         name=user_data.name,
@@ -268,7 +359,6 @@ async def create_user(
     
     # Create profile based on role
     if user.role == UserRole.STUDENT and user_data.class_section_id:
-        from models.class_section import ClassSection
         profile = StudentProfile(
             user_id=user.id,
             class_section_id=user_data.class_section_id
@@ -291,22 +381,41 @@ async def create_user(
 @router.get("/module/{module_id}/questions")
 async def get_questions(
     module_id: int,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    q: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get questions for a module"""
-    result = await db.execute(
-        select(QuestionBank).where(QuestionBank.module_id == module_id)
+    """
+    Get a page of questions for a module, with their options
+    
+    Pages are keyset-ordered by id: pass the X-Next-Cursor header of one
+    response as after_id to get the next (the header is absent on the last
+    page). q filters on question text.
+    """
+    limit = max(1, min(limit, 200))
+    query = (
+        select(QuestionBank)
+        .options(selectinload(QuestionBank.options))
+        .where(QuestionBank.module_id == module_id)
+        .order_by(QuestionBank.id)
+        .limit(limit + 1)
     )
+    if after_id is not None:
+        query = query.where(QuestionBank.id > after_id)
+    if q:
+        query = query.where(QuestionBank.question_text.ilike(f"%{escape_like(q)}%", escape="\\"))
+    
+    result = await db.execute(query)
     questions = result.scalars().all()
     
-    questions_list = []
-    for question in questions:
-        result = await db.execute(
-            select(QuestionOption).where(QuestionOption.question_id == question.id)
-        )
-        options = result.scalars().all()
-        
-        questions_list.append({
+    headers = {}
+    if len(questions) > limit:
+        questions = questions[:limit]
+        headers["X-Next-Cursor"] = str(questions[-1].id)
+    
+    questions_list = [
+        {
             "id": question.id,
             "question_text": question.question_text,
             "explanation_text": question.explanation_text,
@@ -316,11 +425,13 @@ async def get_questions(
                     "text": opt.option_text,
                     "is_correct": opt.is_correct
                 }
-                for opt in options
+                for opt in question.options
             ]
-        })
+        }
+        for question in questions
+    ]
     
-    return questions_list
+    return FastJSONResponse(questions_list, headers=headers)
 
 
 @router.post("/questions")
@@ -347,11 +458,34 @@ async def create_question(
         )
         db.add(option)
     
+    await notify(db, QUIZ_BANK_CHANNEL, str(question_data.module_id))
     await db.commit()
+    quiz_variant_pool.invalidate(question_data.module_id)
+    await retrieval_service.source_changed(db, "question", question.id)
     
     return {"success": True, "question_id": question.id}
 
 
+@router.post("/questions/import")
+async def import_questions(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk-create questions for any number of modules
+    
+    Send the file as the request body with Content-Type text/csv or
+    application/json (formats in QuestionImportService). The file is
+    validated in full first; any problem rejects the whole import.
+    """
+    body = await request.body()
+    try:
+        questions = question_import_service.parse(body, request.headers.get("content-type", ""))
+        return await question_import_service.import_questions(db, questions)
+    except QuestionImportError as e:
+        raise HTTPException(status_code=400, detail=e.errors)
+
+
 # Configuration
 @router.get("/config")
 async def get_config():
@@ -361,8 +495,63 @@ async def get_config():
 
 @router.put("/config")
 async def update_config(config_data: ConfigUpdate):
-    """Update configuration (for POC, this just returns success)"""
-    return {"success": True, "message": "Configuration updated"}
+    """Update configuration and propagate it to every worker"""
+    # Overrides live on the default shard whichever school the admin is scoped to
+    async with shard_router.session(DEFAULT_SHARD) as db:
+        applied = await config_service.update(db, config_data.model_dump(exclude_none=True))
+    
+    return {
+        "success": True,
+        "message": "Configuration updated" if applied else "No changes",
+        "config": config_service.to_dict()
+    }
+
+
+# Search
+@router.get("/search")
+async def search(
+    q: str,
+    types: Optional[str] = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db)
+):
+    """Ranked search across users, courses, modules and questions"""
+    requested = types.split(",") if types else SEARCH_TYPES
+    unknown = [t for t in requested if t not in SEARCH_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+    
+    return await search_service.search(db, q, requested, min(limit, 100))
+
+
+@router.get("/search/typeahead")
+async def search_typeahead(
+    q: str,
+    type: str = "users",
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db)
+):
+    """Prefix suggestions for the admin search box"""
+    try:
+        return await search_service.typeahead(db, q, type, min(limit, 50))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Metrics
+@router.get("/metrics/queries")
+async def get_query_metrics(reset: bool = False):
+    """Per-route SQL statement counts and DB time for this worker"""
+    snapshot = query_metrics.snapshot()
+    if reset:
+        query_metrics.reset()
+    return snapshot
+
+
+@router.get("/metrics/admission")
+async def get_admission_metrics():
+    """Admission control limits, queue depth, shed counts and wait times for this worker"""
+    return admission_service.metrics()
 
 
 # Activity Logs
@@ -371,9 +560,13 @@ async def get_activity_logs(
     user_id: Optional[int] = None,
     action_type: Optional[str] = None,
     limit: int = 50,
-    db: AsyncSession = Depends(get_db)
+    school_id: Optional[int] = None
 ):
-    """Get activity logs with optional filters"""
+    """
+    Get the latest activity logs across shards with optional filters
+    
+    user_id is per shard; pass school_id with it to read only that school's shard.
+    """
     query = select(ActivityLog).order_by(ActivityLog.created_at.desc()).limit(limit)
     
     if user_id:
@@ -381,8 +574,23 @@ async def get_activity_logs(
     if action_type:
         query = query.where(ActivityLog.action_type == action_type)
     
-    result = await db.execute(query)
-    logs = result.scalars().all()
+    async def fetch(db: AsyncSession):
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    if school_id is not None:
+        shard = shard_router.shard_for_school(school_id)
+        async with shard_router.session(shard) as db:
+            results = [(shard, await fetch(db))]
+    else:
+        results = await shard_router.fan_out(fetch)
+    
+    # Each shard returned its newest `limit`; keep the newest `limit` overall
+    merged = sorted(
+        ((shard, log) for shard, logs in results for log in logs),
+        key=lambda pair: pair[1].created_at,
+        reverse=True
+    )[:limit]
     
     return [
         {
@@ -391,7 +599,52 @@ async def get_activity_logs(
             "action_type": log.action_type,
             "entity_type": log.entity_type,
             "entity_id": log.entity_id,
-            "created_at": log.created_at
+            "created_at": log.created_at,
+            "shard": shard
         }
-        for log in logs
+        for shard, log in merged
     ]
+
+
+# Progress Event Log
+@router.get("/progress-events")
+async def get_progress_events(
+    since: datetime,
+    until: datetime,
+    course_id: Optional[int] = None,
+    enrollment_id: Optional[int] = None,
+    limit: int = 1000,
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Page through progress events in [since, until), in log order
+    
+    Reads the shard of the school_id query parameter. Pass the X-Next-Cursor
+    header of one response as after_id to get the next page.
+    """
+    limit = max(1, min(limit, 5000))
+    query = progress_log.events_query(since, until, course_id, enrollment_id).limit(limit + 1)
+    if after_id is not None:
+        query = query.where(ProgressEvent.id > after_id)
+    
+    result = await db.execute(query)
+    events = result.scalars().all()
+    
+    headers = {}
+    if len(events) > limit:
+        events = events[:limit]
+        headers["X-Next-Cursor"] = str(events[-1].id)
+    
+    return FastJSONResponse([
+        {
+            "id": event.id,
+            "enrollment_id": event.enrollment_id,
+            "module_id": event.module_id,
+            "completion_percent": event.completion_percent,
+            "source": event.source,
+            "created_at": event.created_at,
+            "compacted_at": event.compacted_at
+        }
+        for event in events
+    ], headers=headers)
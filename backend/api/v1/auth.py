@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from db.session import get_db
+from db.shards import shard_router
 from models.user import User
 from api.v1.schemas import LoginRequest, RoleSelectionRequest, AuthResponse
 import secrets
@@ -13,19 +14,20 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=dict)
-async def login(
-    request: LoginRequest,
-    db: AsyncSession = Depends(get_db)
-):
+async def login(request: LoginRequest):
     """
     Demo login - accepts any email/password for POC
     Returns user info without role selection
     """
+    # The email is in the body, so get_db cannot pick the user's shard
+    shard = await shard_router.shard_for_email(request.email)
+    
     # For POC, just check if user exists by email
-    result = await db.execute(
-        select(User).where(User.email == request.email)
-    )
-    user = result.scalar_one_or_none()
+    async with shard_router.session(shard) as db:
+        result = await db.execute(
+            select(User).where(User.email == request.email)
+        )
+        user = result.scalar_one_or_none()
     
     if not user:
         # Create a demo message
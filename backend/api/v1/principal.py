@@ -7,9 +7,11 @@ from sqlalchemy import select, func
 from db.session import get_db
 from models.user import User, UserRole
 from models.principal_profile import PrincipalProfile
-from models.course import Course
+from models.course import Course, live_course
 from models.student_profile import StudentProfile
 from models.teacher_profile import TeacherProfile
+from services.activity_service import activity_service
+from services.enrollment_summary_service import enrollment_summary_service
 from api.v1.schemas import PrincipalDashboardSummary, CompletionByGrade, WeeklyActiveData, TopPerformer
 from typing import List
 
@@ -61,15 +63,17 @@ async def get_dashboard(
     # Get total courses
     result = await db.execute(
         select(func.count(Course.id))
-        .where(Course.school_id == profile.school_id)
+        .where(Course.school_id == profile.school_id, live_course())
     )
     total_courses = result.scalar() or 0
     
+    average_completion, _ = await enrollment_summary_service.school_averages(db, profile.school_id)
+    
     return PrincipalDashboardSummary(
         total_students=total_students,
         total_teachers=total_teachers,
         total_courses=total_courses,
-        average_completion=72.5
+        average_completion=round(average_completion, 2)
     )
 
 
@@ -81,10 +85,11 @@ async def get_completion_by_grade(
     """Get completion percentage by grade"""
     user, profile = await get_principal_by_email(email, db)
     
-    # For demo, return sample data
+    rows = await enrollment_summary_service.completion_by_grade(db, profile.school_id)
+    
     return [
-        CompletionByGrade(grade="10", completion_percent=75.0),
-        CompletionByGrade(grade="12", completion_percent=80.0),
+        CompletionByGrade(grade=grade, completion_percent=round(completion, 2))
+        for grade, completion in rows
     ]
 
 
@@ -93,12 +98,14 @@ async def get_weekly_active(
     email: str,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get weekly active students trend"""
+    """Get weekly active students trend for the last 4 weeks"""
+    user, profile = await get_principal_by_email(email, db)
+    
+    counts = await activity_service.weekly_active_counts(db, profile.school_id, weeks=4)
+    
     return [
-        WeeklyActiveData(week="Week 1", active_students=45),
-        WeeklyActiveData(week="Week 2", active_students=50),
-        WeeklyActiveData(week="Week 3", active_students=48),
-        WeeklyActiveData(week="Week 4", active_students=52),
+        WeeklyActiveData(week=f"Week of {week_start.isoformat()}", active_students=active)
+        for week_start, active in counts
     ]
 
 
@@ -110,21 +117,11 @@ async def get_top_performers(
     """Get top performing students"""
     user, profile = await get_principal_by_email(email, db)
     
-    # Get students from this school
-    result = await db.execute(
-        select(User)
-        .where(User.school_id == profile.school_id, User.role == UserRole.STUDENT)
-        .limit(5)
-    )
-    students = result.scalars().all()
+    students = await enrollment_summary_service.top_students(db, profile.school_id)
     
     return [
-        TopPerformer(
-            user_id=student.id,
-            name=student.name,
-            performance_index=90.0 + i
-        )
-        for i, student in enumerate(students)
+        TopPerformer(user_id=user_id, name=name, performance_index=round(performance, 2))
+        for user_id, name, performance in students
     ]
 
 
@@ -136,20 +133,17 @@ async def get_courses(
     """Get all courses in school"""
     user, profile = await get_principal_by_email(email, db)
     
-    result = await db.execute(
-        select(Course).where(Course.school_id == profile.school_id)
-    )
-    courses = result.scalars().all()
+    courses = await enrollment_summary_service.course_overview(db, profile.school_id)
     
     return [
         {
             "id": course.id,
             "title": course.title,
             "subject": course.subject,
-            "total_enrollments": 15,
-            "average_completion": 75.0
+            "total_enrollments": total_enrollments,
+            "average_completion": round(average_completion, 2)
         }
-        for course in courses
+        for course, total_enrollments, average_completion in courses
     ]
 
 
@@ -1,7 +1,7 @@
 """
 Pydantic schemas for API request/response models
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -75,11 +75,13 @@ class QuizData(BaseModel):
     time_limit_seconds: int
     pass_score_percent: int
     questions: List[QuizQuestion]
+    session_id: Optional[str] = None  # Echo back on submit for server-side scoring
 
 
 class QuizSubmission(BaseModel):
     answers: Dict[int, int]  # question_id -> option_id
-    time_taken_seconds: int
+    session_id: str  # From QuizData; scoring and timing come from the session
+    time_taken_seconds: Optional[int] = None  # Ignored; the server times the attempt
 
 
 class QuizResult(BaseModel):
@@ -93,6 +95,7 @@ class QuizResult(BaseModel):
     passed: bool
     pass_score_percent: int
     remaining_attempts: int
+    module_completed: bool = False
     explanations: List[Dict[str, str]]
 
 
@@ -132,6 +135,15 @@ class ChatbotResponse(BaseModel):
     snippets: List[str]
 
 
+class BatchPart(BaseModel):
+    id: str  # Echoed back with the part's response
+    path: str  # GET route under the batch's role prefix, e.g. "/wallet" or "/course/3"
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchPart]
+
+
 # Teacher Schemas
 class TeacherDashboardSummary(BaseModel):
     total_courses: int
@@ -242,8 +254,35 @@ class QuestionCreate(BaseModel):
 
 
 class ConfigUpdate(BaseModel):
-    credit_fast_and_full: Optional[int]
-    credit_normal_and_full: Optional[int]
-    credit_other: Optional[int]
-    fast_threshold_seconds: Optional[int]
-    normal_threshold_seconds: Optional[int]
+    # Bounds keep an admin typo from reaching every worker, e.g. a zero
+    # admission limit that would shed all requests of its class
+    # Quiz defaults
+    default_questions: Optional[int] = Field(None, ge=1)
+    default_time_limit_seconds: Optional[int] = Field(None, ge=1)
+    default_pass_score_percent: Optional[int] = Field(None, ge=0, le=100)
+    max_attempts: Optional[int] = Field(None, ge=1)
+    completion_threshold_percent: Optional[int] = Field(None, ge=1, le=100)
+    # Credit slabs
+    credit_fast_and_full: Optional[int] = Field(None, ge=0)
+    credit_normal_and_full: Optional[int] = Field(None, ge=0)
+    credit_other: Optional[int] = Field(None, ge=0)
+    fast_threshold_seconds: Optional[int] = Field(None, ge=1)
+    normal_threshold_seconds: Optional[int] = Field(None, ge=1)
+    # Badge thresholds
+    badge_high_performer_modules: Optional[int] = Field(None, ge=1)
+    badge_speed_master_count: Optional[int] = Field(None, ge=1)
+    badge_dedicated_learner_days: Optional[int] = Field(None, ge=1)
+    # Teacher credits
+    teacher_credit_syllabus_completion: Optional[int] = Field(None, ge=0)
+    teacher_credit_high_student_performance: Optional[int] = Field(None, ge=0)
+    teacher_credit_evidence_submission: Optional[int] = Field(None, ge=0)
+    teacher_high_performance_threshold: Optional[int] = Field(None, ge=0, le=100)
+    # Admission control
+    admission_max_concurrency: Optional[int] = Field(None, ge=1)
+    admission_limit_quiz_submit: Optional[int] = Field(None, ge=1)
+    admission_limit_quiz_generate: Optional[int] = Field(None, ge=1)
+    admission_limit_progress: Optional[int] = Field(None, ge=1)
+    admission_limit_dashboard: Optional[int] = Field(None, ge=1)
+    admission_limit_default: Optional[int] = Field(None, ge=1)
+    admission_queue_timeout_seconds: Optional[int] = Field(None, ge=1)
+    admission_max_queue: Optional[int] = Field(None, ge=1)
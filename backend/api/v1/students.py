@@ -1,29 +1,39 @@
 """
 Student API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from db.session import get_db
 from models.user import User
 from models.student_profile import StudentProfile
 from models.enrollment import Enrollment
-from models.course import Course
+from models.course import Course, live_course
 from models.curriculum_module import CurriculumModule
-from models.module_progress import ModuleProgress, ProgressStatus
+from models.module_progress import ModuleProgress
+from models.enrollment_summary import EnrollmentSummary
 from models.content_item import ContentItem
 from models.wallet_account import WalletAccount
-from models.wallet_transaction import WalletTransaction
+from models.wallet_transaction import WalletTransaction, TransactionType
 from models.user_badge import UserBadge
 from models.badge import Badge
 from models.activity_log import ActivityLog
 from services.progression_service import progression_service
-from services.quiz_service import quiz_service
+from services.quiz_service import quiz_service, QuizSessionError
 from services.config_service import config_service
+from services.badge_service import badge_service, QUIZ_ATTEMPT_SCORED, MODULE_COMPLETED, DAILY_ACTIVITY
+from services.activity_service import activity_service
+from services.retrieval_service import retrieval_service, SNIPPET_CHARS
+from services.live_progress import live_progress, PROGRESS_EVENT, QUIZ_ATTEMPT_EVENT
+from services.progress_log import progress_log
+from services.course_snapshot_service import course_snapshot_service
+from services.enrollment_summary_service import average_completion
+from core.responses import FastJSONResponse
+from core.batch import run_batch
 from api.v1.schemas import (
     DashboardSummary, CourseListItem, ModuleInfo, ContentItemInfo,
-    QuizData, QuizSubmission, QuizResult, WalletInfo, WalletTransaction as WalletTransactionSchema,
-    BadgeInfo, ContentTrackingRequest, ChatbotQuery, ChatbotResponse
+    QuizData, QuizSubmission, QuizResult, WalletInfo,
+    BadgeInfo, ContentTrackingRequest, ChatbotQuery, ChatbotResponse, BatchRequest
 )
 from typing import List
 from datetime import datetime
@@ -33,23 +43,41 @@ router = APIRouter()
 
 # Helper to get student profile from user email
 async def get_student_by_email(email: str, db: AsyncSession):
+    # Resolved once per session, so the parts of a batch share the lookup
+    key = ("student", email)
+    if key in db.info:
+        return db.info[key]
+    
     result = await db.execute(
-        select(User).where(User.email == email)
+        select(User, StudentProfile)
+        .outerjoin(StudentProfile, StudentProfile.user_id == User.id)
+        .where(User.email == email)
     )
-    user = result.scalar_one_or_none()
-    if not user:
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
     
-    result = await db.execute(
-        select(StudentProfile).where(StudentProfile.user_id == user.id)
-    )
-    profile = result.scalar_one_or_none()
+    user, profile = row
     if not profile:
         raise HTTPException(status_code=404, detail="Student profile not found")
     
+    db.info[key] = (user, profile)
     return user, profile
 
 
+async def get_live_module(module_id: int, db: AsyncSession) -> CurriculumModule:
+    """Module by id; modules of archived courses are not found"""
+    result = await db.execute(
+        select(CurriculumModule)
+        .join(Course, Course.id == CurriculumModule.course_id)
+        .where(CurriculumModule.id == module_id, live_course())
+    )
+    module = result.scalar_one_or_none()
+    if not module:
+        raise HTTPException(status_code=404, detail="Module not found")
+    return module
+
+
 @router.get("/dashboard")
 async def get_dashboard(
     email: str,
@@ -58,20 +86,13 @@ async def get_dashboard(
     """Get student dashboard summary"""
     user, profile = await get_student_by_email(email, db)
     
-    # Get total active courses
-    result = await db.execute(
-        select(func.count(Enrollment.id))
-        .where(Enrollment.student_id == profile.id)
-    )
-    total_courses = result.scalar() or 0
-    
-    # Get average completion
+    # Get total active courses and average completion
     result = await db.execute(
-        select(func.avg(ModuleProgress.completion_percent))
-        .join(Enrollment, Enrollment.id == ModuleProgress.enrollment_id)
+        select(func.count(Enrollment.id), average_completion())
+        .outerjoin(EnrollmentSummary, EnrollmentSummary.enrollment_id == Enrollment.id)
         .where(Enrollment.student_id == profile.id)
     )
-    avg_completion = result.scalar() or 0.0
+    total_courses, avg_completion = result.one()
     
     # Get wallet balance
     result = await db.execute(
@@ -103,35 +124,25 @@ async def get_courses(
     """Get all enrolled courses for student"""
     user, profile = await get_student_by_email(email, db)
     
-    # Get enrollments with courses
+    # Get enrollments with courses and their progress summaries
     result = await db.execute(
-        select(Enrollment, Course)
+        select(Enrollment, Course, EnrollmentSummary)
         .join(Course, Course.id == Enrollment.course_id)
-        .where(Enrollment.student_id == profile.id)
+        .outerjoin(EnrollmentSummary, EnrollmentSummary.enrollment_id == Enrollment.id)
+        .where(Enrollment.student_id == profile.id, live_course())
     )
-    enrollments = result.all()
-    
-    courses = []
-    for enrollment, course in enrollments:
-        # Calculate completion for this course
-        result = await db.execute(
-            select(func.avg(ModuleProgress.completion_percent))
-            .where(
-                ModuleProgress.enrollment_id == enrollment.id
-            )
-        )
-        completion = result.scalar() or 0.0
-        
-        courses.append(CourseListItem(
+    
+    return [
+        CourseListItem(
             id=course.id,
             title=course.title,
             subject=course.subject,
             level=course.level,
-            completion_percent=round(completion, 2),
+            completion_percent=round(summary.completion_percent if summary else 0.0, 2),
             status=enrollment.status.value
-        ))
-    
-    return courses
+        )
+        for enrollment, course, summary in result.all()
+    ]
 
 
 @router.get("/course/{course_id}")
@@ -143,24 +154,20 @@ async def get_course_detail(
     """Get course details with modules"""
     user, profile = await get_student_by_email(email, db)
     
-    # Get enrollment
+    # Get enrollment with its course
     result = await db.execute(
-        select(Enrollment).where(
+        select(Enrollment, Course)
+        .join(Course, Course.id == Enrollment.course_id)
+        .where(
             Enrollment.student_id == profile.id,
-            Enrollment.course_id == course_id
+            Enrollment.course_id == course_id,
+            live_course()
         )
     )
-    enrollment = result.scalar_one_or_none()
-    if not enrollment:
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Enrollment not found")
-    
-    # Get course
-    result = await db.execute(
-        select(Course).where(Course.id == course_id)
-    )
-    course = result.scalar_one_or_none()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
+    enrollment, course = row
     
     # Get modules with unlock status
     modules = await progression_service.get_available_modules(db, enrollment.id, course_id)
@@ -175,6 +182,42 @@ async def get_course_detail(
     }
 
 
+@router.get("/course/{course_id}/outline")
+async def get_course_outline(
+    course_id: int,
+    request: Request,
+    email: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a course's modules and their content items
+    
+    The outline is the same for every student, so it is served from a
+    precompressed snapshot. Send its ETag back in If-None-Match to get a
+    304 while the course is unchanged.
+    """
+    user, profile = await get_student_by_email(email, db)
+    
+    # Archived courses have no outline
+    result = await db.execute(
+        select(Enrollment.id)
+        .join(Course, Course.id == Enrollment.course_id)
+        .where(
+            Enrollment.student_id == profile.id,
+            Enrollment.course_id == course_id,
+            live_course()
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Enrollment not found")
+    
+    snapshot = await course_snapshot_service.get(db, course_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    
+    return snapshot.response(request)
+
+
 @router.get("/module/{module_id}")
 async def get_module_detail(
     module_id: int,
@@ -184,13 +227,7 @@ async def get_module_detail(
     """Get module details with content items"""
     user, profile = await get_student_by_email(email, db)
     
-    # Get module
-    result = await db.execute(
-        select(CurriculumModule).where(CurriculumModule.id == module_id)
-    )
-    module = result.scalar_one_or_none()
-    if not module:
-        raise HTTPException(status_code=404, detail="Module not found")
+    module = await get_live_module(module_id, db)
     
     # Get enrollment for this course
     result = await db.execute(
@@ -255,10 +292,7 @@ async def track_content(
     user, profile = await get_student_by_email(email, db)
     
     # Get enrollment
-    result = await db.execute(
-        select(CurriculumModule).where(CurriculumModule.id == module_id)
-    )
-    module = result.scalar_one_or_none()
+    module = await get_live_module(module_id, db)
     
     result = await db.execute(
         select(Enrollment).where(
@@ -267,36 +301,32 @@ async def track_content(
         )
     )
     enrollment = result.scalar_one_or_none()
+    if not enrollment:
+        raise HTTPException(status_code=403, detail="Not enrolled in this course")
     
-    # Get or create progress
-    result = await db.execute(
-        select(ModuleProgress).where(
-            ModuleProgress.enrollment_id == enrollment.id,
-            ModuleProgress.module_id == module_id
-        )
+    # Appended to the progress log; the ModuleProgress snapshot catches up on compaction
+    completion_percent, status, changed = await progress_log.track(
+        db, enrollment.id, module_id, request.progress_percent
     )
-    progress = result.scalar_one_or_none()
-    
-    if not progress:
-        progress = ModuleProgress(
-            enrollment_id=enrollment.id,
-            module_id=module_id,
-            completion_percent=0.0,
-            status=ProgressStatus.IN_PROGRESS
-        )
-        db.add(progress)
-    
-    # Update progress
-    progress.completion_percent = max(progress.completion_percent, request.progress_percent)
-    if progress.completion_percent >= 100.0:
-        progress.completion_percent = 100.0
     
-    if progress.status == ProgressStatus.NOT_STARTED:
-        progress.status = ProgressStatus.IN_PROGRESS
+    # Only real changes reach teacher live views, not repeated heartbeats
+    if changed:
+        await live_progress.publish(db, module.course_id, profile.class_section_id, PROGRESS_EVENT, {
+            "student_id": user.id,
+            "student_name": user.name,
+            "module_id": module_id,
+            "completion_percent": completion_percent,
+            "status": status.value
+        })
+    
+    # First activity of the day extends the streak and may unlock a badge
+    streak = await activity_service.record_activity(db, user.id, user.school_id)
+    if streak is not None:
+        await badge_service.process_events(db, [(user.id, DAILY_ACTIVITY, {"streak_days": streak})])
     
     await db.commit()
     
-    return {"success": True, "completion_percent": progress.completion_percent}
+    return {"success": True, "completion_percent": completion_percent}
 
 
 @router.get("/module/{module_id}/quiz", response_model=QuizData)
@@ -309,10 +339,7 @@ async def generate_quiz(
     user, profile = await get_student_by_email(email, db)
     
     # Get enrollment
-    result = await db.execute(
-        select(CurriculumModule).where(CurriculumModule.id == module_id)
-    )
-    module = result.scalar_one_or_none()
+    module = await get_live_module(module_id, db)
     
     result = await db.execute(
         select(Enrollment).where(
@@ -321,14 +348,16 @@ async def generate_quiz(
         )
     )
     enrollment = result.scalar_one_or_none()
+    if not enrollment:
+        raise HTTPException(status_code=403, detail="Not enrolled in this course")
     
     # Check if can take quiz
     can_take, reason = await quiz_service.can_take_quiz(db, enrollment.id, module_id)
     if not can_take:
         raise HTTPException(status_code=400, detail=reason)
     
-    # Generate quiz
-    quiz_data = await quiz_service.generate_quiz(db, module_id)
+    # Generate quiz and record the served questions in a quiz session
+    quiz_data = await quiz_service.generate_quiz(db, module_id, enrollment.id)
     
     return QuizData(**quiz_data)
 
@@ -344,10 +373,7 @@ async def submit_quiz(
     user, profile = await get_student_by_email(email, db)
     
     # Get enrollment
-    result = await db.execute(
-        select(CurriculumModule).where(CurriculumModule.id == module_id)
-    )
-    module = result.scalar_one_or_none()
+    module = await get_live_module(module_id, db)
     
     result = await db.execute(
         select(Enrollment).where(
@@ -356,15 +382,29 @@ async def submit_quiz(
         )
     )
     enrollment = result.scalar_one_or_none()
+    if not enrollment:
+        raise HTTPException(status_code=403, detail="Not enrolled in this course")
     
     # Score quiz
-    result = await quiz_service.submit_and_score_quiz(
-        db,
-        enrollment.id,
-        module_id,
-        submission.answers,
-        submission.time_taken_seconds
-    )
+    try:
+        result = await quiz_service.submit_and_score_quiz(
+            db,
+            enrollment.id,
+            module,
+            submission.answers,
+            submission.session_id
+        )
+    except QuizSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Feed badge counters; awards are written with the wallet update below
+    badge_events = [(user.id, QUIZ_ATTEMPT_SCORED, result)]
+    if result["module_completed"]:
+        badge_events.append((user.id, MODULE_COMPLETED, {"score_percent": result["score_percent"]}))
+    streak = await activity_service.record_activity(db, user.id, user.school_id)
+    if streak is not None:
+        badge_events.append((user.id, DAILY_ACTIVITY, {"streak_days": streak}))
+    await badge_service.process_events(db, badge_events)
     
     # Award credits if passed
     if result["passed"]:
@@ -374,34 +414,53 @@ async def submit_quiz(
             result["completed_in_time"]
         )
         
-        # Get or create wallet
-        wallet_result = await db.execute(
-            select(WalletAccount).where(WalletAccount.user_id == user.id)
-        )
-        wallet = wallet_result.scalar_one_or_none()
-        
-        if wallet and credits > 0:
-            # Add transaction
-            transaction = WalletTransaction(
-                wallet_id=wallet.id,
-                reference_type="Quiz",
-                reference_id=result["attempt_id"],
-                credits_delta=credits,
-                description=f"Module quiz completion - {credits} credits"
+        if credits > 0:
+            # Credit the balance in place; the returned id links the transaction
+            wallet_result = await db.execute(
+                update(WalletAccount)
+                .where(WalletAccount.user_id == user.id)
+                .values(balance_credits=WalletAccount.balance_credits + credits)
+                .returning(WalletAccount.id)
+                .execution_options(synchronize_session=False)
             )
-            wallet.balance_credits += credits
-            db.add(transaction)
-            await db.commit()
+            wallet_id = wallet_result.scalar_one_or_none()
+            
+            if wallet_id is not None:
+                db.add(WalletTransaction(
+                    wallet_id=wallet_id,
+                    reference_type=TransactionType.QUIZ,
+                    reference_id=result["attempt_id"],
+                    credits_delta=credits,
+                    description=f"Module quiz completion - {credits} credits"
+                ))
+    
+    await live_progress.publish(db, module.course_id, profile.class_section_id, QUIZ_ATTEMPT_EVENT, {
+        "student_id": user.id,
+        "student_name": user.name,
+        "module_id": module_id,
+        "attempt_id": result["attempt_id"],
+        "attempt_number": result["attempt_number"],
+        "score_percent": result["score_percent"],
+        "passed": result["passed"],
+        "module_completed": result["module_completed"]
+    })
+    
+    await db.commit()
     
     return QuizResult(**result)
 
 
-@router.get("/wallet", response_model=WalletInfo)
+@router.get("/wallet", responses={200: {"model": WalletInfo}})
 async def get_wallet(
     email: str,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get wallet balance and transaction history"""
+    """
+    Get wallet balance and transaction history
+    
+    Rows are serialized directly (FastJSONResponse); the body has the
+    WalletInfo shape.
+    """
     user, profile = await get_student_by_email(email, db)
     
     # Get wallet
@@ -411,29 +470,26 @@ async def get_wallet(
     wallet = result.scalar_one_or_none()
     
     if not wallet:
-        return WalletInfo(balance_credits=0.0, transactions=[])
+        return FastJSONResponse({"balance_credits": 0.0, "transactions": []})
     
-    # Get transactions
+    # Get transactions as plain rows; history can run to thousands of entries
     result = await db.execute(
-        select(WalletTransaction)
+        select(
+            WalletTransaction.id,
+            WalletTransaction.reference_type,
+            WalletTransaction.credits_delta,
+            WalletTransaction.description,
+            WalletTransaction.created_at
+        )
         .where(WalletTransaction.wallet_id == wallet.id)
         .order_by(WalletTransaction.created_at.desc())
     )
-    transactions = result.scalars().all()
-    
-    return WalletInfo(
-        balance_credits=wallet.balance_credits,
-        transactions=[
-            WalletTransactionSchema(
-                id=t.id,
-                reference_type=t.reference_type.value,
-                credits_delta=t.credits_delta,
-                description=t.description,
-                created_at=t.created_at
-            )
-            for t in transactions
-        ]
-    )
+    columns = ("id", "reference_type", "credits_delta", "description", "created_at")
+    
+    return FastJSONResponse({
+        "balance_credits": wallet.balance_credits,
+        "transactions": [dict(zip(columns, row)) for row in result.all()]
+    })
 
 
 @router.get("/badges", response_model=List[BadgeInfo])
@@ -471,14 +527,57 @@ async def chatbot_query(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Simple chatbot for course queries
-    For POC, returns a simple response
+    Answer course queries from the course's own material
+    Uses the in-process BM25 index, scoped to the requested enrolled course
     """
-    # Simple implementation - in production would use vector search
+    user, profile = await get_student_by_email(email, db)
+    
+    # Archived courses are not searched
+    result = await db.execute(
+        select(Enrollment.id)
+        .join(Course, Course.id == Enrollment.course_id)
+        .where(
+            Enrollment.student_id == profile.id,
+            Enrollment.course_id == query.course_id,
+            live_course()
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=403, detail="Not enrolled in this course")
+    
+    hits = await retrieval_service.search(db, query.course_id, query.query, k=3)
+    
+    if not hits:
+        return ChatbotResponse(
+            answer="I couldn't find anything about that in this course's material. Try rephrasing or ask your teacher.",
+            snippets=[]
+        )
+    
+    snippets = [
+        f"{title}: {chunk[:SNIPPET_CHARS]}" for _, title, chunk in hits
+    ]
     return ChatbotResponse(
-        answer=f"Based on the course content, here's what I found about your query: '{query.query}'...",
-        snippets=[
-            "Content snippet 1 related to your question",
-            "Content snippet 2 with relevant information"
-        ]
+        answer=f"Here's what the course material says: {hits[0][2][:SNIPPET_CHARS]}",
+        snippets=snippets
     )
+
+
+# Read-only screens a batch may include
+BATCHABLE = (get_dashboard, get_courses, get_course_detail, get_module_detail, get_wallet, get_badges)
+
+
+@router.post("/batch")
+async def batch(
+    request: BatchRequest,
+    email: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Load several student screens in one round trip
+    
+    Each part is a GET path under /student (e.g. "/dashboard", "/course/3")
+    and gets its own status in the response; the home screen sends
+    dashboard, courses, wallet and badges together.
+    """
+    await get_student_by_email(email, db)
+    return await run_batch(router, request.requests, BATCHABLE, db, email=email)
@@ -2,20 +2,22 @@
 Teacher API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from db.session import get_db
+from db.shards import shard_of
 from models.user import User
 from models.teacher_profile import TeacherProfile
-from models.course import Course
-from models.enrollment import Enrollment
-from models.module_progress import ModuleProgress
-from models.quiz_attempt import QuizAttempt
+from models.course import Course, live_course
 from models.wallet_account import WalletAccount
 from models.user_badge import UserBadge
 from models.evidence_item import EvidenceItem
+from services.badge_service import badge_service, EVIDENCE_SUBMITTED
+from services.live_progress import live_progress
+from services.enrollment_summary_service import enrollment_summary_service
 from api.v1.schemas import TeacherDashboardSummary, StudentProgressItem, AtRiskStudent, EvidenceSubmission
-from typing import List
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -49,7 +51,7 @@ async def get_dashboard(
     # Get courses taught (for demo, get courses from teacher's school)
     result = await db.execute(
         select(func.count(Course.id))
-        .where(Course.school_id == user.school_id)
+        .where(Course.school_id == user.school_id, live_course())
     )
     total_courses = result.scalar() or 0
     
@@ -67,10 +69,12 @@ async def get_dashboard(
     )
     total_badges = result.scalar() or 0
     
+    average_completion, average_quiz_score = await enrollment_summary_service.school_averages(db, user.school_id)
+    
     return TeacherDashboardSummary(
         total_courses=total_courses,
-        average_class_completion=75.5,  # Calculated from student progress
-        average_quiz_score=85.0,
+        average_class_completion=round(average_completion, 2),
+        average_quiz_score=round(average_quiz_score, 2),
         wallet_balance=wallet_balance,
         total_badges=total_badges
     )
@@ -85,20 +89,17 @@ async def get_courses(
     user, profile = await get_teacher_by_email(email, db)
     
     # Get courses from teacher's school
-    result = await db.execute(
-        select(Course).where(Course.school_id == user.school_id)
-    )
-    courses = result.scalars().all()
+    courses = await enrollment_summary_service.course_overview(db, user.school_id)
     
     return [
         {
             "id": course.id,
             "title": course.title,
             "subject": course.subject,
-            "total_students": 10,  # Would calculate from enrollments
-            "average_completion": 75.0
+            "total_students": total_students,
+            "average_completion": round(average_completion, 2)
         }
-        for course in courses
+        for course, total_students, average_completion in courses
     ]
 
 
@@ -111,33 +112,50 @@ async def get_course_students(
     """Get student progress for a course"""
     user, profile = await get_teacher_by_email(email, db)
     
-    # Get enrollments for this course
+    students = await enrollment_summary_service.course_students(db, course_id)
+    
+    return [
+        StudentProgressItem(
+            student_id=student_user.id,
+            student_name=student_user.name,
+            completion_percent=round(summary.completion_percent if summary else 0.0, 2),
+            quiz_average=round(summary.quiz_average if summary else 0.0, 2),
+            status=enrollment.status.value
+        )
+        for student_user, enrollment, summary in students
+    ]
+
+
+@router.get("/course/{course_id}/live")
+async def stream_course_progress(
+    course_id: int,
+    email: str,
+    section_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Live progress and quiz attempts for a course as server-sent events
+
+    Events: progress, quiz_attempt, and resync (refetch the student list,
+    some events were missed). Pass section_id to watch one class section.
+    """
+    user, profile = await get_teacher_by_email(email, db)
+    
     result = await db.execute(
-        select(Enrollment).where(Enrollment.course_id == course_id)
+        select(Course.id).where(Course.id == course_id, Course.school_id == user.school_id)
     )
-    enrollments = result.scalars().all()
-    
-    students = []
-    for enrollment in enrollments[:5]:  # Limit for demo
-        # Get student user
-        from models.student_profile import StudentProfile
-        result = await db.execute(
-            select(User)
-            .join(StudentProfile, StudentProfile.user_id == User.id)
-            .where(StudentProfile.id == enrollment.student_id)
-        )
-        student_user = result.scalar_one_or_none()
-        
-        if student_user:
-            students.append(StudentProgressItem(
-                student_id=student_user.id,
-                student_name=student_user.name,
-                completion_percent=75.0,
-                quiz_average=85.0,
-                status="Active"
-            ))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    
+    # The stream itself runs no queries; don't hold a pooled connection for its lifetime
+    shard = shard_of(db)
+    await db.close()
     
-    return students
+    return StreamingResponse(
+        live_progress.stream(course_id, section_id, shard),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/at-risk-students", response_model=List[AtRiskStudent])
@@ -145,19 +163,21 @@ async def get_at_risk_students(
     email: str,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get list of at-risk students"""
+    """Get students falling behind or inactive in the school's courses"""
     user, profile = await get_teacher_by_email(email, db)
     
-    # For demo, return sample data
+    rows = await enrollment_summary_service.at_risk(db, user.school_id)
+    
     return [
         AtRiskStudent(
-            student_id=1,
-            student_name="Sample Student",
-            course_title="Sample Course",
-            completion_percent=25.0,
-            quiz_attempts=2,
-            last_activity=None
+            student_id=student_id,
+            student_name=student_name,
+            course_title=course_title,
+            completion_percent=round(completion_percent, 2),
+            quiz_attempts=quiz_attempts,
+            last_activity=last_activity
         )
+        for student_id, student_name, course_title, completion_percent, quiz_attempts, last_activity in rows
     ]
 
 
@@ -180,6 +200,7 @@ async def submit_evidence(
         file_url=evidence.file_url
     )
     db.add(evidence_item)
+    await badge_service.process_events(db, [(user.id, EVIDENCE_SUBMITTED, {})])
     await db.commit()
     
     return {"success": True, "evidence_id": evidence_item.id}
@@ -0,0 +1,342 @@
+"""
+Load Test - Concurrent student sessions against a running backend
+
+Each virtual user repeats a realistic session until the run ends:
+login -> dashboard -> course detail -> module detail -> track heartbeats
+-> quiz generate -> quiz submit -> wallet
+
+Students are sampled (deterministically, by seed) from the database the
+backend uses, so point it at data from db.generate_data. Each user works
+through the unlocked modules of one course; a quiz is answered from the
+answer key with probability --pass-rate, otherwise at random, so modules
+get completed and later ones unlock. A quiz the backend refuses (attempts
+used up) is expected, not an error: the user moves on to another module
+and the refusal is counted separately from latency and error data.
+
+Per endpoint it reports request count, errors, throughput, p50/p95/p99
+latency and DB queries per request (read from the X-DB-Query-Count header,
+which the backend sends when DEBUG is on).
+
+Usage:
+    python -m benchmarks.load_test --users 50 --duration 60 --output results.json
+    python -m benchmarks.load_test --users 50 --duration 60 --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import asyncpg
+import httpx
+
+from core.config import settings
+from core.query_stats import QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+
+ENDPOINTS = (
+    "login", "dashboard", "course_detail", "module_detail",
+    "track", "quiz_generate", "quiz_submit", "wallet",
+)
+
+
+class EndpointStats:
+    """Latencies and counters for one endpoint"""
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.errors = 0
+        self.refused = 0  # Expected 400s, e.g. no quiz attempts left
+        self.status_counts: Dict[int, int] = {}
+        self.query_counts: List[int] = []
+        self.db_time_ms: List[float] = []
+
+    def record(self, latency_ms: float, response: Optional[httpx.Response]) -> None:
+        self.latencies_ms.append(latency_ms)
+        if response is None:
+            self.errors += 1
+            return
+        self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+        if response.status_code >= 400:
+            self.errors += 1
+        if QUERY_COUNT_HEADER in response.headers:
+            self.query_counts.append(int(response.headers[QUERY_COUNT_HEADER]))
+        if QUERY_TIME_HEADER in response.headers:
+            self.db_time_ms.append(float(response.headers[QUERY_TIME_HEADER]))
+
+    def record_refusal(self, response: httpx.Response) -> None:
+        """Count an expected refusal without mixing it into latency or errors"""
+        self.refused += 1
+        self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "refused": self.refused,
+            "status_counts": {str(k): v for k, v in sorted(self.status_counts.items())},
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "queries_per_request": (
+                round(sum(self.query_counts) / len(self.query_counts), 2) if self.query_counts else None
+            ),
+            "db_time_ms_per_request": (
+                round(sum(self.db_time_ms) / len(self.db_time_ms), 2) if self.db_time_ms else None
+            ),
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[rank], 2)
+
+
+class StudentSession:
+    """One virtual user walking through the student flow"""
+
+    def __init__(self, client: httpx.AsyncClient, stats: Dict[str, EndpointStats], student: Dict,
+                 answer_key: Dict[int, int], rng: random.Random, args):
+        self.client = client
+        self.stats = stats
+        self.email = student["email"]
+        self.course_id = student["course_id"]
+        self.answer_key = answer_key
+        self.rng = rng
+        self.args = args
+        self.quiz_closed: Set[int] = set()  # Modules whose quiz refused this user
+
+    async def call(self, endpoint: str, method: str, path: str, expected_refusal: bool = False,
+                   **kwargs) -> Optional[httpx.Response]:
+        params = kwargs.pop("params", {})
+        params.setdefault("email", self.email)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, params=params, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        if expected_refusal and response is not None and response.status_code == 400:
+            self.stats[endpoint].record_refusal(response)
+        else:
+            self.stats[endpoint].record((time.perf_counter() - started) * 1000, response)
+        if self.args.think_ms:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think_ms) / 1000)
+        return response
+
+    async def run_once(self) -> None:
+        await self.call("login", "POST", "/auth/login", json={"email": self.email, "password": "bench"})
+        await self.call("dashboard", "GET", "/student/dashboard")
+
+        response = await self.call("course_detail", "GET", f"/student/course/{self.course_id}")
+        if response is None or response.status_code != 200:
+            return
+        modules = [m for m in response.json().get("modules", []) if m.get("is_unlocked")]
+        if not modules:
+            return
+        pending = [m for m in modules if m.get("status") != "Completed"]
+        quiz_pending = [m for m in pending if m["id"] not in self.quiz_closed]
+        module_id = (quiz_pending or pending or modules)[0]["id"]
+
+        response = await self.call("module_detail", "GET", f"/student/module/{module_id}")
+        if response is not None and response.status_code == 200:
+            items = response.json().get("content_items", [])
+            if items:
+                item_id = self.rng.choice(items)["id"]
+                for step in range(1, self.args.heartbeats + 1):
+                    await self.call(
+                        "track", "POST", f"/student/module/{module_id}/track",
+                        json={"content_item_id": item_id, "progress_percent": 100.0 * step / self.args.heartbeats}
+                    )
+
+        if quiz_pending:
+            await self.take_quiz(module_id)
+
+        await self.call("wallet", "GET", "/student/wallet")
+
+    async def take_quiz(self, module_id: int) -> None:
+        response = await self.call(
+            "quiz_generate", "GET", f"/student/module/{module_id}/quiz", expected_refusal=True
+        )
+        if response is not None and response.status_code == 400:
+            self.quiz_closed.add(module_id)
+        if response is None or response.status_code != 200:
+            return
+
+        quiz = response.json()
+        knows_answers = self.rng.random() < self.args.pass_rate
+        answers = {
+            str(q["question_id"]): (
+                self.answer_key[q["question_id"]] if knows_answers and q["question_id"] in self.answer_key
+                else self.rng.choice(q["options"])["option_id"]
+            )
+            for q in quiz["questions"] if q["options"]
+        }
+        response = await self.call(
+            "quiz_submit", "POST", f"/student/module/{module_id}/quiz/submit", expected_refusal=True,
+            json={"answers": answers, "session_id": quiz.get("session_id")}
+        )
+        if response is not None and response.status_code == 400:
+            self.quiz_closed.add(module_id)
+
+
+async def load_students(count: int, seed: int) -> Tuple[List[Dict], Dict[int, int]]:
+    """
+    Pick students with an active enrollment, reproducibly for a seed
+
+    Returns:
+        (students, answer key as question id -> correct option id)
+    """
+    dsn = settings.SQLALCHEMY_DATABASE_URI.replace("postgresql+asyncpg://", "postgresql://", 1)
+    conn = await asyncpg.connect(dsn)
+    try:
+        key_rows = await conn.fetch("SELECT question_id, id FROM questionoption WHERE is_correct")
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT ON (u.id) u.email, e.course_id
+            FROM "user" u
+            JOIN studentprofile sp ON sp.user_id = u.id
+            JOIN enrollment e ON e.student_id = sp.id
+            WHERE e.status = 'ACTIVE'
+            ORDER BY u.id, e.id
+            LIMIT $1
+            """,
+            count * 20
+        )
+    finally:
+        await conn.close()
+    students = [dict(row) for row in rows]
+    random.Random(seed).shuffle(students)
+    return students[:count], {row["question_id"]: row["id"] for row in key_rows}
+
+
+async def run_load_test(args) -> Dict:
+    students, answer_key = await load_students(args.users, args.seed)
+    if not students:
+        raise SystemExit("No students with active enrollments found; run db.generate_data first")
+
+    stats = {name: EndpointStats() for name in ENDPOINTS}
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+
+    async with httpx.AsyncClient(base_url=args.base_url.rstrip("/") + settings.API_V1_STR,
+                                 limits=limits, timeout=args.timeout) as client:
+        async def virtual_user(number: int) -> None:
+            student = students[number % len(students)]
+            session = StudentSession(client, stats, student, answer_key, random.Random(args.seed + number), args)
+            # Stagger start so the first second is not one synchronized burst
+            await asyncio.sleep(session.rng.uniform(0, args.ramp_up))
+            while time.perf_counter() < deadline:
+                await session.run_once()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(n) for n in range(args.users)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(s.latencies_ms) for s in stats.values())
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "users": args.users,
+            "duration_seconds": round(elapsed, 2),
+            "seed": args.seed,
+            "think_ms": args.think_ms,
+            "heartbeats": args.heartbeats,
+            "pass_rate": args.pass_rate,
+        },
+        "total": {
+            "requests": total,
+            "errors": sum(s.errors for s in stats.values()),
+            "refused": sum(s.refused for s in stats.values()),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        },
+        "endpoints": {name: stats[name].summary(elapsed) for name in ENDPOINTS},
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Flag endpoints that got slower, fetch more queries or serve less
+
+    Returns:
+        Human-readable regression descriptions (empty when none)
+    """
+    regressions = []
+    for name, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not current["requests"] or not before.get("requests"):
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if before.get(metric) and current[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before[metric]} -> {current[metric]}")
+        if (before.get("queries_per_request") is not None and current["queries_per_request"] is not None
+                and current["queries_per_request"] > before["queries_per_request"]):
+            regressions.append(
+                f"{name}: queries/request {before['queries_per_request']} -> {current['queries_per_request']}"
+            )
+        if before.get("throughput_rps") and current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: errors {before.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def print_report(results: Dict) -> None:
+    meta = results["meta"]
+    print(f"📊 {meta['users']} users for {meta['duration_seconds']}s against {meta['base_url']}")
+    print(f"{'endpoint':<15}{'reqs':>8}{'err':>6}{'refused':>9}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+    for name, s in results["endpoints"].items():
+        cells = [s["p50_ms"], s["p95_ms"], s["p99_ms"], s["queries_per_request"]]
+        p50, p95, p99, queries = ("-" if v is None else f"{v:.1f}" for v in cells)
+        print(f"{name:<15}{s['requests']:>8}{s['errors']:>6}{s['refused']:>9}{s['throughput_rps']:>9.1f}"
+              f"{p50:>9}{p95:>9}{p99:>9}{queries:>9}")
+    total = results["total"]
+    print(f"{'total':<15}{total['requests']:>8}{total['errors']:>6}{total['refused']:>9}{total['throughput_rps']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--ramp-up", type=float, default=2, help="Seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between requests")
+    parser.add_argument("--heartbeats", type=int, default=3, help="Track calls per module visit")
+    parser.add_argument("--pass-rate", type=float, default=0.7,
+                        help="Share of quizzes answered from the answer key (the rest at random)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Serialization Benchmark - Default FastAPI encoding vs the fast row path
+
+Measures rows/sec for a wallet-history style payload:
+- default: build Pydantic models per row, run jsonable_encoder, render JSONResponse
+- fast: serialize row tuples straight to bytes via core.responses
+
+Usage:
+    python -m benchmarks.serialization_benchmark --rows 5000 --repeat 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.v1.schemas import WalletInfo, WalletTransaction
+from core.responses import orjson, rows_to_json
+from models.wallet_transaction import TransactionType
+
+COLUMNS = ("id", "reference_type", "credits_delta", "description", "created_at")
+
+
+def build_rows(count: int):
+    """Build synthetic wallet transaction rows shaped like a column select"""
+    start = datetime(2025, 1, 1)
+    return [
+        (
+            i,
+            TransactionType.QUIZ,
+            15.0,
+            f"Module quiz completion - {i} credits",
+            start + timedelta(minutes=i)
+        )
+        for i in range(count)
+    ]
+
+
+def encode_default(rows) -> bytes:
+    info = WalletInfo(
+        balance_credits=100.0,
+        transactions=[
+            WalletTransaction(
+                id=row[0],
+                reference_type=row[1].value,
+                credits_delta=row[2],
+                description=row[3],
+                created_at=row[4]
+            )
+            for row in rows
+        ]
+    )
+    return JSONResponse(jsonable_encoder(info)).body
+
+
+def encode_fast(rows) -> bytes:
+    return rows_to_json(COLUMNS, rows)
+
+
+def measure(encoder, rows, repeat: int) -> float:
+    """Return rows/sec for the best of `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoder(rows)
+        best = min(best, time.perf_counter() - started)
+    return len(rows) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    rows = build_rows(args.rows)
+    default_rate = measure(encode_default, rows, args.repeat)
+    fast_rate = measure(encode_fast, rows, args.repeat)
+    
+    print(f"Rows per payload: {args.rows} (encoder: {'orjson' if orjson else 'json'})")
+    print(f"  default : {default_rate:>12,.0f} rows/sec")
+    print(f"  fast    : {fast_rate:>12,.0f} rows/sec")
+    print(f"  speedup : {fast_rate / default_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
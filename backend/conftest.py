@@ -0,0 +1,81 @@
+"""
+Test setup: a seeded Postgres database and an in-process API client
+
+Tests run against their own database (TEST_POSTGRES_DB, default
+achariya_lms_test) on the server configured by the usual POSTGRES_*
+variables. It is recreated and filled with db.seed_data once per run, so
+never point TEST_POSTGRES_DB at a database whose data you want to keep.
+Tests are skipped when the server cannot be reached.
+
+Tests share the seeded data; a test that writes should use a student no
+other test relies on.
+"""
+import os
+
+os.environ["POSTGRES_DB"] = os.getenv("TEST_POSTGRES_DB", "achariya_lms_test")
+
+import asyncpg
+import httpx
+import pytest
+
+from core.config import settings
+
+pytest_plugins = ["core.query_budget"]
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+async def _recreate_database() -> None:
+    server = await asyncpg.connect(
+        host=settings.POSTGRES_SERVER,
+        port=int(settings.POSTGRES_PORT),
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        database="postgres",
+    )
+    try:
+        await server.execute(f'DROP DATABASE IF EXISTS "{settings.POSTGRES_DB}" WITH (FORCE)')
+        await server.execute(f'CREATE DATABASE "{settings.POSTGRES_DB}"')
+    finally:
+        await server.close()
+
+
+@pytest.fixture(scope="session")
+async def seeded_db(anyio_backend):
+    """Fresh schema with the demo data from db.seed_data"""
+    try:
+        await _recreate_database()
+    except (OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Postgres is not available for tests: {e}")
+
+    from db.base import Base
+    from db.seed_data import seed_database
+    from db.session import engine
+
+    engine.echo = False
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await seed_database()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(seeded_db):
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=f"http://test{settings.API_V1_STR}") as client:
+        yield client
+
+
+@pytest.fixture
+async def db(seeded_db):
+    """Session on the test database, for arranging and checking data"""
+    from db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        yield session
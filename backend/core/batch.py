@@ -0,0 +1,117 @@
+"""
+Batched reads: several GET routes of one router in a single HTTP round trip
+
+A screen that needs four endpoints costs four round trips, each repeating
+the identity lookup and opening its own session. A batch endpoint resolves
+the caller once and runs each part's endpoint function directly on the
+request's session, returning one JSON document with a status per part:
+
+    {"responses": [{"id": "wallet", "status": 200, "body": {...}}, ...]}
+
+Parts run one after another: an AsyncSession serves one statement at a
+time, and the saving that matters on slow links is the HTTP round trips,
+not the few milliseconds of queries. Only read-only routes belong in a
+batch's allowed set; parts are not isolated from each other's writes.
+"""
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+import inspect
+import logging
+
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.responses import FastJSONResponse, dumps
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_PARTS = 10
+
+
+def _resolve(
+    router: APIRouter,
+    path: str,
+    endpoints: Collection[Callable]
+) -> Optional[Tuple[Callable, Dict[str, Any]]]:
+    """Find the allowed GET route matching path; returns (endpoint, path params)"""
+    for route in router.routes:
+        if not isinstance(route, APIRoute) or route.endpoint not in endpoints or "GET" not in route.methods:
+            continue
+        match = route.path_regex.match(path)
+        if match is None:
+            continue
+        signature = inspect.signature(route.endpoint)
+        params = {}
+        for name, value in match.groupdict().items():
+            annotation = signature.parameters[name].annotation
+            params[name] = annotation(value) if annotation in (int, float) else value
+        return route.endpoint, params
+    return None
+
+
+async def _run_part(
+    router: APIRouter,
+    path: str,
+    endpoints: Collection[Callable],
+    shared: Dict[str, Any],
+    db: AsyncSession
+) -> Tuple[int, bytes]:
+    """Run one part; returns (status, JSON body)"""
+    try:
+        resolved = _resolve(router, path, endpoints)
+    except ValueError:
+        return 422, dumps({"detail": "Invalid path parameter"})
+    if resolved is None:
+        return 404, dumps({"detail": "Not Found"})
+    endpoint, params = resolved
+
+    accepted = inspect.signature(endpoint).parameters
+    kwargs = {name: value for name, value in shared.items() if name in accepted}
+    try:
+        result = await endpoint(**params, **kwargs)
+    except HTTPException as e:
+        return e.status_code, dumps({"detail": e.detail})
+    except Exception:
+        logger.exception("Batch part %s failed", path)
+        # Leave the shared session usable for the parts after this one
+        await db.rollback()
+        return 500, dumps({"detail": "Internal Server Error"})
+
+    if isinstance(result, Response):
+        return result.status_code, bytes(result.body)
+    return 200, dumps(jsonable_encoder(result))
+
+
+async def run_batch(
+    router: APIRouter,
+    parts: List[Any],
+    endpoints: Collection[Callable],
+    db: AsyncSession,
+    **shared: Any
+) -> FastJSONResponse:
+    """
+    Run sub-requests against a router and combine their responses
+
+    Args:
+        router: Router whose routes the part paths are relative to
+        parts: Items with `id` and `path`
+        endpoints: Endpoint functions a batch may call
+        db: Session every part shares
+        **shared: Arguments passed to each endpoint that accepts them,
+            e.g. the caller's email
+
+    Raises:
+        HTTPException: 400 if the batch has more than MAX_BATCH_PARTS parts
+    """
+    if len(parts) > MAX_BATCH_PARTS:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {MAX_BATCH_PARTS} requests")
+
+    shared["db"] = db
+    chunks = []
+    for part in parts:
+        status, body = await _run_part(router, part.path, endpoints, shared, db)
+        chunks.append(b'{"id":' + dumps(part.id) + b',"status":' + str(status).encode() + b',"body":' + body + b"}")
+
+    # Part bodies are already encoded; splice them in rather than decoding and re-encoding
+    return FastJSONResponse(b'{"responses":[' + b",".join(chunks) + b"]}")
@@ -0,0 +1,163 @@
+"""
+Response compression
+
+CompressionMiddleware compresses complete API responses with brotli when the
+client accepts it and the brotli package is installed, otherwise gzip.
+Responses below settings.COMPRESSION_MIN_BYTES, streaming responses (server-
+sent events, chunked bodies), responses that already carry a
+Content-Encoding and routes listed in UNCOMPRESSED_ROUTES pass through as is.
+
+Payloads served many times unchanged (e.g. course outlines) are wrapped in a
+PrecompressedPayload instead: each encoding is produced once, at the highest
+level, and reused with an ETag so unchanged payloads cost a 304.
+"""
+from typing import Dict, Optional, Set
+import gzip
+import hashlib
+
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.query_stats import route_key
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip alone is still a large saving
+    brotli = None
+
+# Route keys (see core.query_stats.route_key) whose responses are never compressed
+UNCOMPRESSED_ROUTES: Set[str] = {
+    "GET teachers:/course/{course_id}/live",  # Server-sent events must reach the client per event
+}
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Dynamic responses favour speed; precompressed payloads are compressed once, so use the best ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+PRECOMPRESSED_GZIP_LEVEL = 9
+PRECOMPRESSED_BROTLI_QUALITY = 11
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding we can produce that the Accept-Encoding header allows: "br", "gzip" or None"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+
+    def allows(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allows("br"):
+        return "br"
+    if allows("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=PRECOMPRESSED_BROTLI_QUALITY if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=PRECOMPRESSED_GZIP_LEVEL if best else GZIP_LEVEL)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible single-body responses"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message  # Held until the body shows whether to compress
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            passthrough = True
+            if message.get("more_body", False) or not self._eligible(scope, start["status"], headers, body):
+                await send(start)
+                await send(message)
+                return
+
+            _add_vary(headers)
+            if encoding is not None:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _eligible(self, scope: Scope, status: int, headers: MutableHeaders, body: bytes) -> bool:
+        if len(body) < self.minimum_size or status in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("text/event-stream") or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        return route_key(scope) not in UNCOMPRESSED_ROUTES
+
+
+class PrecompressedPayload:
+    """
+    A JSON payload with its encodings cached
+
+    The ETag is a hash of the uncompressed body, so every worker derives the
+    same one for the same content and clients revalidate across workers.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding, best=True)
+        return data
+
+    def response(self, request: Request) -> Response:
+        """The payload in the best encoding the request accepts, or 304 if the client's copy is current"""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        encoding = accepted_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is None or len(self.body) < settings.COMPRESSION_MIN_BYTES:
+            return Response(self.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(self.encoded(encoding), media_type="application/json", headers=headers)
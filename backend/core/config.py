@@ -1,6 +1,7 @@
+import json
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Achariya Unified Learning Portal"
@@ -17,6 +18,33 @@ class Settings(BaseSettings):
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    # School-scoped shards beyond the main database, as JSON:
+    # {"north": {"uri": "postgresql+asyncpg://...", "schools": [3, 4]}}
+    # Schools not listed live on the main database (the "default" shard)
+    SHARDS: Optional[str] = os.getenv("SHARDS")
+    
+    @property
+    def SHARD_DATABASES(self) -> Dict[str, Dict]:
+        shards = {"default": {"uri": self.SQLALCHEMY_DATABASE_URI, "schools": []}}
+        if self.SHARDS:
+            shards.update(json.loads(self.SHARDS))
+        return shards
+
+    # Content augmentation pipeline database (optional, for chatbot retrieval)
+    AUGMENTATION_DATABASE_URI: Optional[str] = os.getenv("AUGMENTATION_DATABASE_URI")
+    
+    # Calendar day boundaries for activity streaks
+    ACTIVITY_TIMEZONE: str = os.getenv("ACTIVITY_TIMEZONE", "Asia/Kolkata")
+    
+    # Debug mode adds per-request DB query headers (X-DB-Query-Count, X-DB-Time-Ms)
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+    
+    # Warn when one SQL statement shape repeats more than this many times in a request
+    QUERY_REPEAT_WARNING_THRESHOLD: int = int(os.getenv("QUERY_REPEAT_WARNING_THRESHOLD", "10"))
+    
+    # Responses smaller than this are sent uncompressed (see core.compression)
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    
     # Auth
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
     ALGORITHM: str = "HS256"
@@ -0,0 +1,193 @@
+"""
+Query budgets - Maximum SQL statements and fetched rows per endpoint
+
+QUERY_BUDGETS is the single table of budgets for every api/v1 route, keyed
+like the query metrics (see core.query_stats.route_key). Budgets are
+measured against the demo data from db.seed_data, where a route that loops
+per row would already exceed them.
+
+Two ways to enforce them:
+- in tests, the `query_budget` pytest fixture (registered by the backend's
+  conftest.py) or the `within_query_budget` decorator wrap in-process
+  requests and fail on overspend; tests/test_query_budgets.py runs the hot
+  endpoints against the seeded data
+- with DEBUG on, the HTTP middleware logs every request over budget
+
+Example:
+    @within_query_budget("GET students:/course/{course_id}")
+    async def test_course_detail(client):
+        await client.get("/api/v1/student/course/1", params={"email": EMAIL})
+"""
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+import functools
+import inspect
+
+from core.query_stats import RequestQueryStats, start_request, end_request
+
+
+class QueryBudget(NamedTuple):
+    max_queries: int
+    max_rows: Optional[int] = None  # None = rows not budgeted
+
+
+# Route key -> budget. Endpoints that still scale with data are marked "grows";
+# tighten their budget when the loop is removed. Budgets assume one shard;
+# "per shard" routes fan out and run their budget once on every shard.
+QUERY_BUDGETS: Dict[str, QueryBudget] = {
+    # auth
+    "POST auth:/login": QueryBudget(1, 1),
+    "POST auth:/select-role": QueryBudget(0, 0),
+    "GET auth:/me": QueryBudget(0, 0),
+
+    # students
+    "GET students:/dashboard": QueryBudget(4),
+    "GET students:/courses": QueryBudget(2),
+    "GET students:/course/{course_id}": QueryBudget(4),
+    "GET students:/course/{course_id}/outline": QueryBudget(5),  # 2 once the snapshot is cached
+    "GET students:/module/{module_id}": QueryBudget(8),
+    "POST students:/module/{module_id}/track": QueryBudget(13),  # 12 once the badge rules are cached
+    "GET students:/module/{module_id}/quiz": QueryBudget(9),
+    "POST students:/module/{module_id}/quiz/submit": QueryBudget(18),  # 2 claim and store an Idempotency-Key, 1 loads the badge rules on a cold worker
+    "GET students:/wallet": QueryBudget(3),
+    "GET students:/badges": QueryBudget(2),
+    "POST students:/chatbot": QueryBudget(5),
+    "POST students:/batch": QueryBudget(8),  # home screen: dashboard, courses, wallet, badges; grows with parts
+
+    # teachers
+    "GET teachers:/dashboard": QueryBudget(6),
+    "GET teachers:/courses": QueryBudget(3),
+    "GET teachers:/course/{course_id}/students": QueryBudget(3),
+    "GET teachers:/course/{course_id}/live": QueryBudget(3),  # at connect; the stream runs none
+    "GET teachers:/at-risk-students": QueryBudget(3),
+    "POST teachers:/evidence": QueryBudget(6),
+    "GET teachers:/wallet": QueryBudget(3),
+
+    # principal
+    "GET principal:/dashboard": QueryBudget(6),
+    "GET principal:/completion-by-grade": QueryBudget(3),
+    "GET principal:/weekly-active": QueryBudget(3),
+    "GET principal:/top-performers": QueryBudget(3),
+    "GET principal:/courses": QueryBudget(3),
+    "GET principal:/export": QueryBudget(0, 0),
+
+    # admin
+    "GET admin:/dashboard": QueryBudget(2, 2),  # per shard
+    "GET admin:/courses": QueryBudget(1),
+    "POST admin:/courses": QueryBudget(2),
+    "PUT admin:/courses/{course_id}": QueryBudget(4),  # 1 of them only when the status changes
+    "DELETE admin:/courses/{course_id}": QueryBudget(4),  # 2 of them notify the course caches
+    "POST admin:/courses/{course_id}/purge": QueryBudget(1, 1),  # purge itself runs in the background
+    "GET admin:/courses/{course_id}/purge": QueryBudget(0, 0),
+    "GET admin:/course/{course_id}/modules": QueryBudget(1),
+    "POST admin:/modules": QueryBudget(4),
+    "GET admin:/module/{module_id}/content": QueryBudget(1),
+    "POST admin:/content": QueryBudget(4),
+    "GET admin:/users": QueryBudget(1),  # per shard
+    "POST admin:/users": QueryBudget(3),
+    "GET admin:/module/{module_id}/questions": QueryBudget(2),  # page + selectinload options
+    "POST admin:/questions": QueryBudget(7),
+    "POST admin:/questions/import": QueryBudget(12),  # grows: an INSERT per 1,000 rows, a NOTIFY per module/course
+    "GET admin:/config": QueryBudget(0, 0),
+    "PUT admin:/config": QueryBudget(3),
+    "GET admin:/search": QueryBudget(4),
+    "GET admin:/search/typeahead": QueryBudget(1),
+    "GET admin:/metrics/queries": QueryBudget(0, 0),
+    "GET admin:/metrics/admission": QueryBudget(0, 0),
+    "GET admin:/activity-logs": QueryBudget(1),  # per shard
+    "GET admin:/progress-events": QueryBudget(1),
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more statements or fetches more rows than allowed"""
+
+
+def budget_for(route: str) -> QueryBudget:
+    try:
+        return QUERY_BUDGETS[route]
+    except KeyError:
+        raise KeyError(f"No query budget for {route!r}; add it to QUERY_BUDGETS") from None
+
+
+def budget_violations(stats: RequestQueryStats, budget: QueryBudget) -> List[str]:
+    violations = []
+    if stats.count > budget.max_queries:
+        violations.append(f"{stats.count} statements (budget {budget.max_queries})")
+    if budget.max_rows is not None and stats.rows > budget.max_rows:
+        violations.append(f"{stats.rows} rows fetched (budget {budget.max_rows})")
+    return violations
+
+
+@contextmanager
+def assert_query_budget(
+    route: Optional[str] = None,
+    max_queries: Optional[int] = None,
+    max_rows: Optional[int] = None
+):
+    """
+    Count statements run inside the block and fail if over budget
+
+    Pass a route key to use its QUERY_BUDGETS entry, or explicit limits
+    (which override the table).
+
+    Raises:
+        QueryBudgetExceeded: On exit, if the block overspent
+    """
+    budget = budget_for(route) if route else QueryBudget(max_queries or 0, max_rows)
+    if max_queries is not None or max_rows is not None:
+        budget = QueryBudget(
+            max_queries if max_queries is not None else budget.max_queries,
+            max_rows if max_rows is not None else budget.max_rows
+        )
+
+    stats, token = start_request(route or "<budget>")
+    try:
+        yield stats
+    finally:
+        end_request(token)
+
+    violations = budget_violations(stats, budget)
+    if violations:
+        worst = sorted(stats.shapes.items(), key=lambda item: -item[1])[:3]
+        detail = "\n".join(f"  {count}x {shape[:200]}" for shape, count in worst)
+        raise QueryBudgetExceeded(
+            f"{route or 'block'} over budget: {', '.join(violations)}\nMost repeated:\n{detail}"
+        )
+
+
+def within_query_budget(route: Optional[str] = None, max_queries: Optional[int] = None,
+                        max_rows: Optional[int] = None):
+    """Decorator form of assert_query_budget for sync or async functions"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with assert_query_budget(route, max_queries, max_rows):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with assert_query_budget(route, max_queries, max_rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+try:
+    import pytest
+except ImportError:  # pytest is only needed when this module is loaded as a plugin
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture
+    def query_budget():
+        """
+        Fixture returning assert_query_budget
+
+            def test_courses(client, query_budget):
+                with query_budget("GET students:/courses"):
+                    client.get(...)
+        """
+        return assert_query_budget
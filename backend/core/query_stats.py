@@ -0,0 +1,169 @@
+"""
+Per-request SQL instrumentation
+
+Engine events count every statement and its execution time against the
+request that issued it (tracked in a context variable). The HTTP middleware
+in main.py then:
+- adds X-DB-Query-Count / X-DB-Time-Ms response headers when DEBUG is on
+- folds the numbers into per-route metrics served at /admin/metrics/queries
+- logs a warning when one SQL shape repeats more than
+  QUERY_REPEAT_WARNING_THRESHOLD times in a request (the N+1 signature)
+"""
+from contextvars import ContextVar
+from typing import Dict, Optional
+import logging
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+_PLACEHOLDER_RE = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_PLACEHOLDER_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so IN lists of different lengths share one shape"""
+    shape = _PLACEHOLDER_RE.sub("?", statement)
+    return _PLACEHOLDER_LIST_RE.sub("?", shape)
+
+
+class RequestQueryStats:
+    """
+    Statements executed on behalf of one request
+
+    Scopes nest: statements recorded here also count towards the enclosing
+    scope, so a test wrapping an in-process request sees its totals.
+    """
+
+    __slots__ = ("path", "count", "rows", "time_seconds", "shapes", "warned", "parent")
+
+    def __init__(self, path: str, parent: Optional["RequestQueryStats"] = None):
+        self.path = path
+        self.count = 0
+        self.rows = 0
+        self.time_seconds = 0.0
+        self.shapes: Dict[str, int] = {}
+        self.warned = False
+        self.parent = parent
+
+    @property
+    def time_ms(self) -> float:
+        return round(self.time_seconds * 1000, 2)
+
+    def record(self, statement: str, elapsed: float, rows: int = 0) -> None:
+        if self.parent is not None:
+            self.parent.record(statement, elapsed, rows)
+        self.count += 1
+        self.rows += rows
+        self.time_seconds += elapsed
+
+        shape = statement_shape(statement)
+        repeats = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = repeats
+        if repeats == settings.QUERY_REPEAT_WARNING_THRESHOLD + 1:
+            self.warned = True
+            logger.warning(
+                "Possible N+1 on %s: statement ran %s+ times in one request: %s",
+                self.path, repeats, shape[:500]
+            )
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request(path: str):
+    """Begin collecting for the current request; returns a token for end_request"""
+    stats = RequestQueryStats(path, _current.get())
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def route_key(scope: Dict) -> str:
+    """
+    Bounded metrics key for a request, e.g. "GET students:/course/{course_id}"
+
+    Included routers keep paths relative to their prefix, so the endpoint's
+    module disambiguates routes like /dashboard that several routers define.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    endpoint = getattr(route, "endpoint", None)
+    module = endpoint.__module__.rsplit(".", 1)[-1] if endpoint else "app"
+    return f"{scope.get('method', '')} {module}:{route.path}"
+
+
+class QueryMetrics:
+    """Cumulative per-route query counts and DB time for this worker"""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict] = {}
+
+    def observe(self, route: str, stats: RequestQueryStats) -> None:
+        entry = self._routes.get(route)
+        if entry is None:
+            entry = self._routes[route] = {
+                "requests": 0, "queries": 0, "db_time_ms": 0.0, "max_queries": 0, "n_plus_one_warnings": 0
+            }
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["db_time_ms"] += stats.time_seconds * 1000
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        if stats.warned:
+            entry["n_plus_one_warnings"] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            route: {
+                **entry,
+                "db_time_ms": round(entry["db_time_ms"], 2),
+                "queries_per_request": round(entry["queries"] / entry["requests"], 2),
+                "db_time_ms_per_request": round(entry["db_time_ms"] / entry["requests"], 2),
+            }
+            for route, entry in sorted(self._routes.items())
+        }
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """Attach counting hooks to a (sync) engine; pass async_engine.sync_engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            # The async drivers buffer result rows on the cursor right after execute
+            rows = len(getattr(cursor, "_rows", None) or ()) if cursor.description else 0
+            stats.record(statement, time.perf_counter() - started, rows)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        # after_cursor_execute does not fire for failed statements
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
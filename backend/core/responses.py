@@ -0,0 +1,61 @@
+"""
+Fast JSON responses for large list endpoints
+
+The default FastAPI path validates every item through Pydantic and then runs
+jsonable_encoder over the result. For trusted rows coming straight from our
+own queries that work is redundant, so list endpoints can opt into this path
+and serialize row tuples directly to bytes.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Iterable, Sequence
+
+from fastapi import Response
+import orjson
+
+
+def _default(obj: Any) -> Any:
+    """Encode the few non-JSON types our rows contain"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes with orjson"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_json(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    Serialize row tuples as a JSON array of objects
+
+    Args:
+        columns: Output key for each position in a row
+        rows: Row tuples, e.g. the result of a column select
+
+    Returns:
+        Encoded JSON bytes
+    """
+    keys = tuple(columns)
+    return dumps([dict(zip(keys, row)) for row in rows])
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips jsonable_encoder and Pydantic validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def rows_response(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> FastJSONResponse:
+    """Build a FastJSONResponse from row tuples"""
+    return FastJSONResponse(rows_to_json(columns, rows))
@@ -0,0 +1,28 @@
+"""
+Backfill Script - Builds ActivityCalendar bitmaps from existing ActivityLog rows
+
+Safe to re-run: existing calendar bits are kept.
+
+Usage:
+    python -m db.backfill_activity [--shard SHARD]
+"""
+
+import argparse
+import asyncio
+import db.base  # noqa: F401 - registers every model with the mapper
+from db.shards import shard_router, DEFAULT_SHARD
+from services.activity_service import activity_service
+
+
+async def backfill_activity(shard=DEFAULT_SHARD):
+    async with shard_router.session(shard) as db:
+        print("📅 Building activity calendars from activity logs...")
+        written = await activity_service.backfill_from_activity_log(db)
+        print(f"✅ Wrote {written} user-year calendars")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build activity calendars from activity logs")
+    parser.add_argument("--shard", default=DEFAULT_SHARD, help="Shard to backfill (see SHARDS)")
+    args = parser.parse_args()
+    asyncio.run(backfill_activity(args.shard))
@@ -1,8 +1,16 @@
 """
 Import all models here for Alembic to detect them
 """
+from sqlalchemy import DDL, event
 from db.base_class import Base
 
+# Trigram indexes on users, courses, modules and questions need pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 # Core entities
 from models.school import School
 from models.user import User
@@ -17,22 +25,31 @@ from models.curriculum_module import CurriculumModule
 from models.content_item import ContentItem
 from models.enrollment import Enrollment
 from models.module_progress import ModuleProgress
+from models.enrollment_summary import EnrollmentSummary
+from models.progress_event import ProgressEvent
+from models.idempotency_key import IdempotencyKey
 
 # Assessment
 from models.question_bank import QuestionBank
 from models.question_option import QuestionOption
 from models.quiz_config import QuizConfig
 from models.quiz_attempt import QuizAttempt
+from models.quiz_session import QuizSession
 
 # Gamification
 from models.wallet_account import WalletAccount
 from models.wallet_transaction import WalletTransaction
 from models.badge import Badge
 from models.user_badge import UserBadge
+from models.user_counter import UserCounter
 
 # Teacher features
 from models.evidence_item import EvidenceItem
 
+# Configuration
+from models.config_setting import ConfigSetting
+
 # Audit
 from models.activity_log import ActivityLog
+from models.activity_calendar import ActivityCalendar
 
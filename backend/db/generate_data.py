@@ -0,0 +1,468 @@
+"""
+Synthetic Data Generator - Loads large, reproducible datasets for performance work
+
+Creates N schools x M sections x K students. Each school gets a principal,
+teachers, courses with modules, content, question banks and quiz configs.
+Each student gets enrollments, module progress, quiz attempts, wallet
+credits, activity logs and activity calendars.
+
+Rows are built in plain Python from a seeded RNG and streamed into Postgres
+with binary COPY, one school per transaction. Memory stays flat and ten
+million rows load in minutes. The same seed, sizes and --as-of date always
+produce the same data (ids included, when loading into empty tables).
+
+Usage:
+    python -m db.generate_data --schools 100 --sections 20 --students 50 --seed 42
+    python -m db.generate_data --schools 5 --truncate
+    python -m db.generate_data --shard north --schools 2
+
+With --shard, data goes to that shard's database and school ids are taken
+from the ids the shard owns in SHARDS (see db.shards).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import asyncpg
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import DateTime
+from core.config import settings
+from db.base import Base
+from db.shards import shard_router, DEFAULT_SHARD
+from services.activity_service import ActivityService
+from services.config_service import config_service
+from services.enrollment_summary_service import enrollment_summary_service
+
+DEFAULT_AS_OF = "2025-06-30"
+EMAIL_DOMAIN = "bench.achariya.in"
+
+FIRST_NAMES = [
+    "Aarav", "Aisha", "Ananya", "Arjun", "Deepa", "Divya", "Gokul", "Harini", "Ishaan", "Kavya",
+    "Karthik", "Lakshmi", "Manoj", "Meera", "Nikhil", "Nithya", "Pranav", "Priya", "Rahul", "Revathi",
+    "Rohan", "Sanjay", "Shreya", "Sneha", "Surya", "Tara", "Varun", "Vikram", "Yamini", "Zara"
+]
+LAST_NAMES = [
+    "Balan", "Chandran", "Gupta", "Iyer", "Joshi", "Khan", "Krishnan", "Kumar", "Menon", "Nair",
+    "Narayanan", "Patel", "Pillai", "Raman", "Rao", "Reddy", "Sharma", "Srinivasan", "Sundaram", "Varma"
+]
+
+# subject -> topics used for course, module and question text
+SUBJECTS = {
+    "Mathematics": ["algebra", "linear equations", "quadratic functions", "trigonometry", "probability",
+                    "statistics", "calculus", "matrices", "geometry", "number theory"],
+    "Physics": ["kinematics", "Newton's laws", "work and energy", "momentum", "thermodynamics",
+                "waves", "optics", "electrostatics", "current electricity", "magnetism"],
+    "Chemistry": ["atomic structure", "chemical bonding", "stoichiometry", "acids and bases", "redox reactions",
+                  "organic compounds", "periodic table", "equilibrium", "electrochemistry", "kinetics"],
+    "Biology": ["cell structure", "genetics", "evolution", "photosynthesis", "human physiology",
+                "ecology", "microorganisms", "plant reproduction", "nervous system", "immunity"],
+    "English": ["grammar", "reading comprehension", "poetry", "essay writing", "vocabulary",
+                "drama", "short stories", "letter writing", "figures of speech", "novels"],
+    "Computer Science": ["data structures", "algorithms", "databases", "operating systems", "networks",
+                         "web development", "object oriented programming", "recursion", "sorting", "SQL"],
+}
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+CONTENT_TYPES = [("VIDEO", 0.4), ("PDF", 0.3), ("TEXT", 0.15), ("PPT", 0.1), ("AUDIO", 0.05)]
+
+COLUMNS = {
+    "school": ("id", "name", "location_type", "status", "created_at"),
+    "classsection": ("id", "school_id", "name", "grade_level"),
+    "user": ("id", "email", "name", "role", "school_id", "status", "created_at", "is_active"),
+    "principalprofile": ("id", "user_id", "school_id"),
+    "teacherprofile": ("id", "user_id", "department", "designation"),
+    "studentprofile": ("id", "user_id", "class_section_id"),
+    "course": ("id", "school_id", "title", "description", "subject", "level", "status"),
+    "curriculummodule": ("id", "course_id", "module_order", "title", "description", "estimated_duration_minutes"),
+    "contentitem": ("id", "module_id", "type", "title", "description", "url_or_path", "duration_seconds", "active_flag"),
+    "quizconfig": ("id", "module_id", "total_questions", "time_limit_seconds", "pass_score_percent"),
+    "questionbank": ("id", "module_id", "question_text", "explanation_text"),
+    "questionoption": ("id", "question_id", "option_text", "is_correct"),
+    "enrollment": ("id", "student_id", "course_id", "status", "enrolled_at"),
+    "moduleprogress": ("id", "enrollment_id", "module_id", "completion_percent", "status", "quiz_attempts",
+                       "last_access_time", "created_at"),
+    "quizattempt": ("id", "enrollment_id", "module_id", "attempt_number", "score_percent", "time_taken_seconds",
+                    "completed_in_time", "attempt_datetime"),
+    "walletaccount": ("id", "user_id", "role", "balance_credits"),
+    "wallettransaction": ("id", "wallet_id", "reference_type", "reference_id", "credits_delta", "description", "created_at"),
+    "activitylog": ("id", "user_id", "action_type", "entity_type", "entity_id", "meta_json", "created_at"),
+    "activitycalendar": ("id", "user_id", "school_id", "year", "bits"),
+}
+
+
+class CopyLoader:
+    """
+    Buffers generated rows per table and streams them with binary COPY
+
+    Ids are assigned here, continuing from each table's current max id, so
+    children can reference parents without a round trip. Buffers are
+    flushed in foreign-key order.
+    """
+
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+        self.order = [t.name for t in Base.metadata.sorted_tables if t.name in COLUMNS]
+        self.buffers = {name: [] for name in self.order}
+        self.next_ids = {}
+        self.totals = {name: 0 for name in self.order}
+        # Naive UTC datetimes are generated; timestamptz columns need them aware
+        self.aware_columns = {}
+        for name in self.order:
+            table = Base.metadata.tables[name]
+            self.aware_columns[name] = [
+                i for i, column in enumerate(COLUMNS[name])
+                if isinstance(table.c[column].type, DateTime) and table.c[column].type.timezone
+            ]
+
+    async def start(self) -> None:
+        for name in self.order:
+            self.next_ids[name] = await self.conn.fetchval(f'SELECT coalesce(max(id), 0) + 1 FROM "{name}"')
+
+    def next_id(self, table: str) -> int:
+        value = self.next_ids[table]
+        self.next_ids[table] = value + 1
+        return value
+
+    def add(self, table: str, row: tuple) -> None:
+        self.buffers[table].append(row)
+
+    async def flush(self) -> None:
+        async with self.conn.transaction():
+            for name in self.order:
+                rows = self.buffers[name]
+                if not rows:
+                    continue
+                aware = self.aware_columns[name]
+                if aware:
+                    rows = [self._make_aware(row, aware) for row in rows]
+                await self.conn.copy_records_to_table(name, records=rows, columns=COLUMNS[name])
+                self.totals[name] += len(rows)
+                self.buffers[name] = []
+
+    @staticmethod
+    def _make_aware(row: tuple, indexes) -> tuple:
+        row = list(row)
+        for i in indexes:
+            if row[i] is not None:
+                row[i] = row[i].replace(tzinfo=timezone.utc)
+        return tuple(row)
+
+    async def finish(self) -> None:
+        """Move sequences past the explicit ids and refresh planner statistics"""
+        for name in self.order:
+            await self.conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('\"{name}\"', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM \"{name}\"))"
+            )
+        for name in self.order:
+            await self.conn.execute(f'ANALYZE "{name}"')
+
+
+class DataGenerator:
+    """Builds one school at a time; all randomness comes from one seeded RNG"""
+
+    def __init__(self, loader: CopyLoader, args):
+        self.loader = loader
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.as_of = datetime.combine(date.fromisoformat(args.as_of), datetime.min.time()) + timedelta(hours=18)
+
+    def next_school_id(self) -> int:
+        """Next unused school id owned by the target shard"""
+        while True:
+            school_id = self.loader.next_id("school")
+            if shard_router.owns(self.args.shard, school_id):
+                return school_id
+
+    def person_name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def binomial(self, n: int, p: float) -> int:
+        rng = self.rng.random
+        return sum(1 for _ in range(n) if rng() < p)
+
+    def add_user(self, role: str, school_id, created_at: datetime) -> int:
+        user_id = self.loader.next_id("user")
+        email = f"{role.lower()}{user_id}@{EMAIL_DOMAIN}"
+        self.loader.add("user", (user_id, email, self.person_name(), role, school_id, "Active", created_at, True))
+        return user_id
+
+    def generate_school(self, number: int) -> None:
+        rng = self.rng
+        args = self.args
+        add = self.loader.add
+        next_id = self.loader.next_id
+        opened = self.as_of - timedelta(days=rng.randint(365, 3650))
+
+        school_id = self.next_school_id()
+        is_college = rng.random() < 0.3
+        add("school", (
+            school_id,
+            f"Achariya {'College' if is_college else 'School'} #{number}",
+            "COLLEGE" if is_college else "SCHOOL",
+            "Active",
+            opened
+        ))
+
+        principal_id = self.add_user("PRINCIPAL", school_id, opened)
+        add("principalprofile", (next_id("principalprofile"), principal_id, school_id))
+
+        subjects = list(SUBJECTS)
+        for _ in range(max(1, args.sections // 2)):
+            teacher_id = self.add_user("TEACHER", school_id, opened + timedelta(days=rng.randint(0, 300)))
+            add("teacherprofile", (next_id("teacherprofile"), teacher_id, rng.choice(subjects), "Teacher"))
+
+        courses = [self.generate_course(school_id, i) for i in range(args.courses)]
+
+        for section_number in range(args.sections):
+            section_id = next_id("classsection")
+            grade = f"UG{section_number % 4 + 1}" if is_college else str(6 + section_number % 7)
+            add("classsection", (section_id, school_id, f"Section {grade}-{chr(65 + section_number // 7 % 26)}", grade))
+            for _ in range(args.students):
+                self.generate_student(school_id, section_id, courses)
+
+    def generate_course(self, school_id: int, number: int):
+        rng = self.rng
+        add = self.loader.add
+        next_id = self.loader.next_id
+        subject = rng.choice(list(SUBJECTS))
+        topics = SUBJECTS[subject]
+        level = rng.choice(LEVELS)
+
+        course_id = next_id("course")
+        add("course", (
+            course_id, school_id, f"{level} {subject} {number + 1}",
+            f"Comprehensive {level.lower()} course on {subject} covering {', '.join(rng.sample(topics, 3))}",
+            subject, level, "Active"
+        ))
+
+        modules = []
+        module_count = max(1, jitter(rng, self.args.modules))
+        for order in range(module_count):
+            topic = topics[(order + number) % len(topics)]
+            module_id = next_id("curriculummodule")
+            add("curriculummodule", (
+                module_id, course_id, order + 1, f"{topic.title()} - Part {order // len(topics) + 1}",
+                f"Concepts and practice problems on {topic}", rng.choice([30, 45, 60, 90])
+            ))
+
+            for item in range(rng.randint(3, 5)):
+                content_type = weighted_choice(rng, CONTENT_TYPES)
+                add("contentitem", (
+                    next_id("contentitem"), module_id, content_type, f"{topic.title()} {content_type.lower()} {item + 1}",
+                    f"{content_type.title()} material on {topic}",
+                    f"https://cdn.achariya.in/content/{module_id}/{item + 1}.{content_type.lower()}",
+                    rng.randint(120, 1800) if content_type in ("VIDEO", "AUDIO") else None, True
+                ))
+
+            question_count = max(1, jitter(rng, self.args.questions))
+            total_questions = min(question_count, config_service.DEFAULT_QUIZ_QUESTIONS)
+            add("quizconfig", (
+                next_id("quizconfig"), module_id, total_questions,
+                config_service.DEFAULT_QUIZ_TIME_LIMIT_SECONDS, config_service.DEFAULT_PASS_SCORE_PERCENT
+            ))
+            for q in range(question_count):
+                question_id = next_id("questionbank")
+                focus = rng.choice(topics)
+                add("questionbank", (
+                    question_id, module_id,
+                    f"Q{q + 1}. Which statement about {topic} and {focus} is correct?",
+                    f"Review the section on {topic}; the key idea links it to {focus}."
+                ))
+                correct = rng.randrange(4)
+                for o in range(4):
+                    add("questionoption", (
+                        next_id("questionoption"), question_id,
+                        f"{'Correct' if o == correct else 'Plausible'} statement {o + 1} about {focus}",
+                        o == correct
+                    ))
+            modules.append((module_id, total_questions))
+        return course_id, modules
+
+    def generate_student(self, school_id: int, section_id: int, courses) -> None:
+        rng = self.rng
+        add = self.loader.add
+        next_id = self.loader.next_id
+        as_of = self.as_of
+
+        joined = as_of - timedelta(days=rng.randint(30, 400))
+        user_id = self.add_user("STUDENT", school_id, joined)
+        profile_id = next_id("studentprofile")
+        add("studentprofile", (profile_id, user_id, section_id))
+
+        # Ability drives quiz scores, engagement drives how far students get
+        ability = rng.betavariate(5, 2)
+        engagement = rng.betavariate(2, 2)
+        wallet_id = next_id("walletaccount")
+        balance = 0.0
+        active_days = set()
+
+        enrolled_courses = rng.sample(courses, min(len(courses), 1 + self.binomial(len(courses) - 1, 0.35)))
+        for course_id, modules in enrolled_courses:
+            enrollment_id = next_id("enrollment")
+            enrolled_at = joined + timedelta(days=rng.randint(0, max(0, (as_of - joined).days - 7)))
+            span = max(1, (as_of - enrolled_at).days)
+
+            completed = min(len(modules), int(len(modules) * engagement * rng.uniform(0.5, 1.5)))
+            status = "COMPLETED" if completed == len(modules) else ("DROPPED" if rng.random() < 0.03 else "ACTIVE")
+            add("enrollment", (enrollment_id, profile_id, course_id, status, enrolled_at))
+
+            for position, (module_id, total_questions) in enumerate(modules[:completed + 1]):
+                done = position < completed
+                started = enrolled_at + timedelta(days=span * position / (completed + 1))
+                last_access = started + timedelta(hours=rng.randint(1, 72))
+                percent = 100.0 if done else float(rng.choice([0, 10, 25, 40, 50, 75, 90, 100]))
+                progress_status = "COMPLETED" if done else ("NOT_STARTED" if percent == 0 else "IN_PROGRESS")
+                # Completed modules pass by this attempt at the latest; modules
+                # waiting on their quiz have only failed so far, with tries left
+                if done:
+                    max_attempts = rng.randint(1, config_service.MAX_QUIZ_ATTEMPTS)
+                elif percent == 100:
+                    max_attempts = rng.randint(0, config_service.MAX_QUIZ_ATTEMPTS - 1)
+                else:
+                    max_attempts = 0
+
+                when = last_access
+                skill = ability
+                time_limit = config_service.DEFAULT_QUIZ_TIME_LIMIT_SECONDS
+                pass_score = config_service.DEFAULT_PASS_SCORE_PERCENT
+                attempts = 0
+                for attempt_number in range(1, max_attempts + 1):
+                    correct = self.binomial(total_questions, min(skill, 0.995))
+                    time_taken = rng.randint(max(15, int(time_limit * 0.25)), time_limit + 30)
+                    if done and attempt_number == max_attempts:
+                        correct, time_taken = total_questions, min(time_taken, time_limit)
+                    in_time = time_taken <= time_limit
+                    score = round(correct * 100.0 / total_questions, 2)
+                    if not done and score >= pass_score and in_time:
+                        # Fail by one question, or by running late when any score passes
+                        correct = math.ceil(total_questions * pass_score / 100) - 1
+                        if correct < 0:
+                            correct, time_taken, in_time = 0, time_limit + rng.randint(1, 30), False
+                        score = round(correct * 100.0 / total_questions, 2)
+                    when = min(when + timedelta(minutes=rng.randint(5, 2880)), as_of)
+                    attempts = attempt_number
+
+                    attempt_id = next_id("quizattempt")
+                    add("quizattempt", (
+                        attempt_id, enrollment_id, module_id, attempt_number, score, time_taken, in_time, when
+                    ))
+                    active_days.add(when.date())
+
+                    credits = config_service.get_credit_for_quiz_attempt(score, time_taken, in_time)
+                    if credits:
+                        balance += credits
+                        add("wallettransaction", (
+                            next_id("wallettransaction"), wallet_id, "QUIZ", attempt_id, float(credits),
+                            f"Quiz attempt credit (module {module_id})", when
+                        ))
+                    if score >= pass_score and in_time:
+                        break
+                    skill += (1 - skill) * 0.25  # students improve on retries
+
+                add("moduleprogress", (
+                    next_id("moduleprogress"), enrollment_id, module_id, percent,
+                    progress_status, attempts, min(last_access, as_of), started
+                ))
+                if done:
+                    add("activitylog", (
+                        next_id("activitylog"), user_id, "module_complete", "module", module_id,
+                        json.dumps({"course_id": course_id}), when
+                    ))
+
+        for day in sorted(active_days):
+            add("activitylog", (
+                next_id("activitylog"), user_id, "login", None, None,
+                json.dumps({"ip": "127.0.0.1", "device": rng.choice(["Desktop", "Mobile", "Tablet"])}),
+                datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randint(420, 1260))
+            ))
+
+        add("walletaccount", (wallet_id, user_id, "STUDENT", balance))
+
+        calendars = {}
+        for day in active_days:
+            calendars[day.year] = calendars.get(day.year, 0) | (1 << ActivityService.day_index(day))
+        for year, bits in sorted(calendars.items()):
+            add("activitycalendar", (next_id("activitycalendar"), user_id, school_id, year, ActivityService.to_bytes(bits)))
+
+
+def jitter(rng: random.Random, value: int) -> int:
+    """Vary a size by +/-25% so schools are not identical"""
+    spread = max(0, value // 4)
+    return value + rng.randint(-spread, spread)
+
+
+def weighted_choice(rng: random.Random, choices):
+    point = rng.random()
+    for value, weight in choices:
+        point -= weight
+        if point <= 0:
+            return value
+    return choices[-1][0]
+
+
+async def generate_data(args) -> None:
+    if args.shard not in shard_router.shards:
+        raise SystemExit(f"Unknown shard {args.shard!r}; configured: {', '.join(shard_router.shards)}")
+    conn = await asyncpg.connect(shard_router.dsn(args.shard))
+    try:
+        if args.truncate:
+            print("🧹 Truncating tables...")
+            tables = ", ".join(f'"{t.name}"' for t in Base.metadata.sorted_tables)
+            await conn.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+
+        loader = CopyLoader(conn)
+        await loader.start()
+        generator = DataGenerator(loader, args)
+
+        if args.shard != DEFAULT_SHARD:
+            owned = settings.SHARD_DATABASES[args.shard].get("schools", [])
+            free = [school_id for school_id in owned if school_id >= loader.next_ids["school"]]
+            if len(free) < args.schools:
+                raise SystemExit(f"Shard {args.shard!r} has {len(free)} unused school ids in SHARDS "
+                                 f"({owned}); cannot load {args.schools} schools")
+
+        print(f"🌱 Generating {args.schools} schools × {args.sections} sections × {args.students} students "
+              f"(seed={args.seed}, as of {args.as_of})...")
+        started = time.perf_counter()
+        for number in range(1, args.schools + 1):
+            generator.generate_school(number)
+            await loader.flush()
+            rows = sum(loader.totals.values())
+            elapsed = time.perf_counter() - started
+            print(f"   🏫 School {number}/{args.schools}: {rows:,} rows ({rows / elapsed:,.0f} rows/s)")
+
+        print("📈 Updating sequences and statistics...")
+        await loader.finish()
+
+        print("📊 Building enrollment summaries...")
+        async with shard_router.session(args.shard) as db:
+            await enrollment_summary_service.rebuild(db)
+
+        print(f"✅ Loaded {sum(loader.totals.values()):,} rows in {time.perf_counter() - started:.1f}s")
+        for name in loader.order:
+            if loader.totals[name]:
+                print(f"   {name}: {loader.totals[name]:,}")
+    finally:
+        await conn.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load a large synthetic dataset")
+    parser.add_argument("--schools", type=int, default=10, help="Number of schools (N)")
+    parser.add_argument("--sections", type=int, default=10, help="Class sections per school (M)")
+    parser.add_argument("--students", type=int, default=40, help="Students per section (K)")
+    parser.add_argument("--courses", type=int, default=6, help="Courses per school")
+    parser.add_argument("--modules", type=int, default=8, help="Modules per course (±25%%)")
+    parser.add_argument("--questions", type=int, default=25, help="Questions per module (±25%%)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--as-of", default=DEFAULT_AS_OF, help="Date the generated history ends (YYYY-MM-DD)")
+    parser.add_argument("--truncate", action="store_true", help="Empty all tables before loading")
+    parser.add_argument("--shard", default=DEFAULT_SHARD, help="Shard to load into (see SHARDS)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(generate_data(parse_args()))
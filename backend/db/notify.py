@@ -0,0 +1,113 @@
+"""
+Postgres LISTEN/NOTIFY helpers for cross-worker cache invalidation
+
+Each uvicorn worker keeps one dedicated asyncpg connection per shard that
+LISTENs on the channels it has subscribed to. Writers call notify() inside
+their transaction, so the message is only delivered if the change commits.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import asyncpg
+import logging
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Optional[str]], Awaitable[None]]
+
+RECONNECT_DELAY_SECONDS = 5
+
+
+async def notify(db: AsyncSession, channel: str, payload: str = "") -> None:
+    """Queue a NOTIFY on the current transaction; delivered on commit"""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload}
+    )
+
+
+class NotificationListener:
+    """
+    Dispatches Postgres notifications to async handlers
+
+    Handlers receive the notification payload, from whichever shard it was
+    sent on. Handlers are also called with None when caches must fully
+    reload, because notifications sent while a connection was down are lost:
+    once at startup, after every shard's first connection attempt, and again
+    whenever a shard's connection comes back.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._starting: Set[str] = set()  # Shards yet to make their first connection attempt
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Register a handler for a channel; call before start()"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self) -> None:
+        if not self._tasks and self._handlers:
+            from db.shards import shard_router
+            self._starting = set(shard_router.shards)
+            self._tasks = [
+                asyncio.create_task(self._run(shard, shard_router.dsn(shard))) for shard in shard_router.shards
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _dispatch(self, channel: str, payload: Optional[str]) -> None:
+        for handler in self._handlers.get(channel, []):
+            asyncio.create_task(self._call(handler, channel, payload))
+
+    def _resync(self, shard: str) -> None:
+        """Reload everything once all shards started, or when one reconnects"""
+        if shard in self._starting:
+            self._starting.discard(shard)
+            if self._starting:
+                return
+        for channel in self._handlers:
+            self._dispatch(channel, None)
+
+    async def _call(self, handler: Handler, channel: str, payload: Optional[str]) -> None:
+        try:
+            await handler(payload)
+        except Exception:
+            logger.exception("Notification handler failed on channel %s", channel)
+
+    async def _run(self, shard: str, dsn: str) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: closed.set())
+                for channel in self._handlers:
+                    await conn.add_listener(
+                        channel,
+                        lambda _conn, _pid, channel, payload: self._dispatch(channel, payload)
+                    )
+                self._resync(shard)
+                await closed.wait()
+                logger.warning("Notification listener connection to shard %s closed, reconnecting", shard)
+            except asyncio.CancelledError:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+                raise
+            except Exception:
+                logger.exception("Notification listener failed on shard %s, retrying in %ss", shard, RECONNECT_DELAY_SECONDS)
+                if shard in self._starting:
+                    # Let the other shards start; this one resyncs when it connects
+                    self._resync(shard)
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+
+notification_listener = NotificationListener()
@@ -0,0 +1,34 @@
+"""
+Rebuild Script - Recomputes EnrollmentSummary rows and ModuleProgress attempt
+counters from progress and quiz attempts
+
+Run after bulk loads or to repair drift; best run while writes are quiet.
+
+Usage:
+    python -m db.rebuild_summaries [--course COURSE_ID] [--shard SHARD]
+"""
+
+import argparse
+import asyncio
+from db.shards import shard_router, DEFAULT_SHARD
+from services.enrollment_summary_service import enrollment_summary_service
+from services.quiz_service import quiz_service
+
+
+async def rebuild_summaries(course_id=None, shard=DEFAULT_SHARD):
+    async with shard_router.session(shard) as db:
+        print("🔢 Syncing quiz attempt counters...")
+        updated = await quiz_service.sync_attempt_counters(db, course_id)
+        print(f"✅ Updated {updated} progress rows")
+        
+        print("📊 Rebuilding enrollment summaries...")
+        written = await enrollment_summary_service.rebuild(db, course_id)
+        print(f"✅ Wrote {written} enrollment summaries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the EnrollmentSummary read model")
+    parser.add_argument("--course", type=int, default=None, help="Only this course's enrollments")
+    parser.add_argument("--shard", default=DEFAULT_SHARD, help="Shard to rebuild (see SHARDS)")
+    args = parser.parse_args()
+    asyncio.run(rebuild_summaries(args.course, args.shard))
@@ -45,6 +45,7 @@ from models.badge import Badge, BadgeScope
 from models.user_badge import UserBadge
 from models.evidence_item import EvidenceItem
 from models.activity_log import ActivityLog
+from services.enrollment_summary_service import enrollment_summary_service
 from datetime import datetime, timedelta
 import random
 
@@ -349,7 +350,8 @@ async def seed_database():
                         enrollment_id=enrollment.id,
                         module_id=module.id,
                         completion_percent=100.0,
-                        status=ProgressStatus.COMPLETED
+                        status=ProgressStatus.COMPLETED,
+                        quiz_attempts=2
                     )
                     db.add(progress)
                     
@@ -560,6 +562,9 @@ async def seed_database():
         db.add_all(activity_logs)
         await db.commit()
         
+        # Progress and attempts above were inserted directly
+        await enrollment_summary_service.rebuild(db)
+        
         print("✅ Database seeding completed successfully!")
         print(f"   Schools: 2")
         print(f"   Class Sections: {len(sections)}")
@@ -1,13 +1,19 @@
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from core.config import settings
+from core.query_stats import install_query_hooks
 
 engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, echo=True)
+install_query_hooks(engine.sync_engine)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
+async def get_db(request: Request):
+    """Session on the shard of the request's school (see db.shards)"""
+    from db.shards import shard_router
+    shard = await shard_router.shard_for_request(request)
+    async with shard_router.session(shard) as session:
         yield session
@@ -1,21 +1,133 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from core.config import settings
+from core.query_stats import (
+    start_request, end_request, route_key, query_metrics, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+)
+from core.query_budget import QUERY_BUDGETS, budget_violations
+from core.compression import CompressionMiddleware
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Achariya Unified Learning Portal API")
 
-# CORS Middleware
+from api.v1.api import api_router
+from db.notify import notification_listener
+from db.shards import shard_router, DEFAULT_SHARD
+from services.config_service import config_service, CONFIG_CHANNEL
+from services.quiz_variant_pool import quiz_variant_pool, QUIZ_BANK_CHANNEL
+from services.retrieval_service import retrieval_service, RETRIEVAL_CHANNEL
+from services.admission_service import admission_service
+from services.live_progress import live_progress, LIVE_PROGRESS_CHANNEL
+from services.progress_log import progress_log
+from services.quiz_service import quiz_service
+from services.course_snapshot_service import course_snapshot_service, COURSE_CHANNEL
+from services.idempotency_service import idempotency_service, IdempotencyMiddleware, REPLAYED_HEADER
+
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+# Replays retried writes; added first so it sits inside compression and stores plain bodies
+app.add_middleware(IdempotencyMiddleware)
+# Gzip / brotli for large responses (see core.compression)
+app.add_middleware(CompressionMiddleware)
+
+
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    """Attribute SQL statements to the request that ran them"""
+    stats, token = start_request(request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        end_request(token)
+    
+    route = route_key(request.scope)
+    query_metrics.observe(route, stats)
+    if settings.DEBUG:
+        response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+        response.headers[QUERY_TIME_HEADER] = str(stats.time_ms)
+        budget = QUERY_BUDGETS.get(route)
+        violations = budget_violations(stats, budget) if budget else []
+        if violations:
+            logger.warning("%s over query budget: %s", route, ", ".join(violations))
+    return response
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """
+    Queue or shed API requests beyond the configured concurrency
+    
+    Registered after the other HTTP middleware so it runs before them: shed
+    requests never open a DB session. CORS still wraps it.
+    """
+    path = request.url.path
+    if not path.startswith(settings.API_V1_STR):
+        return await call_next(request)
+    
+    endpoint_class = admission_service.classify(request.method, path[len(settings.API_V1_STR):])
+    admitted, retry_after = await admission_service.acquire(endpoint_class)
+    if not admitted:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry shortly"},
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    started = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        admission_service.release(endpoint_class, time.perf_counter() - started)
+
+
+# CORS Middleware; added last so it wraps every response above, including
+# replays, compressed bodies and requests shed by admission control
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, replace with specific origins
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Next-Cursor", REPLAYED_HEADER],
 )
 
-from api.v1.api import api_router
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+async def reload_config(payload=None):
+    """Reload configuration overrides written by any worker"""
+    async with shard_router.session(DEFAULT_SHARD) as db:
+        await config_service.load(db)
+    # Cached variants were built with the previous quiz defaults
+    quiz_variant_pool.invalidate_all()
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    notification_listener.subscribe(CONFIG_CHANNEL, reload_config)
+    notification_listener.subscribe(QUIZ_BANK_CHANNEL, quiz_variant_pool.handle_bank_changed)
+    notification_listener.subscribe(RETRIEVAL_CHANNEL, retrieval_service.handle_course_changed)
+    notification_listener.subscribe(RETRIEVAL_CHANNEL, course_snapshot_service.handle_course_changed)
+    notification_listener.subscribe(COURSE_CHANNEL, course_snapshot_service.handle_course_changed)
+    notification_listener.subscribe(LIVE_PROGRESS_CHANNEL, live_progress.handle_notification)
+    # The listener calls every handler once when its shards connect, which loads config
+    await notification_listener.start()
+    await quiz_variant_pool.start()
+    await progress_log.start()
+    await idempotency_service.start()
+    await quiz_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await quiz_service.stop()
+    await idempotency_service.stop()
+    await progress_log.stop()
+    await quiz_variant_pool.stop()
+    await notification_listener.stop()
+
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,22 @@
+"""
+ActivityCalendar model - One bit per day of activity, per user per year
+"""
+from sqlalchemy import Column, Integer, ForeignKey, LargeBinary, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from db.base_class import Base
+
+
+class ActivityCalendar(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    school_id = Column(Integer, ForeignKey("school.id"), nullable=True)  # Denormalized for school-wide counts
+    year = Column(Integer, nullable=False)
+    bits = Column(LargeBinary, nullable=False)  # 46 bytes; bit n = day-of-year n (0-based), LSB first
+    
+    # Relationships
+    user = relationship("User")
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "year", name="uq_activitycalendar_user_year"),
+        Index("ix_activitycalendar_school_year", "school_id", "year"),
+    )
@@ -0,0 +1,13 @@
+"""
+ConfigSetting model - Admin overrides for ConfigService business rules
+"""
+from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+
+class ConfigSetting(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, nullable=False, index=True)  # ConfigService attribute, e.g. CREDIT_OTHER
+    value = Column(JSON, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -17,7 +17,7 @@ class ContentType(enum.Enum):
 
 class ContentItem(Base):
     id = Column(Integer, primary_key=True, index=True)
-    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False)
+    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False, index=True)
     type = Column(SQLEnum(ContentType), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -1,10 +1,16 @@
 """
 Course model - Course catalog for the learning portal
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Computed, Index, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from db.base_class import Base
 
+ARCHIVED = "Archived"
+# Rendered inline rather than as a bind parameter, so that queries using
+# live_course() match the partial index predicate under generic plans too
+_ARCHIVED_LITERAL = literal_column(f"'{ARCHIVED}'")
+
 
 class Course(Base):
     id = Column(Integer, primary_key=True, index=True)
@@ -14,10 +20,27 @@ class Course(Base):
     subject = Column(String, nullable=False)  # Maths, Science, English, CS, etc.
     level = Column(String, nullable=True)  # Beginner, Intermediate, Advanced
     status = Column(String, default="Active")  # Active, Archived
+    # Generated by Postgres; deferred so ORM loads don't fetch it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))", persisted=True)
+    ))
     
     # Relationships
     school = relationship("School", back_populates="courses")
     curriculum_modules = relationship("CurriculumModule", back_populates="course", order_by="CurriculumModule.module_order")
     enrollments = relationship("Enrollment", back_populates="course")
     evidence_items = relationship("EvidenceItem", back_populates="course")
+    
+    __table_args__ = (
+        Index("ix_course_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_course_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        # School course lists and counts only ever want courses still in use
+        Index("ix_course_school_id_live", "school_id", postgresql_where=(status != _ARCHIVED_LITERAL)),
+    )
+
+
+def live_course():
+    """Filter for courses that are not archived (uses ix_course_school_id_live)"""
+    return Course.status != _ARCHIVED_LITERAL
 
@@ -1,18 +1,24 @@
 """
 CurriculumModule model - Modules within a course
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from db.base_class import Base
 
 
 class CurriculumModule(Base):
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("course.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("course.id"), nullable=False, index=True)
     module_order = Column(Integer, nullable=False)  # 1, 2, 3, etc.
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     estimated_duration_minutes = Column(Integer, nullable=True)
+    # Generated by Postgres; deferred so ORM loads don't fetch it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))", persisted=True)
+    ))
     
     # Relationships
     course = relationship("Course", back_populates="curriculum_modules")
@@ -22,3 +28,8 @@ class CurriculumModule(Base):
     quiz_attempts = relationship("QuizAttempt", back_populates="module")
     question_bank = relationship("QuestionBank", back_populates="module")
     evidence_items = relationship("EvidenceItem", back_populates="module")
+    
+    __table_args__ = (
+        Index("ix_curriculummodule_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_curriculummodule_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
@@ -17,7 +17,7 @@ class EnrollmentStatus(enum.Enum):
 class Enrollment(Base):
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("studentprofile.id"), nullable=False)
-    course_id = Column(Integer, ForeignKey("course.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("course.id"), nullable=False, index=True)
     status = Column(SQLEnum(EnrollmentStatus), default=EnrollmentStatus.ACTIVE)
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
     
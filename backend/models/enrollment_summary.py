@@ -0,0 +1,53 @@
+"""
+EnrollmentSummary model - Denormalized per-enrollment progress read model
+"""
+from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, case
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
+from db.base_class import Base
+
+
+class EnrollmentSummary(Base):
+    """
+    One row per enrollment, maintained by services.enrollment_summary_service
+    in the same transaction as the ModuleProgress / QuizAttempt writes and
+    rebuildable from them (python -m db.rebuild_summaries)
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False, unique=True)
+    # Copied from the enrollment so views filter without joining it
+    student_id = Column(Integer, ForeignKey("studentprofile.id"), nullable=False, index=True)
+    course_id = Column(Integer, ForeignKey("course.id"), nullable=False, index=True)
+
+    modules_started = Column(Integer, nullable=False, default=0)  # ModuleProgress rows
+    modules_completed = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Float, nullable=False, default=0.0)  # Sum of module completion_percent
+    current_module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=True)  # Module whose content changed last
+    last_activity_at = Column(DateTime(timezone=True), nullable=True)
+
+    quiz_attempts = Column(Integer, nullable=False, default=0)
+    quiz_score_total = Column(Float, nullable=False, default=0.0)
+    best_quiz_score = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    enrollment = relationship("Enrollment")
+
+    @hybrid_property
+    def completion_percent(self) -> float:
+        """Average completion of the modules started, as the views have always shown it"""
+        return self.progress_total / self.modules_started if self.modules_started else 0.0
+
+    @completion_percent.expression
+    def completion_percent(cls):
+        return case((cls.modules_started > 0, cls.progress_total / cls.modules_started), else_=0.0)
+
+    @hybrid_property
+    def quiz_average(self) -> float:
+        return self.quiz_score_total / self.quiz_attempts if self.quiz_attempts else 0.0
+
+    @quiz_average.expression
+    def quiz_average(cls):
+        return case((cls.quiz_attempts > 0, cls.quiz_score_total / cls.quiz_attempts), else_=0.0)
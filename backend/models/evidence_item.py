@@ -10,8 +10,8 @@ from db.base_class import Base
 class EvidenceItem(Base):
     id = Column(Integer, primary_key=True, index=True)
     teacher_id = Column(Integer, ForeignKey("teacherprofile.id"), nullable=False)
-    course_id = Column(Integer, ForeignKey("course.id"), nullable=False)
-    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=True)
+    course_id = Column(Integer, ForeignKey("course.id"), nullable=False, index=True)
+    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=True, index=True)
     file_type = Column(String, nullable=True)  # PDF, Image, Doc, etc.
     description = Column(Text, nullable=True)
     file_url = Column(String, nullable=False)
@@ -0,0 +1,22 @@
+"""
+IdempotencyKey model - Stored responses of write requests sent with an Idempotency-Key header
+"""
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(String, nullable=False)  # The request's email parameter; keys are per caller
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of method, path, query and body
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is still running
+    content_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint("owner", "key", name="uq_idempotencykey_owner_key"),
+    )
@@ -16,10 +16,11 @@ class ProgressStatus(enum.Enum):
 
 class ModuleProgress(Base):
     id = Column(Integer, primary_key=True, index=True)
-    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False)
-    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False)
+    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False, index=True)
+    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False, index=True)
     completion_percent = Column(Float, default=0.0)  # 0.0 to 100.0
     status = Column(SQLEnum(ProgressStatus), default=ProgressStatus.NOT_STARTED)
+    quiz_attempts = Column(Integer, nullable=False, default=0)  # QuizAttempt rows; taken via QuizService.claim_attempt
     last_access_time = Column(DateTime(timezone=True), onupdate=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -0,0 +1,30 @@
+"""
+ProgressEvent model - Append-only log of content progress reports
+"""
+from sqlalchemy import Column, BigInteger, Integer, ForeignKey, Float, String, DateTime, Index
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+
+class ProgressEvent(Base):
+    """
+    One row per progress report; never updated except to mark it compacted
+
+    services.progress_log folds pending events into ModuleProgress snapshots
+    and sets compacted_at. Events are kept afterwards for time-range replay.
+    """
+    id = Column(BigInteger, primary_key=True)
+    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False)
+    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False, index=True)
+    completion_percent = Column(Float, nullable=False)  # As reported, 0.0 to 100.0
+    source = Column(String, nullable=False)  # track, ...
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    compacted_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Rows arrive in time order, so a BRIN index serves time-range replay at a fraction of a btree's size
+        Index("ix_progressevent_created_at", "created_at", postgresql_using="brin"),
+        Index("ix_progressevent_enrollment_module", "enrollment_id", "module_id", "id"),
+        # Only the compaction backlog; stays small however long the log grows
+        Index("ix_progressevent_pending", "id", postgresql_where=compacted_at.is_(None)),
+    )
@@ -1,8 +1,9 @@
 """
 QuestionBank model - Quiz questions for modules
 """
-from sqlalchemy import Column, Integer, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, ForeignKey, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from db.base_class import Base
 
 
@@ -11,7 +12,19 @@ class QuestionBank(Base):
     module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False)
     question_text = Column(Text, nullable=False)
     explanation_text = Column(Text, nullable=True)
+    # Generated by Postgres; deferred so ORM loads don't fetch it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', question_text || ' ' || coalesce(explanation_text, ''))", persisted=True)
+    ))
     
     # Relationships
     module = relationship("CurriculumModule", back_populates="question_bank")
     options = relationship("QuestionOption", back_populates="question", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pages of a module's questions (admin question listing)
+        Index("ix_questionbank_module_id_id", "module_id", "id"),
+        Index("ix_questionbank_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_questionbank_question_text_trgm", "question_text", postgresql_using="gin", postgresql_ops={"question_text": "gin_trgm_ops"}),
+    )
@@ -8,7 +8,7 @@ from db.base_class import Base
 
 class QuestionOption(Base):
     id = Column(Integer, primary_key=True, index=True)
-    question_id = Column(Integer, ForeignKey("questionbank.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questionbank.id"), nullable=False, index=True)
     option_text = Column(Text, nullable=False)
     is_correct = Column(Boolean, default=False)
     
@@ -9,8 +9,8 @@ from db.base_class import Base
 
 class QuizAttempt(Base):
     id = Column(Integer, primary_key=True, index=True)
-    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False)
-    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False)
+    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False, index=True)
+    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False, index=True)
     attempt_number = Column(Integer, nullable=False)  # 1, 2, or 3
     score_percent = Column(Float, nullable=False)  # 0.0 to 100.0
     time_taken_seconds = Column(Integer, nullable=False)
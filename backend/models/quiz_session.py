@@ -0,0 +1,30 @@
+"""
+QuizSession model - Server-side record of a served quiz
+"""
+from sqlalchemy import Column, Integer, ForeignKey, String, JSON, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from db.base_class import Base
+
+
+class QuizSession(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    token = Column(String, unique=True, nullable=False, index=True)  # Handed to the client as session_id
+    enrollment_id = Column(Integer, ForeignKey("enrollment.id"), nullable=False)
+    module_id = Column(Integer, ForeignKey("curriculummodule.id"), nullable=False, index=True)
+    question_ids = Column(JSON, nullable=False)  # Served question ids, in served order
+    answer_key_json = Column(JSON, nullable=False)  # Snapshot of questions, options and correct answers
+    time_limit_seconds = Column(Integer, nullable=False)
+    pass_score_percent = Column(Integer, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    submitted_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    enrollment = relationship("Enrollment")
+    module = relationship("CurriculumModule")
+    
+    __table_args__ = (
+        Index("ix_quizsession_enrollment_module", "enrollment_id", "module_id"),
+    )
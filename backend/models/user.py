@@ -1,7 +1,7 @@
 """
 User model - Unified user table for all roles
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -34,4 +34,10 @@ class User(Base):
     wallet_account = relationship("WalletAccount", back_populates="user", uselist=False)
     user_badges = relationship("UserBadge", back_populates="user")
     activity_logs = relationship("ActivityLog", back_populates="user")
+    
+    __table_args__ = (
+        # Trigram indexes for admin search and typeahead (requires pg_trgm)
+        Index("ix_user_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_user_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+    )
 
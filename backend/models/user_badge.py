@@ -1,7 +1,7 @@
 """
 UserBadge model - Badges awarded to users
 """
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db.base_class import Base
@@ -16,3 +16,7 @@ class UserBadge(Base):
     # Relationships
     user = relationship("User", back_populates="user_badges")
     badge = relationship("Badge", back_populates="user_badges")
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "badge_id", name="uq_userbadge_user_badge"),
+    )
@@ -0,0 +1,22 @@
+"""
+UserCounter model - Per-user running counters that drive badge criteria
+"""
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from db.base_class import Base
+
+
+class UserCounter(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    name = Column(String, nullable=False)  # fast_completions, perfect_modules_completed, etc.
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User")
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_usercounter_user_name"),
+    )
@@ -0,0 +1,258 @@
+"""
+Activity Service - Daily activity bitmaps for streaks and weekly-active counts
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, cast, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.activity_calendar import ActivityCalendar
+from models.activity_log import ActivityLog
+from models.user import User
+from core.config import settings
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+CALENDAR_BYTES = 46  # 368 bits, enough for 366 days
+
+
+class ActivityService:
+    """
+    Keeps one bitset per user per year where bit n marks activity on day n
+
+    Streaks, "active in week W" and school-wide weekly-active counts are
+    computed with integer masks and popcounts instead of scanning ActivityLog.
+    """
+
+    @staticmethod
+    def today() -> date:
+        """Current calendar day in the configured activity timezone"""
+        return datetime.now(timezone.utc).astimezone(ZoneInfo(settings.ACTIVITY_TIMEZONE)).date()
+
+    @staticmethod
+    def day_index(day: date) -> int:
+        """0-based day of year"""
+        return day.timetuple().tm_yday - 1
+
+    @staticmethod
+    def to_int(bits: Optional[bytes]) -> int:
+        return int.from_bytes(bits, "little") if bits else 0
+
+    @staticmethod
+    def to_bytes(value: int) -> bytes:
+        return value.to_bytes(CALENDAR_BYTES, "little")
+
+    @staticmethod
+    def streak_ending_at(value: int, index: int) -> int:
+        """Number of consecutive active days ending at day `index` (within one year)"""
+        window = (1 << (index + 1)) - 1
+        inactive = ~value & window
+        if not inactive:
+            return index + 1
+        return index - (inactive.bit_length() - 1)
+
+    @staticmethod
+    def streak(calendars: Dict[int, int], day: date) -> int:
+        """
+        Consecutive active days ending at `day`, following into previous years
+
+        Args:
+            calendars: year -> bitmap integer for one user
+        """
+        total = 0
+        while True:
+            index = ActivityService.day_index(day)
+            run = ActivityService.streak_ending_at(calendars.get(day.year, 0), index)
+            total += run
+            if run <= index:
+                return total
+            # The run covers all of this year so far; continue on Dec 31 of the previous year
+            day = date(day.year - 1, 12, 31)
+
+    @staticmethod
+    def week_masks(week_start: date) -> Dict[int, int]:
+        """Bitmasks (per year) selecting the 7 days starting at week_start"""
+        masks: Dict[int, int] = {}
+        for offset in range(7):
+            day = week_start + timedelta(days=offset)
+            masks[day.year] = masks.get(day.year, 0) | (1 << ActivityService.day_index(day))
+        return masks
+
+    @staticmethod
+    def active_days(value: int) -> int:
+        """Popcount of a bitmap"""
+        return value.bit_count()
+
+    @staticmethod
+    async def record_activity(
+        db: AsyncSession,
+        user_id: int,
+        school_id: Optional[int],
+        day: Optional[date] = None
+    ) -> Optional[int]:
+        """
+        Mark a user active for a day
+
+        The bit is set with one atomic UPDATE, so concurrent requests cannot
+        lose each other's days. Runs in the caller's transaction.
+
+        Returns:
+            Current streak length if this is the first activity of the day,
+            otherwise None
+        """
+        day = day or ActivityService.today()
+        index = ActivityService.day_index(day)
+
+        await db.execute(
+            pg_insert(ActivityCalendar)
+            .values(user_id=user_id, school_id=school_id, year=day.year, bits=bytes(CALENDAR_BYTES))
+            .on_conflict_do_nothing(index_elements=["user_id", "year"])
+        )
+        result = await db.execute(
+            update(ActivityCalendar)
+            .where(
+                ActivityCalendar.user_id == user_id,
+                ActivityCalendar.year == day.year,
+                func.get_bit(ActivityCalendar.bits, index) == 0
+            )
+            .values(bits=func.set_bit(ActivityCalendar.bits, index, 1))
+            .returning(ActivityCalendar.bits)
+            .execution_options(synchronize_session=False)
+        )
+        bits = result.scalar_one_or_none()
+        if bits is None:
+            return None  # Already active today
+
+        calendars = {day.year: ActivityService.to_int(bits)}
+        streak = ActivityService.streak(calendars, day)
+        if streak == index + 1:
+            # Streak reaches Jan 1; include the previous year's tail
+            result = await db.execute(
+                select(ActivityCalendar.year, ActivityCalendar.bits).where(
+                    ActivityCalendar.user_id == user_id,
+                    ActivityCalendar.year < day.year
+                )
+            )
+            calendars.update({year: ActivityService.to_int(b) for year, b in result.all()})
+            streak = ActivityService.streak(calendars, day)
+        return streak
+
+    @staticmethod
+    async def get_streak(db: AsyncSession, user_id: int, day: Optional[date] = None) -> int:
+        """Current streak for a user, ending today (or at `day`)"""
+        day = day or ActivityService.today()
+        result = await db.execute(
+            select(ActivityCalendar.year, ActivityCalendar.bits).where(
+                ActivityCalendar.user_id == user_id,
+                ActivityCalendar.year <= day.year
+            )
+        )
+        calendars = {year: ActivityService.to_int(bits) for year, bits in result.all()}
+        return ActivityService.streak(calendars, day)
+
+    @staticmethod
+    async def weekly_active_counts(
+        db: AsyncSession,
+        school_id: int,
+        weeks: int = 4,
+        today: Optional[date] = None
+    ) -> List[Tuple[date, int]]:
+        """
+        Count distinct active users per week for a school
+
+        Loads one small bitmap per user per year touched and ANDs it with
+        each week's mask.
+
+        Returns:
+            (week_start, active_users) for the last `weeks` weeks, oldest first
+        """
+        today = today or ActivityService.today()
+        current_week = today - timedelta(days=today.weekday())
+        week_starts = [current_week - timedelta(weeks=n) for n in range(weeks - 1, -1, -1)]
+        masks = [ActivityService.week_masks(start) for start in week_starts]
+        years = sorted({year for mask in masks for year in mask})
+
+        result = await db.execute(
+            select(ActivityCalendar.user_id, ActivityCalendar.year, ActivityCalendar.bits).where(
+                ActivityCalendar.school_id == school_id,
+                ActivityCalendar.year.in_(years)
+            )
+        )
+        calendars: Dict[int, Dict[int, int]] = {}
+        for user_id, year, bits in result.all():
+            calendars.setdefault(user_id, {})[year] = ActivityService.to_int(bits)
+
+        counts = []
+        for week_start, mask in zip(week_starts, masks):
+            active = sum(
+                1 for user_years in calendars.values()
+                if any(user_years.get(year, 0) & year_mask for year, year_mask in mask.items())
+            )
+            counts.append((week_start, active))
+        return counts
+
+    @staticmethod
+    async def backfill_from_activity_log(db: AsyncSession, batch_size: int = 1000) -> int:
+        """
+        Build calendars from existing ActivityLog rows
+
+        Existing bits are kept (OR-ed), so the job is safe to re-run.
+
+        Returns:
+            Number of (user, year) calendars written
+        """
+        local_day = cast(func.timezone(settings.ACTIVITY_TIMEZONE, ActivityLog.created_at), Date)
+        stream = await db.stream(
+            select(ActivityLog.user_id, User.school_id, local_day)
+            .join(User, User.id == ActivityLog.user_id)
+            .distinct()
+            .order_by(ActivityLog.user_id)
+        )
+
+        written = 0
+        current_user = None
+        pending: Dict[Tuple[int, int], Dict] = {}
+        async for user_id, school_id, day in stream:
+            # Rows arrive ordered by user; flush only between users
+            if user_id != current_user and len(pending) >= batch_size:
+                written += await ActivityService._merge_calendars(db, pending)
+                pending = {}
+            current_user = user_id
+
+            entry = pending.setdefault((user_id, day.year), {"school_id": school_id, "value": 0})
+            entry["value"] |= 1 << ActivityService.day_index(day)
+
+        if pending:
+            written += await ActivityService._merge_calendars(db, pending)
+        await db.commit()
+        return written
+
+    @staticmethod
+    async def _merge_calendars(db: AsyncSession, calendars: Dict[Tuple[int, int], Dict]) -> int:
+        user_ids = {user_id for user_id, _ in calendars}
+        result = await db.execute(
+            select(ActivityCalendar.user_id, ActivityCalendar.year, ActivityCalendar.bits)
+            .where(ActivityCalendar.user_id.in_(user_ids))
+        )
+        for user_id, year, bits in result.all():
+            if (user_id, year) in calendars:
+                calendars[(user_id, year)]["value"] |= ActivityService.to_int(bits)
+
+        stmt = pg_insert(ActivityCalendar).values([
+            {
+                "user_id": user_id,
+                "year": year,
+                "school_id": entry["school_id"],
+                "bits": ActivityService.to_bytes(entry["value"])
+            }
+            for (user_id, year), entry in calendars.items()
+        ])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "year"],
+                set_={"bits": stmt.excluded.bits, "school_id": stmt.excluded.school_id}
+            )
+        )
+        return len(calendars)
+
+
+activity_service = ActivityService()
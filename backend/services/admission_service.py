@@ -0,0 +1,194 @@
+"""
+Admission Service - Per-endpoint concurrency limits with a prioritized, deadline-bound queue
+"""
+from services.config_service import config_service
+from collections import deque
+from typing import Deque, Dict, Tuple
+import asyncio
+import math
+import re
+import time
+
+# (endpoint class, method, path regex relative to API_V1_STR), first match wins
+ENDPOINT_CLASSES = [
+    ("quiz_submit", "POST", re.compile(r"^/student/module/\d+/quiz/submit$")),
+    ("quiz_generate", "GET", re.compile(r"^/student/module/\d+/quiz$")),
+    ("progress", "POST", re.compile(r"^/student/module/\d+/track$")),
+    ("dashboard", "GET", re.compile(r"^/(student|teacher|principal|admin)/dashboard$")),
+    ("dashboard", "POST", re.compile(r"^/student/batch$")),  # Whole-screen loads
+]
+DEFAULT_CLASS = "default"
+
+# Lower value is served first when capacity frees up
+PRIORITIES = {
+    "quiz_submit": 0,
+    "quiz_generate": 1,
+    "progress": 2,
+    DEFAULT_CLASS: 3,
+    "dashboard": 4,
+}
+
+MAX_RETRY_AFTER_SECONDS = 30
+SERVICE_TIME_SMOOTHING = 0.2  # EWMA weight of the newest request
+
+
+class AdmissionService:
+    """
+    Admission control for one worker
+
+    A request runs when both its endpoint class and the worker as a whole
+    are under their concurrency limits; otherwise it waits in its class's
+    FIFO queue. Freed capacity goes to the highest-priority class that is
+    under its own limit, so quiz submissions overtake dashboard reads
+    without any class starving the others of its share. A request still
+    queued at its deadline (or arriving at a full queue) is shed with a
+    Retry-After estimate.
+
+    Limits come from ConfigService and take effect without a restart.
+    """
+
+    def __init__(self):
+        self._classes = sorted(PRIORITIES, key=PRIORITIES.get)
+        self._queues: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in self._classes}
+        self._in_flight: Dict[str, int] = {name: 0 for name in self._classes}
+        self._total_in_flight = 0
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {"admitted": 0, "queued": 0, "shed": 0, "waited": 0, "wait_ms_total": 0.0,
+                   "max_wait_ms": 0.0, "service_ms": 0.0}
+            for name in self._classes
+        }
+
+    @staticmethod
+    def classify(method: str, path: str) -> str:
+        """Endpoint class for a request path relative to API_V1_STR"""
+        for name, class_method, pattern in ENDPOINT_CLASSES:
+            if method == class_method and pattern.match(path):
+                return name
+        return DEFAULT_CLASS
+
+    @staticmethod
+    def limit_for(endpoint_class: str) -> int:
+        """Concurrency limit, from ConfigService.ADMISSION_LIMIT_<CLASS>"""
+        return getattr(config_service, f"ADMISSION_LIMIT_{endpoint_class.upper()}")
+
+    def _has_capacity(self, endpoint_class: str) -> bool:
+        return (self._total_in_flight < config_service.ADMISSION_MAX_CONCURRENCY
+                and self._in_flight[endpoint_class] < self.limit_for(endpoint_class))
+
+    def _start(self, endpoint_class: str) -> None:
+        self._in_flight[endpoint_class] += 1
+        self._total_in_flight += 1
+        self._stats[endpoint_class]["admitted"] += 1
+
+    def _finish(self, endpoint_class: str) -> None:
+        self._in_flight[endpoint_class] -= 1
+        self._total_in_flight -= 1
+
+    @staticmethod
+    def _granted(waiter: asyncio.Future) -> bool:
+        return waiter.done() and not waiter.cancelled()
+
+    async def acquire(self, endpoint_class: str) -> Tuple[bool, int]:
+        """
+        Wait for a slot
+
+        Returns:
+            (admitted, retry_after_seconds); retry_after is 0 when admitted
+        """
+        queue = self._queues[endpoint_class]
+        if not queue and self._has_capacity(endpoint_class):
+            self._start(endpoint_class)
+            return True, 0
+
+        stats = self._stats[endpoint_class]
+        if len(queue) >= config_service.ADMISSION_MAX_QUEUE:
+            stats["shed"] += 1
+            return False, self.retry_after(endpoint_class)
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        stats["queued"] += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, config_service.ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            if not self._granted(waiter):
+                stats["shed"] += 1
+                self._discard(queue, waiter)  # Not part of the backlog it is told to wait out
+                return False, self.retry_after(endpoint_class)
+            # The slot was handed over just as the deadline hit; use it
+        except asyncio.CancelledError:
+            # Client went away; give back a slot granted in the meantime
+            if self._granted(waiter):
+                self._finish(endpoint_class)
+                self._wake()
+            raise
+        finally:
+            if waiter.cancelled():
+                self._discard(queue, waiter)
+
+        waited_ms = (time.perf_counter() - started) * 1000
+        stats["waited"] += 1
+        stats["wait_ms_total"] += waited_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited_ms)
+        return True, 0
+
+    def release(self, endpoint_class: str, service_seconds: float) -> None:
+        """Free a slot and hand capacity to the next eligible waiters"""
+        self._finish(endpoint_class)
+        stats = self._stats[endpoint_class]
+        service_ms = service_seconds * 1000
+        stats["service_ms"] = (service_ms if not stats["service_ms"] else
+                               stats["service_ms"] + SERVICE_TIME_SMOOTHING * (service_ms - stats["service_ms"]))
+        self._wake()
+
+    def _wake(self) -> None:
+        for endpoint_class in self._classes:
+            queue = self._queues[endpoint_class]
+            while queue and self._has_capacity(endpoint_class):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue  # Timed out or cancelled while queued
+                self._start(endpoint_class)
+                waiter.set_result(True)
+            if self._total_in_flight >= config_service.ADMISSION_MAX_CONCURRENCY:
+                return
+
+    @staticmethod
+    def _discard(queue: Deque[asyncio.Future], waiter: asyncio.Future) -> None:
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+
+    def retry_after(self, endpoint_class: str) -> int:
+        """Seconds until the class's current backlog should have drained"""
+        service_seconds = (self._stats[endpoint_class]["service_ms"] or 1000) / 1000
+        backlog = len(self._queues[endpoint_class]) + self._in_flight[endpoint_class]
+        estimate = service_seconds * backlog / max(1, self.limit_for(endpoint_class))
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(estimate)))
+
+    def metrics(self) -> Dict[str, Dict]:
+        snapshot = {
+            "max_concurrency": config_service.ADMISSION_MAX_CONCURRENCY,
+            "in_flight": self._total_in_flight,
+            "classes": {},
+        }
+        for endpoint_class in self._classes:
+            stats = self._stats[endpoint_class]
+            snapshot["classes"][endpoint_class] = {
+                "priority": PRIORITIES[endpoint_class],
+                "limit": self.limit_for(endpoint_class),
+                "in_flight": self._in_flight[endpoint_class],
+                "waiting": len(self._queues[endpoint_class]),
+                "admitted": int(stats["admitted"]),
+                "queued": int(stats["queued"]),
+                "shed": int(stats["shed"]),
+                "avg_wait_ms": round(stats["wait_ms_total"] / max(1, stats["waited"]), 2),
+                "max_wait_ms": round(stats["max_wait_ms"], 2),
+                "avg_service_ms": round(stats["service_ms"], 2),
+            }
+        return snapshot
+
+
+admission_service = AdmissionService()
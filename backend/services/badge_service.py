@@ -0,0 +1,250 @@
+"""
+Badge Service - Incremental badge evaluation from domain events
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_, case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.badge import Badge
+from models.user_badge import UserBadge
+from models.user_counter import UserCounter
+from services.config_service import config_service
+from db.shards import shard_of
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Domain events
+QUIZ_ATTEMPT_SCORED = "quiz_attempt_scored"
+MODULE_COMPLETED = "module_completed"
+DAILY_ACTIVITY = "daily_activity"
+EVIDENCE_SUBMITTED = "evidence_submitted"
+
+# Counters
+QUIZ_ATTEMPTS = "quiz_attempts"
+PERFECT_SCORES = "perfect_scores"
+FAST_COMPLETIONS = "fast_completions"
+MODULES_COMPLETED = "modules_completed"
+PERFECT_MODULES_COMPLETED = "perfect_modules_completed"
+ACTIVE_DAYS = "active_days"
+STREAK_DAYS = "streak_days"
+EVIDENCE_COUNT = "evidence_submitted"
+
+# Counters that hold the latest value instead of accumulating
+GAUGE_COUNTERS = {STREAK_DAYS}
+
+# criteria_json key -> (counter, ConfigService attribute used when the value is null)
+CRITERIA_KEYS = {
+    "fast_completions_required": (FAST_COMPLETIONS, "BADGE_SPEED_MASTER_COUNT"),
+    "modules_required": (PERFECT_MODULES_COMPLETED, "BADGE_HIGH_PERFORMER_MODULES"),
+    "consecutive_days": (STREAK_DAYS, "BADGE_DEDICATED_LEARNER_DAYS"),
+    "evidence_count": (EVIDENCE_COUNT, None),
+}
+
+
+class CompiledBadge:
+    """A badge whose criteria reduce to counter >= threshold conditions"""
+
+    __slots__ = ("badge_id", "code", "conditions")
+
+    def __init__(self, badge_id: int, code: str, conditions: List[Tuple[str, int]]):
+        self.badge_id = badge_id
+        self.code = code
+        self.conditions = conditions
+
+    def is_met(self, counters: Dict[str, int]) -> bool:
+        return all(counters.get(counter, 0) >= threshold for counter, threshold in self.conditions)
+
+
+class BadgeService:
+    """
+    Awards badges incrementally
+
+    Each badge's criteria_json is compiled once into counter thresholds.
+    Events only bump per-user counters; badges are re-evaluated only when a
+    counter they depend on changed, and awards are inserted in one batch
+    with ON CONFLICT DO NOTHING so repeated evaluation is harmless.
+
+    Supported criteria_json forms:
+        {"fast_completions_required": 3}           # see CRITERIA_KEYS
+        {"counter": "quiz_attempts", "min": 10}    # any counter
+    Badges with other criteria (e.g. {"on_time": true}) are awarded elsewhere.
+    """
+
+    def __init__(self):
+        # shard -> (config version, counter -> badges); badge ids differ per shard
+        self._rules: Dict[str, Tuple[int, Dict[str, List[CompiledBadge]]]] = {}
+
+    @staticmethod
+    def compile_criteria(criteria: Optional[Dict]) -> Optional[List[Tuple[str, int]]]:
+        """
+        Compile criteria_json into (counter, threshold) conditions
+
+        Returns:
+            Conditions, or None if the criteria are not counter based
+        """
+        if not criteria:
+            return None
+
+        if "counter" in criteria:
+            return [(criteria["counter"], int(criteria.get("min", 1)))]
+
+        conditions = []
+        for key, value in criteria.items():
+            if key not in CRITERIA_KEYS:
+                return None
+            counter, default_attr = CRITERIA_KEYS[key]
+            if value is None:
+                if default_attr is None:
+                    return None
+                value = getattr(config_service, default_attr)
+            conditions.append((counter, int(value)))
+        return conditions or None
+
+    def invalidate_rules(self) -> None:
+        """Force recompilation, e.g. after badges are edited"""
+        self._rules.clear()
+
+    async def _get_rules(self, db: AsyncSession) -> Dict[str, List[CompiledBadge]]:
+        shard = shard_of(db)
+        cached = self._rules.get(shard)
+        # Null thresholds fall back to config, so recompile when config changes
+        if cached is not None and cached[0] == config_service.version:
+            return cached[1]
+
+        version = config_service.version
+        result = await db.execute(select(Badge.id, Badge.code, Badge.criteria_json))
+        rules: Dict[str, List[CompiledBadge]] = {}
+        for badge_id, code, criteria in result.all():
+            conditions = self.compile_criteria(criteria)
+            if conditions is None:
+                continue
+            compiled = CompiledBadge(badge_id, code, conditions)
+            for counter, _ in conditions:
+                rules.setdefault(counter, []).append(compiled)
+        self._rules[shard] = (version, rules)
+        return rules
+
+    @staticmethod
+    def counter_updates(event_type: str, data: Dict) -> Dict[str, int]:
+        """Map one domain event to counter deltas (or gauge values)"""
+        if event_type == QUIZ_ATTEMPT_SCORED:
+            updates = {QUIZ_ATTEMPTS: 1}
+            if data["score_percent"] >= 100:
+                updates[PERFECT_SCORES] = 1
+                if (data["completed_in_time"] and
+                        data["time_taken_seconds"] <= config_service.FAST_COMPLETION_THRESHOLD_SECONDS):
+                    updates[FAST_COMPLETIONS] = 1
+            return updates
+        if event_type == MODULE_COMPLETED:
+            updates = {MODULES_COMPLETED: 1}
+            if data.get("score_percent", 0) >= 100:
+                updates[PERFECT_MODULES_COMPLETED] = 1
+            return updates
+        if event_type == DAILY_ACTIVITY:
+            updates = {ACTIVE_DAYS: 1}
+            if data.get("streak_days") is not None:
+                updates[STREAK_DAYS] = data["streak_days"]
+            return updates
+        if event_type == EVIDENCE_SUBMITTED:
+            return {EVIDENCE_COUNT: 1}
+        raise ValueError(f"Unknown badge event: {event_type}")
+
+    async def process_events(
+        self,
+        db: AsyncSession,
+        events: List[Tuple[int, str, Dict]]
+    ) -> List[Tuple[int, int]]:
+        """
+        Apply domain events and award any badges they unlock
+
+        Runs in the caller's transaction; the caller commits.
+
+        Args:
+            events: (user_id, event_type, data) tuples
+
+        Returns:
+            Newly awarded (user_id, badge_id) pairs
+        """
+        # 1. Fold events into one update per (user, counter)
+        updates: Dict[Tuple[int, str], int] = {}
+        for user_id, event_type, data in events:
+            for counter, value in self.counter_updates(event_type, data).items():
+                key = (user_id, counter)
+                if counter in GAUGE_COUNTERS:
+                    updates[key] = value
+                else:
+                    updates[key] = updates.get(key, 0) + value
+        if not updates:
+            return []
+
+        # 2. Upsert counters in one statement and read back the new values
+        stmt = pg_insert(UserCounter).values([
+            {"user_id": user_id, "name": counter, "value": value}
+            for (user_id, counter), value in updates.items()
+        ])
+        counter_table = UserCounter.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "name"],
+            set_={
+                # Gauges overwrite, everything else accumulates
+                "value": case(
+                    (counter_table.c.name.in_(GAUGE_COUNTERS), stmt.excluded.value),
+                    else_=counter_table.c.value + stmt.excluded.value
+                ),
+                "updated_at": func.now()
+            }
+        ).returning(counter_table.c.user_id, counter_table.c.name, counter_table.c.value)
+        result = await db.execute(stmt)
+
+        counters: Dict[int, Dict[str, int]] = {}
+        for user_id, counter, value in result.all():
+            counters.setdefault(user_id, {})[counter] = value
+
+        # 3. Only badges that depend on a changed counter are candidates
+        rules = await self._get_rules(db)
+        candidates: Dict[int, Set[CompiledBadge]] = {}
+        missing: Set[Tuple[int, str]] = set()
+        for user_id, changed in counters.items():
+            for counter in changed:
+                for badge in rules.get(counter, []):
+                    candidates.setdefault(user_id, set()).add(badge)
+                    missing.update(
+                        (user_id, other) for other, _ in badge.conditions if other not in changed
+                    )
+        if not candidates:
+            return []
+
+        # Multi-condition badges may need counters this batch did not touch
+        if missing:
+            result = await db.execute(
+                select(UserCounter.user_id, UserCounter.name, UserCounter.value)
+                .where(tuple_(UserCounter.user_id, UserCounter.name).in_(list(missing)))
+            )
+            for user_id, counter, value in result.all():
+                counters[user_id][counter] = value
+
+        # 4. Insert every met badge at once; existing awards are skipped
+        awards = [
+            {"user_id": user_id, "badge_id": badge.badge_id}
+            for user_id, badges in candidates.items()
+            for badge in badges
+            if badge.is_met(counters[user_id])
+        ]
+        if not awards:
+            return []
+
+        result = await db.execute(
+            pg_insert(UserBadge)
+            .values(awards)
+            .on_conflict_do_nothing(index_elements=["user_id", "badge_id"])
+            .returning(UserBadge.user_id, UserBadge.badge_id)
+        )
+        awarded = [tuple(row) for row in result.all()]
+        for user_id, badge_id in awarded:
+            logger.info("Awarded badge %s to user %s", badge_id, user_id)
+        return awarded
+
+
+badge_service = BadgeService()
@@ -1,11 +1,24 @@
 """
 Configuration Service - Centralized business rules configuration
 """
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from models.config_setting import ConfigSetting
+from db.notify import notify
+from typing import Any, Dict, Optional
+
+# Channel used to tell every worker to reload configuration
+CONFIG_CHANNEL = "config_changed"
+
 
 class ConfigService:
     """
     Centralized configuration for business logic rules
-    In production, these would be stored in database and editable via admin panel
+    
+    Class attributes are the defaults. Admin overrides are stored in the
+    ConfigSetting table of the default shard and loaded onto the instance,
+    so hot paths read plain attributes with no per-request query. Changes
+    reach other workers through Postgres NOTIFY on CONFIG_CHANNEL.
     """
     
     # Quiz Configuration
@@ -13,6 +26,10 @@ class ConfigService:
     DEFAULT_QUIZ_TIME_LIMIT_SECONDS = 120  # 2 minutes
     DEFAULT_PASS_SCORE_PERCENT = 100  # 100% required to pass
     MAX_QUIZ_ATTEMPTS = 3
+    QUIZ_SUBMIT_GRACE_SECONDS = 5  # Allowance for network latency on submit
+    QUIZ_SESSION_TTL_SECONDS = 3600  # Unsubmitted sessions expire this long after the time limit
+    QUIZ_VARIANT_POOL_SIZE = 30  # Pre-built quiz variants kept per module
+    QUIZ_VARIANT_POOL_LOW_WATERMARK = 10  # Refill when fewer variants than this remain
     
     # Content Consumption
     CONTENT_COMPLETION_THRESHOLD_PERCENT = 90  # 90% viewed = completed
@@ -38,8 +55,99 @@ class ConfigService:
     TEACHER_CREDIT_EVIDENCE_SUBMISSION = 10
     TEACHER_HIGH_PERFORMANCE_THRESHOLD = 80  # 80% students passed
     
-    @classmethod
-    def get_credit_for_quiz_attempt(cls, score_percent: float, time_taken_seconds: int, completed_in_time: bool) -> int:
+    # Admission control (per worker); see AdmissionService
+    ADMISSION_MAX_CONCURRENCY = 64  # Requests executing at once, all endpoints
+    ADMISSION_LIMIT_QUIZ_SUBMIT = 32
+    ADMISSION_LIMIT_QUIZ_GENERATE = 24
+    ADMISSION_LIMIT_PROGRESS = 16
+    ADMISSION_LIMIT_DASHBOARD = 8
+    ADMISSION_LIMIT_DEFAULT = 24
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = 5  # Shed requests still queued after this
+    ADMISSION_MAX_QUEUE = 200  # Waiting requests per endpoint class before shedding on arrival
+    
+    # Admin-editable settings: ConfigUpdate field -> attribute
+    EDITABLE_SETTINGS = {
+        "default_questions": "DEFAULT_QUIZ_QUESTIONS",
+        "default_time_limit_seconds": "DEFAULT_QUIZ_TIME_LIMIT_SECONDS",
+        "default_pass_score_percent": "DEFAULT_PASS_SCORE_PERCENT",
+        "max_attempts": "MAX_QUIZ_ATTEMPTS",
+        "completion_threshold_percent": "CONTENT_COMPLETION_THRESHOLD_PERCENT",
+        "credit_fast_and_full": "CREDIT_FAST_AND_FULL",
+        "credit_normal_and_full": "CREDIT_NORMAL_AND_FULL",
+        "credit_other": "CREDIT_OTHER",
+        "fast_threshold_seconds": "FAST_COMPLETION_THRESHOLD_SECONDS",
+        "normal_threshold_seconds": "NORMAL_COMPLETION_THRESHOLD_SECONDS",
+        "badge_high_performer_modules": "BADGE_HIGH_PERFORMER_MODULES",
+        "badge_speed_master_count": "BADGE_SPEED_MASTER_COUNT",
+        "badge_dedicated_learner_days": "BADGE_DEDICATED_LEARNER_DAYS",
+        "teacher_credit_syllabus_completion": "TEACHER_CREDIT_SYLLABUS_COMPLETION",
+        "teacher_credit_high_student_performance": "TEACHER_CREDIT_HIGH_STUDENT_PERFORMANCE",
+        "teacher_credit_evidence_submission": "TEACHER_CREDIT_EVIDENCE_SUBMISSION",
+        "teacher_high_performance_threshold": "TEACHER_HIGH_PERFORMANCE_THRESHOLD",
+        "admission_max_concurrency": "ADMISSION_MAX_CONCURRENCY",
+        "admission_limit_quiz_submit": "ADMISSION_LIMIT_QUIZ_SUBMIT",
+        "admission_limit_quiz_generate": "ADMISSION_LIMIT_QUIZ_GENERATE",
+        "admission_limit_progress": "ADMISSION_LIMIT_PROGRESS",
+        "admission_limit_dashboard": "ADMISSION_LIMIT_DASHBOARD",
+        "admission_limit_default": "ADMISSION_LIMIT_DEFAULT",
+        "admission_queue_timeout_seconds": "ADMISSION_QUEUE_TIMEOUT_SECONDS",
+        "admission_max_queue": "ADMISSION_MAX_QUEUE",
+    }
+    
+    def __init__(self):
+        self.version = 0  # Bumped on every applied change, for caches keyed on config
+    
+    def _apply(self, overrides: Dict[str, Any], reset: bool = False) -> None:
+        """Apply attribute overrides to this instance"""
+        if reset:
+            for attr in self.EDITABLE_SETTINGS.values():
+                self.__dict__.pop(attr, None)
+        for attr, value in overrides.items():
+            if attr in self.EDITABLE_SETTINGS.values():
+                setattr(self, attr, value)
+        self.version += 1
+    
+    async def load(self, db: AsyncSession) -> None:
+        """Load all overrides from the database, replacing the in-memory copy"""
+        result = await db.execute(select(ConfigSetting.key, ConfigSetting.value))
+        self._apply(dict(result.all()), reset=True)
+    
+    async def update(self, db: AsyncSession, changes: Dict[str, Optional[Any]]) -> Dict[str, Any]:
+        """
+        Persist admin changes and notify every worker
+        
+        Args:
+            changes: ConfigUpdate fields; None values are ignored
+            
+        Returns:
+            Applied changes keyed by attribute name
+        """
+        applied = {
+            self.EDITABLE_SETTINGS[field]: value
+            for field, value in changes.items()
+            if value is not None and field in self.EDITABLE_SETTINGS
+        }
+        if not applied:
+            return applied
+        
+        result = await db.execute(
+            select(ConfigSetting).where(ConfigSetting.key.in_(applied.keys()))
+        )
+        existing = {setting.key: setting for setting in result.scalars().all()}
+        for key, value in applied.items():
+            if key in existing:
+                existing[key].value = value
+            else:
+                db.add(ConfigSetting(key=key, value=value))
+        
+        await notify(db, CONFIG_CHANNEL)
+        await db.commit()
+        
+        # Apply locally right away; the NOTIFY round trip reloads the rest
+        self._apply(applied)
+        return applied
+    
+    def get_credit_for_quiz_attempt(self, score_percent: float, time_taken_seconds: int, completed_in_time: bool) -> int:
         """
         Calculate credits based on quiz performance
         
@@ -55,41 +163,56 @@ class ConfigService:
             return 0
             
         if score_percent >= 100:
-            if time_taken_seconds <= cls.FAST_COMPLETION_THRESHOLD_SECONDS:
-                return cls.CREDIT_FAST_AND_FULL
-            elif time_taken_seconds <= cls.NORMAL_COMPLETION_THRESHOLD_SECONDS:
-                return cls.CREDIT_NORMAL_AND_FULL
+            if time_taken_seconds <= self.FAST_COMPLETION_THRESHOLD_SECONDS:
+                return self.CREDIT_FAST_AND_FULL
+            elif time_taken_seconds <= self.NORMAL_COMPLETION_THRESHOLD_SECONDS:
+                return self.CREDIT_NORMAL_AND_FULL
             else:
-                return cls.CREDIT_OTHER
-        elif score_percent >= cls.DEFAULT_PASS_SCORE_PERCENT:
-            return cls.CREDIT_OTHER
+                return self.CREDIT_OTHER
+        elif score_percent >= self.DEFAULT_PASS_SCORE_PERCENT:
+            return self.CREDIT_OTHER
         else:
             return 0
     
-    @classmethod
-    def to_dict(cls) -> dict:
+    def to_dict(self) -> dict:
         """Return configuration as dictionary for API responses"""
         return {
             "quiz": {
-                "default_questions": cls.DEFAULT_QUIZ_QUESTIONS,
-                "default_time_limit_seconds": cls.DEFAULT_QUIZ_TIME_LIMIT_SECONDS,
-                "default_pass_score_percent": cls.DEFAULT_PASS_SCORE_PERCENT,
-                "max_attempts": cls.MAX_QUIZ_ATTEMPTS
+                "default_questions": self.DEFAULT_QUIZ_QUESTIONS,
+                "default_time_limit_seconds": self.DEFAULT_QUIZ_TIME_LIMIT_SECONDS,
+                "default_pass_score_percent": self.DEFAULT_PASS_SCORE_PERCENT,
+                "max_attempts": self.MAX_QUIZ_ATTEMPTS
             },
             "content": {
-                "completion_threshold_percent": cls.CONTENT_COMPLETION_THRESHOLD_PERCENT
+                "completion_threshold_percent": self.CONTENT_COMPLETION_THRESHOLD_PERCENT
             },
             "credits": {
-                "fast_and_full": cls.CREDIT_FAST_AND_FULL,
-                "normal_and_full": cls.CREDIT_NORMAL_AND_FULL,
-                "other": cls.CREDIT_OTHER,
-                "fast_threshold_seconds": cls.FAST_COMPLETION_THRESHOLD_SECONDS,
-                "normal_threshold_seconds": cls.NORMAL_COMPLETION_THRESHOLD_SECONDS
+                "fast_and_full": self.CREDIT_FAST_AND_FULL,
+                "normal_and_full": self.CREDIT_NORMAL_AND_FULL,
+                "other": self.CREDIT_OTHER,
+                "fast_threshold_seconds": self.FAST_COMPLETION_THRESHOLD_SECONDS,
+                "normal_threshold_seconds": self.NORMAL_COMPLETION_THRESHOLD_SECONDS
+            },
+            "badges": {
+                "high_performer_modules": self.BADGE_HIGH_PERFORMER_MODULES,
+                "speed_master_count": self.BADGE_SPEED_MASTER_COUNT,
+                "dedicated_learner_days": self.BADGE_DEDICATED_LEARNER_DAYS
             },
             "teacher_credits": {
-                "syllabus_completion": cls.TEACHER_CREDIT_SYLLABUS_COMPLETION,
-                "high_student_performance": cls.TEACHER_CREDIT_HIGH_STUDENT_PERFORMANCE,
-                "evidence_submission": cls.TEACHER_CREDIT_EVIDENCE_SUBMISSION
+                "syllabus_completion": self.TEACHER_CREDIT_SYLLABUS_COMPLETION,
+                "high_student_performance": self.TEACHER_CREDIT_HIGH_STUDENT_PERFORMANCE,
+                "evidence_submission": self.TEACHER_CREDIT_EVIDENCE_SUBMISSION,
+                "high_performance_threshold": self.TEACHER_HIGH_PERFORMANCE_THRESHOLD
+            },
+            "admission": {
+                "max_concurrency": self.ADMISSION_MAX_CONCURRENCY,
+                "limit_quiz_submit": self.ADMISSION_LIMIT_QUIZ_SUBMIT,
+                "limit_quiz_generate": self.ADMISSION_LIMIT_QUIZ_GENERATE,
+                "limit_progress": self.ADMISSION_LIMIT_PROGRESS,
+                "limit_dashboard": self.ADMISSION_LIMIT_DASHBOARD,
+                "limit_default": self.ADMISSION_LIMIT_DEFAULT,
+                "queue_timeout_seconds": self.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+                "max_queue": self.ADMISSION_MAX_QUEUE
             }
         }
 
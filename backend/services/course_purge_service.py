@@ -0,0 +1,220 @@
+"""
+Course Purge Service - Batched, dependency-ordered deletion of archived courses
+"""
+from sqlalchemy import select, delete, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.notify import notify
+from db.shards import shard_router, DEFAULT_SHARD
+from models.course import Course, ARCHIVED
+from models.curriculum_module import CurriculumModule
+from models.content_item import ContentItem
+from models.enrollment import Enrollment
+from models.enrollment_summary import EnrollmentSummary
+from models.evidence_item import EvidenceItem
+from models.module_progress import ModuleProgress
+from models.progress_event import ProgressEvent
+from models.question_bank import QuestionBank
+from models.question_option import QuestionOption
+from models.quiz_attempt import QuizAttempt
+from models.quiz_config import QuizConfig
+from models.quiz_session import QuizSession
+from services.quiz_variant_pool import quiz_variant_pool, QUIZ_BANK_CHANNEL
+from services.retrieval_service import retrieval_service, RETRIEVAL_CHANNEL
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 5000  # Rows per DELETE; each batch is its own short transaction
+PURGE_BATCH_PAUSE_SECONDS = 0.05  # Breathing room for other writers between batches
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+
+class CoursePurgeError(ValueError):
+    """Raised when a course cannot be purged"""
+    pass
+
+
+def _purge_steps(course_id: int) -> List[Tuple[str, Any, Any]]:
+    """(step name, model, row filter) in delete order: children before parents"""
+    modules = select(CurriculumModule.id).where(CurriculumModule.course_id == course_id)
+    enrollments = select(Enrollment.id).where(Enrollment.course_id == course_id)
+    questions = select(QuestionBank.id).where(QuestionBank.module_id.in_(modules))
+    return [
+        ("question_options", QuestionOption, QuestionOption.question_id.in_(questions)),
+        ("questions", QuestionBank, QuestionBank.module_id.in_(modules)),
+        ("quiz_sessions", QuizSession,
+         or_(QuizSession.module_id.in_(modules), QuizSession.enrollment_id.in_(enrollments))),
+        ("quiz_attempts", QuizAttempt,
+         or_(QuizAttempt.module_id.in_(modules), QuizAttempt.enrollment_id.in_(enrollments))),
+        ("progress_events", ProgressEvent,
+         or_(ProgressEvent.module_id.in_(modules), ProgressEvent.enrollment_id.in_(enrollments))),
+        ("module_progress", ModuleProgress,
+         or_(ModuleProgress.module_id.in_(modules), ModuleProgress.enrollment_id.in_(enrollments))),
+        ("quiz_configs", QuizConfig, QuizConfig.module_id.in_(modules)),
+        ("content_items", ContentItem, ContentItem.module_id.in_(modules)),
+        ("evidence_items", EvidenceItem,
+         or_(EvidenceItem.course_id == course_id, EvidenceItem.module_id.in_(modules))),
+        ("enrollment_summaries", EnrollmentSummary, EnrollmentSummary.course_id == course_id),
+        ("enrollments", Enrollment, Enrollment.course_id == course_id),
+        ("modules", CurriculumModule, CurriculumModule.course_id == course_id),
+        ("course", Course, Course.id == course_id),
+    ]
+
+
+class PurgeJob:
+    """Progress of one course purge on this worker"""
+
+    def __init__(self, course_id: int, shard: str):
+        self.course_id = course_id
+        self.shard = shard
+        self.status = QUEUED
+        self.step: Optional[str] = None
+        self.total_rows = 0
+        self.deleted_rows = 0
+        self.steps: Dict[str, Dict[str, int]] = {}
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def percent(self) -> float:
+        if self.status == COMPLETED:
+            return 100.0
+        if not self.total_rows:
+            return 0.0
+        # Rows written after the counts were taken can push deleted past total
+        return min(99.9, round(100 * self.deleted_rows / self.total_rows, 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "course_id": self.course_id,
+            "shard": self.shard,
+            "status": self.status,
+            "step": self.step,
+            "deleted_rows": self.deleted_rows,
+            "total_rows": self.total_rows,
+            "percent": self.percent,
+            "steps": self.steps,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class CoursePurgeService:
+    """
+    Hard deletion of archived courses
+
+    Archiving (status = "Archived") is the normal way to retire a course:
+    it is instant, reversible and hides the course from school course lists
+    (see models.course.live_course). Purging removes an archived course and
+    everything hanging off it - modules, content, questions and options,
+    quiz configs, sessions and attempts, enrollments and their progress
+    snapshots and events, evidence - with set-based DELETEs in foreign-key
+    order.
+
+    Each step deletes PURGE_BATCH_SIZE rows per statement and commits after
+    every batch, so no lock is held for long and replicas keep up. Purges
+    run as background tasks on the worker that started them; the job is
+    idempotent, so a purge interrupted by a restart is resumed by starting
+    it again.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[Tuple[str, int], PurgeJob] = {}
+
+    def get_job(self, course_id: int, shard: str = DEFAULT_SHARD) -> Optional[PurgeJob]:
+        return self._jobs.get((shard, course_id))
+
+    def start(self, course: Course, shard: str = DEFAULT_SHARD) -> PurgeJob:
+        """
+        Start purging an archived course in the background
+
+        Returns the running job if one already exists for the course.
+
+        Raises:
+            CoursePurgeError: If the course is not archived
+        """
+        job = self.get_job(course.id, shard)
+        if job is not None and job.status in (QUEUED, RUNNING):
+            return job
+        if course.status != ARCHIVED:
+            raise CoursePurgeError("Archive the course before purging it")
+
+        job = PurgeJob(course.id, shard)
+        self._jobs[(shard, course.id)] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: PurgeJob) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        try:
+            async with shard_router.session(job.shard) as db:
+                await self.purge(db, job)
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            logger.exception("Purge of course %s on shard %s failed", job.course_id, job.shard)
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.step = None
+            job.finished_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    async def purge(db: AsyncSession, job: PurgeJob) -> None:
+        """Delete the course's rows step by step, committing every batch"""
+        course_id = job.course_id
+        steps = _purge_steps(course_id)
+
+        result = await db.execute(select(Course.status).where(Course.id == course_id))
+        if result.scalar_one_or_none() not in (ARCHIVED, None):
+            raise CoursePurgeError("Course was restored before the purge started")
+
+        result = await db.execute(select(CurriculumModule.id).where(CurriculumModule.course_id == course_id))
+        module_ids = result.scalars().all()
+
+        # Row counts up front give the job a meaningful percentage
+        for name, model, condition in steps:
+            result = await db.execute(select(func.count()).select_from(model).where(condition))
+            job.steps[name] = {"total": result.scalar() or 0, "deleted": 0}
+        job.total_rows = sum(step["total"] for step in job.steps.values())
+        await db.commit()
+
+        for name, model, condition in steps:
+            job.step = name
+            batch = select(model.id).where(condition).limit(PURGE_BATCH_SIZE).scalar_subquery()
+            while True:
+                result = await db.execute(
+                    delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+                )
+                if model is Course:
+                    # Cached quizzes and retrieval indexes go with the last batch
+                    for module_id in module_ids:
+                        await notify(db, QUIZ_BANK_CHANNEL, str(module_id))
+                    await notify(db, RETRIEVAL_CHANNEL, f"{course_id}:{os.getpid()}")
+                await db.commit()
+
+                job.steps[name]["deleted"] += result.rowcount
+                job.deleted_rows += result.rowcount
+                if result.rowcount < PURGE_BATCH_SIZE:
+                    break
+                await asyncio.sleep(PURGE_BATCH_PAUSE_SECONDS)
+
+        for module_id in module_ids:
+            quiz_variant_pool.invalidate(module_id)
+        retrieval_service.invalidate(course_id)
+
+
+# Singleton instance
+course_purge_service = CoursePurgeService()
@@ -0,0 +1,120 @@
+"""
+Course Snapshot Service - Cached, precompressed course outlines
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.compression import PrecompressedPayload
+from core.responses import dumps
+from db.shards import shard_of
+from models.course import Course
+from models.curriculum_module import CurriculumModule
+from models.content_item import ContentItem
+from typing import Dict, Optional, Tuple
+import asyncio
+
+# Channel carrying the course_id whose own fields changed; content changes arrive on RETRIEVAL_CHANNEL
+COURSE_CHANNEL = "course_changed"
+
+
+class CourseSnapshotService:
+    """
+    Keeps one encoded outline per course: the course, its modules in order
+    and their active content items
+
+    The outline is the same for every student, so it is built once per
+    worker, serialized once and compressed once per encoding. Its ETag lets
+    clients skip the download entirely while the course is unchanged. Any
+    write to the course, its modules or content drops the snapshot on every
+    worker (COURSE_CHANNEL, RETRIEVAL_CHANNEL).
+    """
+
+    def __init__(self):
+        # Keyed by (shard, course_id); course ids repeat across shards
+        self._snapshots: Dict[Tuple[str, int], PrecompressedPayload] = {}
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+    async def get(self, db: AsyncSession, course_id: int) -> Optional[PrecompressedPayload]:
+        """Outline snapshot of a course, or None if it does not exist"""
+        key = (shard_of(db), course_id)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                outline = await self._load_outline(db, course_id)
+                if outline is None:
+                    return None
+                snapshot = self._snapshots[key] = PrecompressedPayload(dumps(outline))
+        return snapshot
+
+    def invalidate(self, course_id: int) -> None:
+        """Drop a course's snapshot on every shard; the next request rebuilds it"""
+        for key in [key for key in self._snapshots if key[1] == course_id]:
+            self._snapshots.pop(key, None)
+
+    async def handle_course_changed(self, payload: Optional[str]) -> None:
+        """Notification handler for COURSE_CHANNEL and RETRIEVAL_CHANNEL ("course_id[:pid]")"""
+        if not payload:
+            self._snapshots.clear()
+            return
+        # Unlike the retrieval index, the writer's own snapshot is not patched in place
+        self.invalidate(int(payload.partition(":")[0]))
+
+    @staticmethod
+    async def _load_outline(db: AsyncSession, course_id: int) -> Optional[Dict]:
+        result = await db.execute(select(Course).where(Course.id == course_id))
+        course = result.scalar_one_or_none()
+        if course is None:
+            return None
+
+        result = await db.execute(
+            select(CurriculumModule)
+            .where(CurriculumModule.course_id == course_id)
+            .order_by(CurriculumModule.module_order)
+        )
+        modules = result.scalars().all()
+
+        result = await db.execute(
+            select(ContentItem)
+            .where(
+                ContentItem.module_id.in_([module.id for module in modules]),
+                ContentItem.active_flag == True
+            )
+            .order_by(ContentItem.id)
+        )
+        content_by_module: Dict[int, list] = {}
+        for item in result.scalars().all():
+            content_by_module.setdefault(item.module_id, []).append({
+                "id": item.id,
+                "type": item.type.value,
+                "title": item.title,
+                "description": item.description,
+                "url_or_path": item.url_or_path,
+                "duration_seconds": item.duration_seconds
+            })
+
+        return {
+            "id": course.id,
+            "title": course.title,
+            "description": course.description,
+            "subject": course.subject,
+            "level": course.level,
+            "modules": [
+                {
+                    "id": module.id,
+                    "title": module.title,
+                    "description": module.description,
+                    "order": module.module_order,
+                    "estimated_duration_minutes": module.estimated_duration_minutes,
+                    "content_items": content_by_module.get(module.id, [])
+                }
+                for module in modules
+            ]
+        }
+
+
+# Singleton instance
+course_snapshot_service = CourseSnapshotService()
@@ -0,0 +1,372 @@
+"""
+Enrollment Summary Service - Maintains the EnrollmentSummary read model
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, bindparam, func, case, literal, or_, Float, Integer, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.class_section import ClassSection
+from models.course import Course, live_course
+from models.enrollment import Enrollment, EnrollmentStatus
+from models.enrollment_summary import EnrollmentSummary
+from models.module_progress import ModuleProgress, ProgressStatus
+from models.quiz_attempt import QuizAttempt
+from models.student_profile import StudentProfile
+from models.user import User
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+# A student is at risk in a course below this completion or after this long without activity
+AT_RISK_COMPLETION_PERCENT = 50.0
+AT_RISK_INACTIVE_DAYS = 14
+
+SUMMARY_COLUMNS = [
+    "enrollment_id", "student_id", "course_id",
+    "modules_started", "modules_completed", "progress_total", "current_module_id", "last_activity_at",
+    "quiz_attempts", "quiz_score_total", "best_quiz_score",
+]
+
+
+def average_completion():
+    """Aggregate: completion over a group of summaries, weighted by modules started"""
+    return func.coalesce(
+        func.sum(EnrollmentSummary.progress_total) / func.nullif(func.sum(EnrollmentSummary.modules_started), 0),
+        0.0
+    )
+
+
+def average_quiz_score():
+    """Aggregate: mean score over every quiz attempt in a group of summaries"""
+    return func.coalesce(
+        func.sum(EnrollmentSummary.quiz_score_total) / func.nullif(func.sum(EnrollmentSummary.quiz_attempts), 0),
+        0.0
+    )
+
+
+class EnrollmentSummaryService:
+    """
+    Keeps one EnrollmentSummary row per enrollment in step with its
+    ModuleProgress and QuizAttempt rows
+
+    Write paths report what changed (a module started, progress gained, a
+    module completed, a quiz attempt scored) and the summary is adjusted by
+    a single upsert in the caller's transaction, so it commits or rolls back
+    with the write itself. Views read the summary instead of aggregating
+    progress and attempts per request. rebuild() recomputes summaries from
+    the source tables, e.g. after bulk loads.
+    """
+
+    @staticmethod
+    async def record(
+        db: AsyncSession,
+        enrollment_id: int,
+        module_id: Optional[int] = None,
+        modules_started: int = 0,
+        modules_completed: int = 0,
+        progress_delta: float = 0.0,
+        quiz_score: Optional[float] = None
+    ) -> None:
+        """
+        Apply deltas to an enrollment's summary, creating it on first activity
+
+        module_id, when given, becomes the current module (the one whose
+        content the student worked on last).
+        """
+        source = select(
+            Enrollment.id,
+            Enrollment.student_id,
+            Enrollment.course_id,
+            literal(modules_started, Integer),
+            literal(modules_completed, Integer),
+            literal(progress_delta, Float),
+            literal(module_id, Integer),
+            func.now(),
+            literal(0 if quiz_score is None else 1, Integer),
+            literal(quiz_score or 0.0, Float),
+            literal(quiz_score, Float),
+        ).where(Enrollment.id == enrollment_id)
+
+        stmt = pg_insert(EnrollmentSummary).from_select(SUMMARY_COLUMNS, source)
+        summary = EnrollmentSummary.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["enrollment_id"],
+            set_={
+                "modules_started": summary.modules_started + stmt.excluded.modules_started,
+                "modules_completed": summary.modules_completed + stmt.excluded.modules_completed,
+                "progress_total": summary.progress_total + stmt.excluded.progress_total,
+                "current_module_id": func.coalesce(stmt.excluded.current_module_id, summary.current_module_id),
+                "last_activity_at": stmt.excluded.last_activity_at,
+                "quiz_attempts": summary.quiz_attempts + stmt.excluded.quiz_attempts,
+                "quiz_score_total": summary.quiz_score_total + stmt.excluded.quiz_score_total,
+                # greatest() skips NULLs, so the first score replaces "no attempts yet"
+                "best_quiz_score": func.greatest(summary.best_quiz_score, stmt.excluded.best_quiz_score),
+                "updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def record_progress(
+        db: AsyncSession,
+        enrollment_id: int,
+        module_id: int,
+        progress_delta: float,
+        started: bool = False
+    ) -> None:
+        """Content progress changed; started=True when the ModuleProgress row is new"""
+        await EnrollmentSummaryService.record(
+            db, enrollment_id, module_id, modules_started=int(started), progress_delta=progress_delta
+        )
+
+    @staticmethod
+    async def record_compacted_progress(db: AsyncSession, changes: List[Dict]) -> None:
+        """
+        Apply progress folded in by the progress log compactor, one
+        executemany for the whole batch
+
+        changes: {"enrollment_id", "progress_delta", "module_id", "at"} per
+        enrollment, sorted by enrollment_id so concurrent batches lock rows
+        in the same order. module_id becomes the current module unless the
+        summary already saw later activity.
+        """
+        summary = EnrollmentSummary.__table__.c
+        at = bindparam("at", type_=DateTime(timezone=True))
+        stmt = (
+            update(EnrollmentSummary.__table__)
+            .where(summary.enrollment_id == bindparam("b_enrollment_id"))
+            .values(
+                progress_total=summary.progress_total + bindparam("progress_delta", type_=Float),
+                current_module_id=case(
+                    (or_(summary.last_activity_at.is_(None), summary.last_activity_at <= at), bindparam("module_id")),
+                    else_=summary.current_module_id
+                ),
+                last_activity_at=func.greatest(summary.last_activity_at, at),
+                updated_at=func.now()
+            )
+        )
+        await db.execute(stmt, [
+            {
+                "b_enrollment_id": change["enrollment_id"],
+                "progress_delta": change["progress_delta"],
+                "module_id": change["module_id"],
+                "at": change["at"],
+            }
+            for change in changes
+        ])
+
+    @staticmethod
+    async def rebuild(
+        db: AsyncSession,
+        course_id: Optional[int] = None,
+        batch_size: int = 5000
+    ) -> int:
+        """
+        Recompute summaries from ModuleProgress and QuizAttempt
+
+        Runs in enrollment id ranges of batch_size, committing each, so it
+        can cover large tables without one long transaction. Meant for
+        offline use: a write that commits while its batch runs can be
+        overwritten by the recomputed row.
+
+        Returns:
+            Number of summaries written
+        """
+        bounds = select(func.min(Enrollment.id), func.max(Enrollment.id))
+        if course_id is not None:
+            bounds = bounds.where(Enrollment.course_id == course_id)
+        first_id, last_id = (await db.execute(bounds)).one()
+        if first_id is None:
+            return 0
+
+        written = 0
+        for low in range(first_id, last_id + 1, batch_size):
+            high = low + batch_size - 1
+            result = await db.execute(EnrollmentSummaryService._rebuild_statement(low, high, course_id))
+            written += result.rowcount
+            await db.commit()
+        return written
+
+    @staticmethod
+    def _rebuild_statement(low: int, high: int, course_id: Optional[int]):
+        progress = (
+            select(
+                ModuleProgress.enrollment_id,
+                func.count().label("started"),
+                func.sum(case((ModuleProgress.status == ProgressStatus.COMPLETED, 1), else_=0)).label("completed"),
+                func.sum(func.coalesce(ModuleProgress.completion_percent, 0.0)).label("total"),
+                func.max(func.coalesce(ModuleProgress.last_access_time, ModuleProgress.created_at)).label("last_at"),
+            )
+            .where(ModuleProgress.enrollment_id.between(low, high))
+            .group_by(ModuleProgress.enrollment_id)
+            .subquery()
+        )
+        attempts = (
+            select(
+                QuizAttempt.enrollment_id,
+                func.count().label("attempts"),
+                func.sum(QuizAttempt.score_percent).label("score_total"),
+                func.max(QuizAttempt.score_percent).label("best"),
+                func.max(QuizAttempt.attempt_datetime).label("last_at"),
+            )
+            .where(QuizAttempt.enrollment_id.between(low, high))
+            .group_by(QuizAttempt.enrollment_id)
+            .subquery()
+        )
+        current_module = (
+            select(ModuleProgress.module_id)
+            .where(ModuleProgress.enrollment_id == Enrollment.id)
+            .order_by(
+                func.coalesce(ModuleProgress.last_access_time, ModuleProgress.created_at).desc(),
+                ModuleProgress.id.desc()
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        source = (
+            select(
+                Enrollment.id,
+                Enrollment.student_id,
+                Enrollment.course_id,
+                func.coalesce(progress.c.started, 0),
+                func.coalesce(progress.c.completed, 0),
+                func.coalesce(progress.c.total, 0.0),
+                current_module,
+                func.greatest(progress.c.last_at, attempts.c.last_at),
+                func.coalesce(attempts.c.attempts, 0),
+                func.coalesce(attempts.c.score_total, 0.0),
+                attempts.c.best,
+            )
+            .outerjoin(progress, progress.c.enrollment_id == Enrollment.id)
+            .outerjoin(attempts, attempts.c.enrollment_id == Enrollment.id)
+            .where(Enrollment.id.between(low, high))
+        )
+        if course_id is not None:
+            source = source.where(Enrollment.course_id == course_id)
+
+        stmt = pg_insert(EnrollmentSummary).from_select(SUMMARY_COLUMNS, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["enrollment_id"],
+            set_={
+                **{name: stmt.excluded[name] for name in SUMMARY_COLUMNS if name != "enrollment_id"},
+                "updated_at": func.now()
+            }
+        )
+        return stmt
+
+    # Views
+
+    @staticmethod
+    async def school_averages(db: AsyncSession, school_id: int) -> Tuple[float, float]:
+        """(average completion, average quiz score) over a school's live courses"""
+        result = await db.execute(
+            select(average_completion(), average_quiz_score())
+            .select_from(EnrollmentSummary)
+            .join(Course, Course.id == EnrollmentSummary.course_id)
+            .where(Course.school_id == school_id, live_course())
+        )
+        return result.one()
+
+    @staticmethod
+    async def course_overview(db: AsyncSession, school_id: int) -> List[Tuple[Course, int, float]]:
+        """A school's live courses with (course, enrolled students, average completion)"""
+        result = await db.execute(
+            select(Course, func.count(Enrollment.id), average_completion())
+            .outerjoin(Enrollment, Enrollment.course_id == Course.id)
+            .outerjoin(EnrollmentSummary, EnrollmentSummary.enrollment_id == Enrollment.id)
+            .where(Course.school_id == school_id, live_course())
+            .group_by(Course.id)
+            .order_by(Course.id)
+        )
+        return result.all()
+
+    @staticmethod
+    async def course_students(db: AsyncSession, course_id: int) -> List[Tuple[User, Enrollment, Optional[EnrollmentSummary]]]:
+        """Students enrolled in a course with their summaries (None before any activity)"""
+        result = await db.execute(
+            select(User, Enrollment, EnrollmentSummary)
+            .join(StudentProfile, StudentProfile.user_id == User.id)
+            .join(Enrollment, Enrollment.student_id == StudentProfile.id)
+            .outerjoin(EnrollmentSummary, EnrollmentSummary.enrollment_id == Enrollment.id)
+            .where(Enrollment.course_id == course_id)
+            .order_by(User.name)
+        )
+        return result.all()
+
+    @staticmethod
+    async def at_risk(db: AsyncSession, school_id: int, limit: int = 20):
+        """
+        Active enrollments in a school's live courses that are behind or idle
+
+        Returns:
+            (user_id, name, course_title, completion_percent, quiz_attempts,
+            last_activity_at) rows, least complete first
+        """
+        completion = func.coalesce(EnrollmentSummary.completion_percent, 0.0)
+        inactive_since = datetime.now(timezone.utc) - timedelta(days=AT_RISK_INACTIVE_DAYS)
+        result = await db.execute(
+            select(
+                User.id,
+                User.name,
+                Course.title,
+                completion,
+                func.coalesce(EnrollmentSummary.quiz_attempts, 0),
+                EnrollmentSummary.last_activity_at
+            )
+            .select_from(Enrollment)
+            .join(Course, Course.id == Enrollment.course_id)
+            .join(StudentProfile, StudentProfile.id == Enrollment.student_id)
+            .join(User, User.id == StudentProfile.user_id)
+            .outerjoin(EnrollmentSummary, EnrollmentSummary.enrollment_id == Enrollment.id)
+            .where(
+                Course.school_id == school_id,
+                live_course(),
+                Enrollment.status == EnrollmentStatus.ACTIVE,
+                or_(
+                    completion < AT_RISK_COMPLETION_PERCENT,
+                    EnrollmentSummary.last_activity_at.is_(None),
+                    EnrollmentSummary.last_activity_at < inactive_since
+                )
+            )
+            .order_by(completion, EnrollmentSummary.last_activity_at.asc().nulls_first(), Enrollment.id)
+            .limit(limit)
+        )
+        return result.all()
+
+    @staticmethod
+    async def completion_by_grade(db: AsyncSession, school_id: int) -> List[Tuple[str, float]]:
+        """(grade level, average completion) for a school's students"""
+        result = await db.execute(
+            select(ClassSection.grade_level, average_completion())
+            .select_from(EnrollmentSummary)
+            .join(StudentProfile, StudentProfile.id == EnrollmentSummary.student_id)
+            .join(ClassSection, ClassSection.id == StudentProfile.class_section_id)
+            .where(ClassSection.school_id == school_id)
+            .group_by(ClassSection.grade_level)
+            .order_by(ClassSection.grade_level)
+        )
+        return result.all()
+
+    @staticmethod
+    async def top_students(db: AsyncSession, school_id: int, limit: int = 5) -> List[Tuple[int, str, float]]:
+        """
+        A school's best students as (user_id, name, performance index)
+
+        The index is the mean of a student's completion and quiz average
+        across their courses.
+        """
+        performance = (average_completion() + average_quiz_score()) / 2
+        result = await db.execute(
+            select(User.id, User.name, performance)
+            .select_from(EnrollmentSummary)
+            .join(StudentProfile, StudentProfile.id == EnrollmentSummary.student_id)
+            .join(User, User.id == StudentProfile.user_id)
+            .where(User.school_id == school_id)
+            .group_by(User.id, User.name)
+            .order_by(performance.desc(), User.id)
+            .limit(limit)
+        )
+        return result.all()
+
+
+# Singleton instance
+enrollment_summary_service = EnrollmentSummaryService()
@@ -0,0 +1,281 @@
+"""
+Idempotency Service - Replays the stored response of a retried write
+"""
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.config import settings
+from db.shards import shard_router
+from models.idempotency_key import IdempotencyKey
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+KEY_TTL = timedelta(hours=24)  # Retries after this run again
+PURGE_INTERVAL_SECONDS = 3600
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def request_hash(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query_string, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """
+    Idempotency keys for write endpoints
+
+    A client that may retry a write (flaky mobile connections, double taps)
+    sends the same Idempotency-Key header with every try. The first request
+    claims the key and runs; its response is stored with the key for
+    KEY_TTL. Retries get the stored response back without running the
+    endpoint again, so a resubmitted quiz is scored, counted and credited
+    once. A retry that arrives while the first request is still running
+    gets 409 and should retry shortly. Failures (5xx or an exception)
+    release the key, so the write can be retried for real.
+    """
+
+    def __init__(self):
+        self._worker: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def claim(
+        db: AsyncSession,
+        owner: str,
+        key: str,
+        fingerprint: str
+    ) -> Optional[IdempotencyKey]:
+        """
+        Claim a key for a new request
+
+        Returns:
+            None if the key was free (or expired) and is now claimed,
+            otherwise the existing record
+        """
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(IdempotencyKey).values(
+            owner=owner, key=key, request_hash=fingerprint, expires_at=now + KEY_TTL
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["owner", "key"],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "status_code": None,
+                "content_type": None,
+                "response_body": None,
+                "created_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= now
+        ).returning(IdempotencyKey.id)
+        result = await db.execute(stmt)
+        claimed = result.scalar_one_or_none() is not None
+
+        record = None
+        if not claimed:
+            result = await db.execute(
+                select(IdempotencyKey).where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+            )
+            record = result.scalar_one()
+        await db.commit()
+        return record
+
+    @staticmethod
+    async def complete(
+        db: AsyncSession,
+        owner: str,
+        key: str,
+        status_code: int,
+        content_type: Optional[str],
+        body: bytes
+    ) -> None:
+        """Store the response of the request that claimed a key"""
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+            .values(status_code=status_code, content_type=content_type, response_body=body)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def release(db: AsyncSession, owner: str, key: str) -> None:
+        """Free a claimed key whose request failed"""
+        await db.execute(
+            delete(IdempotencyKey)
+            .where(
+                IdempotencyKey.owner == owner,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def purge_expired(db: AsyncSession) -> int:
+        """Delete expired keys; returns rows removed"""
+        result = await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc))
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def replay(record: IdempotencyKey, fingerprint: str) -> Response:
+        """Response to a request whose key is already taken"""
+        if record.request_hash != fingerprint:
+            return JSONResponse(
+                status_code=422,
+                content={"detail": f"{IDEMPOTENCY_KEY_HEADER} was already used for a different request"}
+            )
+        if record.status_code is None:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this key is still being processed"},
+                headers={"Retry-After": "1"}
+            )
+        return Response(
+            content=record.response_body,
+            status_code=record.status_code,
+            media_type=record.content_type,
+            headers={REPLAYED_HEADER: "true"}
+        )
+
+    async def start(self) -> None:
+        """Start the background purge of expired keys"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(PURGE_INTERVAL_SECONDS)
+            for shard in shard_router.shards:
+                try:
+                    async with shard_router.session(shard) as db:
+                        await self.purge_expired(db)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Idempotency key purge failed on shard %s", shard)
+
+
+class IdempotencyMiddleware:
+    """
+    Applies IdempotencyService to API writes that carry an Idempotency-Key
+
+    Keys are stored on the shard of the request, next to the rows the write
+    touches, and scoped to the caller's email parameter. Keyed writes without
+    one are rejected, so anonymous callers never share a key space.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get(IDEMPOTENCY_KEY_HEADER)
+        if key is None or not scope["path"].startswith(settings.API_V1_STR):
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}
+            )
+            await response(scope, receive, send)
+            return
+        request = Request(scope)
+        owner = request.query_params.get("email")
+        if not owner:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"{IDEMPOTENCY_KEY_HEADER} requires the caller's email parameter"}
+            )
+            await response(scope, receive, send)
+            return
+
+        # The body is part of the fingerprint, so read it up front and hand it on
+        chunks: List[bytes] = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        fingerprint = request_hash(scope["method"], scope["path"], scope.get("query_string", b""), body)
+        shard = await shard_router.shard_for_request(request)
+
+        async with shard_router.session(shard) as db:
+            record = await idempotency_service.claim(db, owner, key, fingerprint)
+        if record is not None:
+            await IdempotencyService.replay(record, fingerprint)(scope, receive_body, send)
+            return
+
+        status: Optional[int] = None
+        content_type: Optional[str] = None
+        response_chunks: List[bytes] = []
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal status, content_type
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_capture)
+        except BaseException:
+            async with shard_router.session(shard) as db:
+                await idempotency_service.release(db, owner, key)
+            raise
+
+        async with shard_router.session(shard) as db:
+            if status is not None and status < 500:
+                await idempotency_service.complete(db, owner, key, status, content_type, b"".join(response_chunks))
+            else:
+                await idempotency_service.release(db, owner, key)
+
+
+# Singleton instance
+idempotency_service = IdempotencyService()
@@ -0,0 +1,136 @@
+"""
+Live Progress - Pushes student progress and quiz attempts to teacher views
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.notify import notify
+from db.shards import shard_of, DEFAULT_SHARD
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+import asyncio
+import json
+
+# Channel carrying committed progress events between workers
+LIVE_PROGRESS_CHANNEL = "live_progress"
+
+PROGRESS_EVENT = "progress"
+QUIZ_ATTEMPT_EVENT = "quiz_attempt"
+RESYNC_EVENT = "resync"  # Client should refetch the roster; events were lost
+
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+CLIENT_RETRY_MS = 3000
+
+
+class _Subscriber:
+    __slots__ = ("section_id", "queue", "lagged")
+
+    def __init__(self, section_id: Optional[int]):
+        self.section_id = section_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.lagged = False
+
+
+class LiveProgressHub:
+    """
+    In-process pub/sub of class progress, keyed by shard and course
+
+    Write paths call publish() inside their transaction; the event travels
+    as a Postgres NOTIFY, so it is only seen once the write commits and it
+    reaches teachers connected to any worker. Each worker's listener hands
+    events to handle_notification(), which fans them out to the local
+    subscribers of that course (optionally narrowed to one class section)
+    without touching the database.
+
+    A subscriber that falls SUBSCRIBER_QUEUE_SIZE events behind, or any
+    subscriber after the listener reconnects, gets a resync event instead
+    of a silent gap.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[Tuple[str, int], Set[_Subscriber]] = {}
+
+    @staticmethod
+    async def publish(
+        db: AsyncSession,
+        course_id: int,
+        section_id: int,
+        event: str,
+        data: Dict[str, Any]
+    ) -> None:
+        """Queue an event for delivery when the current transaction commits"""
+        payload = json.dumps({
+            "shard": shard_of(db), "course_id": course_id, "section_id": section_id, "event": event, "data": data
+        })
+        await notify(db, LIVE_PROGRESS_CHANNEL, payload)
+
+    async def handle_notification(self, payload: Optional[str]) -> None:
+        """Listener callback; None means notifications may have been missed"""
+        if payload is None:
+            for subscribers in self._subscribers.values():
+                for subscriber in subscribers:
+                    subscriber.lagged = True
+                    try:
+                        subscriber.queue.put_nowait(None)  # Wake the stream to send the resync
+                    except asyncio.QueueFull:
+                        pass
+            return
+
+        message = json.loads(payload)
+        key = (message.get("shard", DEFAULT_SHARD), message["course_id"])
+        for subscriber in self._subscribers.get(key, ()):
+            if subscriber.section_id is not None and subscriber.section_id != message["section_id"]:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber.lagged = True
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        course_id: int,
+        section_id: Optional[int] = None,
+        shard: str = DEFAULT_SHARD
+    ) -> AsyncIterator[_Subscriber]:
+        key = (shard, course_id)
+        subscriber = _Subscriber(section_id)
+        self._subscribers.setdefault(key, set()).add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    async def stream(
+        self,
+        course_id: int,
+        section_id: Optional[int] = None,
+        shard: str = DEFAULT_SHARD
+    ) -> AsyncIterator[str]:
+        """Server-sent event frames for a course until the client disconnects"""
+        async with self.subscribe(course_id, section_id, shard) as subscriber:
+            yield f"retry: {CLIENT_RETRY_MS}\n" + _frame("ready", {"course_id": course_id, "section_id": section_id})
+            while True:
+                if subscriber.lagged:
+                    subscriber.lagged = False
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    yield _frame(RESYNC_EVENT, {"course_id": course_id})
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"  # Keeps proxies from closing an idle stream
+                    continue
+                if message is None:
+                    continue
+                yield _frame(message["event"], {**message["data"], "section_id": message["section_id"]})
+
+
+def _frame(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+live_progress = LiveProgressHub()
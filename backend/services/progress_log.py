@@ -0,0 +1,274 @@
+"""
+Progress Log - Append-only content progress events, compacted into ModuleProgress
+"""
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from db.shards import shard_router
+from models.curriculum_module import CurriculumModule
+from models.module_progress import ModuleProgress, ProgressStatus
+from models.progress_event import ProgressEvent
+from services.enrollment_summary_service import enrollment_summary_service
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRACK_SOURCE = "track"
+
+COMPACTION_INTERVAL_SECONDS = 30  # Snapshot staleness for progress between milestones
+COMPACTION_BATCH_SIZE = 5000  # Events folded per transaction
+
+
+class ProgressLogService:
+    """
+    Content progress as an event log with ModuleProgress as its snapshot
+
+    Every progress report appends a ProgressEvent; nothing is read-modify-
+    written on the hot ModuleProgress row. Reports that change what other
+    code reads - a module's first progress, leaving NotStarted, reaching
+    100% (which the quiz gate checks) - are applied to the snapshot in the
+    same transaction. Everything in between is folded in by the background
+    compactor every COMPACTION_INTERVAL_SECONDS: max percent and latest
+    time per (enrollment, module), one bulk UPDATE per batch, summaries
+    adjusted to match.
+
+    Reads keep using ModuleProgress. Events stay after compaction so that
+    analytics can replay them by time range (see replay).
+    """
+
+    def __init__(self):
+        self._worker: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def track(
+        db: AsyncSession,
+        enrollment_id: int,
+        module_id: int,
+        percent: float,
+        source: str = TRACK_SOURCE
+    ) -> Tuple[float, ProgressStatus, bool]:
+        """
+        Record a progress report
+
+        Returns:
+            (completion_percent, status, changed): the progress as of this
+            report and whether it moved past the snapshot. The snapshot
+            itself may lag until the next compaction.
+        """
+        percent = min(percent, 100.0)
+        result = await db.execute(
+            select(ModuleProgress).where(
+                ModuleProgress.enrollment_id == enrollment_id,
+                ModuleProgress.module_id == module_id
+            )
+        )
+        progress = result.scalar_one_or_none()
+
+        event = ProgressEvent(
+            enrollment_id=enrollment_id,
+            module_id=module_id,
+            completion_percent=percent,
+            source=source
+        )
+
+        if progress is None:
+            event.compacted_at = func.now()  # Applied to the snapshot right here
+            db.add(event)
+            db.add(ModuleProgress(
+                enrollment_id=enrollment_id,
+                module_id=module_id,
+                completion_percent=percent,
+                status=ProgressStatus.IN_PROGRESS
+            ))
+            await enrollment_summary_service.record_progress(db, enrollment_id, module_id, percent, started=True)
+            return percent, ProgressStatus.IN_PROGRESS, True
+
+        snapshot = progress.completion_percent or 0.0
+        milestone = (
+            progress.status == ProgressStatus.NOT_STARTED
+            or (percent >= 100.0 and snapshot < 100.0)
+        )
+        if not milestone:
+            db.add(event)
+            return max(snapshot, percent), progress.status, percent > snapshot
+
+        event.compacted_at = func.now()
+        db.add(event)
+        # Re-read under lock: the compactor may have moved the snapshot since
+        await db.refresh(progress, with_for_update=True)
+        previous = (progress.completion_percent or 0.0, progress.status)
+        progress.completion_percent = max(previous[0], percent)
+        if progress.status == ProgressStatus.NOT_STARTED:
+            progress.status = ProgressStatus.IN_PROGRESS
+        await enrollment_summary_service.record_progress(
+            db, enrollment_id, module_id, progress.completion_percent - previous[0]
+        )
+        return progress.completion_percent, progress.status, (progress.completion_percent, progress.status) != previous
+
+    @staticmethod
+    async def compact_batch(db: AsyncSession, batch_size: int = COMPACTION_BATCH_SIZE) -> int:
+        """
+        Fold the oldest pending events into their snapshots and commit
+
+        SKIP LOCKED lets several workers compact the same shard without
+        waiting on each other. Returns the number of events compacted.
+        """
+        result = await db.execute(
+            select(
+                ProgressEvent.id,
+                ProgressEvent.enrollment_id,
+                ProgressEvent.module_id,
+                ProgressEvent.completion_percent,
+                ProgressEvent.created_at
+            )
+            .where(ProgressEvent.compacted_at.is_(None))
+            .order_by(ProgressEvent.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        events = result.all()
+        if not events:
+            await db.commit()
+            return 0
+
+        folded: Dict[Tuple[int, int], List] = {}  # (enrollment, module) -> [max percent, latest time]
+        for _, enrollment_id, module_id, percent, created_at in events:
+            entry = folded.get((enrollment_id, module_id))
+            if entry is None:
+                folded[(enrollment_id, module_id)] = [percent, created_at]
+            else:
+                entry[0] = max(entry[0], percent)
+                entry[1] = max(entry[1], created_at)
+
+        # Lock in id order, as every compactor does, so overlapping batches cannot deadlock
+        result = await db.execute(
+            select(
+                ModuleProgress.id,
+                ModuleProgress.enrollment_id,
+                ModuleProgress.module_id,
+                ModuleProgress.completion_percent,
+                ModuleProgress.last_access_time
+            )
+            .where(tuple_(ModuleProgress.enrollment_id, ModuleProgress.module_id).in_(list(folded)))
+            .order_by(ModuleProgress.id)
+            .with_for_update()
+        )
+
+        snapshots = []
+        summaries: Dict[int, Dict] = {}
+        for progress_id, enrollment_id, module_id, current, last_access_time in result.all():
+            percent, at = folded[(enrollment_id, module_id)]
+            current = current or 0.0
+            percent = max(current, percent)
+            if last_access_time is not None and last_access_time > at:
+                at = last_access_time
+            snapshots.append({"id": progress_id, "completion_percent": percent, "last_access_time": at})
+
+            summary = summaries.setdefault(
+                enrollment_id,
+                {"enrollment_id": enrollment_id, "progress_delta": 0.0, "module_id": module_id, "at": at}
+            )
+            summary["progress_delta"] += percent - current
+            if at > summary["at"]:
+                summary["module_id"], summary["at"] = module_id, at
+        # Events whose snapshot is gone (purged enrollments) are just marked compacted
+
+        if snapshots:
+            await db.execute(update(ModuleProgress), snapshots)
+            await enrollment_summary_service.record_compacted_progress(
+                db, sorted(summaries.values(), key=lambda summary: summary["enrollment_id"])
+            )
+        await db.execute(
+            update(ProgressEvent)
+            .where(ProgressEvent.id.in_([event.id for event in events]))
+            .values(compacted_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return len(events)
+
+    @staticmethod
+    async def compact(db: AsyncSession, batch_size: int = COMPACTION_BATCH_SIZE) -> int:
+        """Compact pending events batch by batch until the backlog is drained"""
+        total = 0
+        while True:
+            compacted = await ProgressLogService.compact_batch(db, batch_size)
+            total += compacted
+            if compacted < batch_size:
+                return total
+
+    @staticmethod
+    def events_query(
+        since: datetime,
+        until: datetime,
+        course_id: Optional[int] = None,
+        enrollment_id: Optional[int] = None
+    ):
+        """Events in [since, until), optionally for one course or enrollment, in log order"""
+        query = (
+            select(ProgressEvent)
+            .where(ProgressEvent.created_at >= since, ProgressEvent.created_at < until)
+            .order_by(ProgressEvent.id)
+        )
+        if course_id is not None:
+            query = query.where(ProgressEvent.module_id.in_(
+                select(CurriculumModule.id).where(CurriculumModule.course_id == course_id)
+            ))
+        if enrollment_id is not None:
+            query = query.where(ProgressEvent.enrollment_id == enrollment_id)
+        return query
+
+    @staticmethod
+    async def replay(
+        db: AsyncSession,
+        since: datetime,
+        until: datetime,
+        course_id: Optional[int] = None,
+        enrollment_id: Optional[int] = None
+    ) -> AsyncIterator[ProgressEvent]:
+        """
+        Stream events in a time range, for analytics over long periods
+
+        Rows come through a server-side cursor, so memory stays flat however
+        many events the range holds.
+        """
+        result = await db.stream_scalars(
+            ProgressLogService.events_query(since, until, course_id, enrollment_id)
+            .execution_options(yield_per=1000)
+        )
+        async for event in result:
+            yield event
+
+    async def start(self) -> None:
+        """Start the background compactor"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background compactor; pending events wait for the next start"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(COMPACTION_INTERVAL_SECONDS)
+            for shard in shard_router.shards:
+                try:
+                    async with shard_router.session(shard) as db:
+                        await self.compact(db)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Progress compaction failed on shard %s", shard)
+
+
+# Singleton instance
+progress_log = ProgressLogService()
@@ -2,12 +2,9 @@
 Progression Service - Sequential module unlock logic
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, exists, literal, Integer, Float
 from models.module_progress import ModuleProgress, ProgressStatus
 from models.curriculum_module import CurriculumModule
-from models.quiz_attempt import QuizAttempt
-from models.enrollment import Enrollment
-from services.config_service import config_service
 from typing import List, Dict, Optional
 
 
@@ -96,10 +93,16 @@ class ProgressionService:
         )
         progress_records = {p.module_id: p for p in result.scalars().all()}
         
+        # Same rule as is_module_unlocked, evaluated on the rows already loaded
+        completed_orders = {
+            module.module_order for module in modules
+            if module.id in progress_records
+            and progress_records[module.id].status == ProgressStatus.COMPLETED
+        }
+        
         module_list = []
         for module in modules:
-            # Check if unlocked
-            is_unlocked = await ProgressionService.is_module_unlocked(db, enrollment_id, module.id)
+            is_unlocked = module.module_order == 1 or (module.module_order - 1) in completed_orders
             
             progress = progress_records.get(module.id)
             
@@ -117,117 +120,70 @@ class ProgressionService:
         return module_list
     
     @staticmethod
-    async def check_and_complete_module(
+    async def complete_module(
         db: AsyncSession,
+        progress_id: int,
         enrollment_id: int,
-        module_id: int
-    ) -> bool:
+        module: CurriculumModule
+    ) -> Optional[int]:
         """
-        Check if module can be marked as completed based on:
-        1. Content consumption = 100%
-        2. Latest quiz attempt passed (score >= 100%, completed in time)
+        Mark a module completed and unlock the next one, in the caller's
+        transaction
+        
+        The caller has already decided completion (content at 100% and a
+        passed quiz) from the rows it holds, so nothing is read back here and
+        nothing is committed. Summary deltas are left to the caller too, to
+        be applied in its single EnrollmentSummary upsert.
         
         Returns:
-            True if module was marked as completed, False otherwise
+            ID of the next module if this created its progress row, None otherwise
         """
-        # Get module progress
-        result = await db.execute(
-            select(ModuleProgress).where(
-                ModuleProgress.enrollment_id == enrollment_id,
-                ModuleProgress.module_id == module_id
-            )
-        )
-        progress = result.scalar_one_or_none()
-        
-        if not progress:
-            return False
-            
-        # Check content consumption
-        if progress.completion_percent < 100.0:
-            return False
-            
-        # Get latest quiz attempt
-        result = await db.execute(
-            select(QuizAttempt)
-            .where(
-                QuizAttempt.enrollment_id == enrollment_id,
-                QuizAttempt.module_id == module_id
-            )
-            .order_by(QuizAttempt.attempt_datetime.desc())
-        )
-        latest_attempt = result.first()
-        
-        if not latest_attempt:
-            return False
-            
-        attempt = latest_attempt[0]
-        
-        # Check if passed
-        passed = (
-            attempt.score_percent >= config_service.DEFAULT_PASS_SCORE_PERCENT and
-            attempt.completed_in_time
+        await db.execute(
+            update(ModuleProgress)
+            .where(ModuleProgress.id == progress_id)
+            .values(status=ProgressStatus.COMPLETED)
+            .execution_options(synchronize_session=False)
         )
-        
-        if passed and progress.status != ProgressStatus.COMPLETED:
-            progress.status = ProgressStatus.COMPLETED
-            await db.commit()
-            return True
-            
-        return False
+        return await ProgressionService.unlock_next_module(db, enrollment_id, module)
     
     @staticmethod
     async def unlock_next_module(
         db: AsyncSession,
         enrollment_id: int,
-        current_module_id: int
+        current_module: CurriculumModule
     ) -> Optional[int]:
         """
         Unlock the next module after completing current module
         
+        One INSERT ... SELECT creates the next module's NotStarted progress
+        row unless the course has no next module or the row already exists.
+        Does not commit.
+        
         Returns:
-            ID of next module if it exists and was unlocked, None otherwise
+            ID of next module if its progress row was created, None otherwise
         """
-        # Get current module
-        result = await db.execute(
-            select(CurriculumModule).where(CurriculumModule.id == current_module_id)
-        )
-        current_module = result.scalar_one_or_none()
-        
-        if not current_module:
-            return None
-            
-        # Get next module
-        result = await db.execute(
-            select(CurriculumModule).where(
-                CurriculumModule.course_id == current_module.course_id,
-                CurriculumModule.module_order == current_module.module_order + 1
+        next_module = select(
+            literal(enrollment_id, Integer),
+            CurriculumModule.id,
+            literal(0.0, Float),
+            literal(ProgressStatus.NOT_STARTED, ModuleProgress.status.type),
+            literal(0, Integer),
+        ).where(
+            CurriculumModule.course_id == current_module.course_id,
+            CurriculumModule.module_order == current_module.module_order + 1,
+            ~exists().where(
+                ModuleProgress.enrollment_id == enrollment_id,
+                ModuleProgress.module_id == CurriculumModule.id
             )
         )
-        next_module = result.scalar_one_or_none()
-        
-        if not next_module:
-            return None  # No more modules
-            
-        # Create progress record if not exists
         result = await db.execute(
-            select(ModuleProgress).where(
-                ModuleProgress.enrollment_id == enrollment_id,
-                ModuleProgress.module_id == next_module.id
+            insert(ModuleProgress)
+            .from_select(
+                ["enrollment_id", "module_id", "completion_percent", "status", "quiz_attempts"],
+                next_module
             )
+            .returning(ModuleProgress.module_id)
         )
-        progress = result.scalar_one_or_none()
-        
-        if not progress:
-            progress = ModuleProgress(
-                enrollment_id=enrollment_id,
-                module_id=next_module.id,
-                status=ProgressStatus.NOT_STARTED,
-                completion_percent=0.0
-            )
-            db.add(progress)
-            await db.commit()
-            
-        return next_module.id
-
+        return result.scalar_one_or_none()
 
 progression_service = ProgressionService()
@@ -0,0 +1,219 @@
+"""
+Question Import Service - Validated bulk loading of question banks
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert
+from models.curriculum_module import CurriculumModule
+from models.question_bank import QuestionBank
+from models.question_option import QuestionOption
+from services.quiz_variant_pool import quiz_variant_pool, QUIZ_BANK_CHANNEL
+from services.retrieval_service import retrieval_service, RETRIEVAL_CHANNEL
+from db.notify import notify
+from typing import Any, Dict, List
+import csv
+import io
+import json
+import os
+
+MAX_IMPORT_QUESTIONS = 20000
+MIN_OPTIONS = 2
+MAX_OPTIONS = 10
+MAX_REPORTED_ERRORS = 100
+
+
+class QuestionImportError(ValueError):
+    """Raised when an import file has problems; nothing is written"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__(f"{len(errors)} problem(s) in import")
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+
+
+class QuestionImportService:
+    """
+    Bulk question bank imports
+
+    Accepted formats, for any number of modules:
+    - JSON: a list (or {"questions": [...]}) of QuestionCreate objects:
+      {"module_id", "question_text", "explanation_text", "options": [{"text", "is_correct"}]}
+    - CSV with a header row: module_id, question_text, explanation_text,
+      option_1 ... option_N, correct (1-based option numbers, e.g. "2" or "1|3")
+
+    The whole file is validated before anything is written, then questions
+    and options go in with batched multi-row INSERTs in a single transaction.
+    """
+
+    @staticmethod
+    def parse(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+        """Parse a JSON or CSV body into QuestionCreate-shaped dicts"""
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise QuestionImportError(["File is not UTF-8 text"])
+
+        if "csv" in content_type:
+            return QuestionImportService._parse_csv(text)
+
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise QuestionImportError([f"Invalid JSON: {e}"])
+        if isinstance(data, dict):
+            data = data.get("questions")
+        if not isinstance(data, list):
+            raise QuestionImportError(['Expected a list of questions or {"questions": [...]}'])
+        return data
+
+    @staticmethod
+    def _parse_csv(text: str) -> List[Dict[str, Any]]:
+        reader = csv.DictReader(io.StringIO(text))
+        fields = reader.fieldnames or []
+        missing = {"module_id", "question_text", "correct"} - set(fields)
+        if missing:
+            raise QuestionImportError([f"Missing CSV columns: {', '.join(sorted(missing))}"])
+        option_columns = sorted(
+            (f for f in fields if f.startswith("option_") and f[7:].isdigit()),
+            key=lambda f: int(f[7:])
+        )
+
+        questions = []
+        for row in reader:
+            correct = {part.strip() for part in (row.get("correct") or "").replace(",", "|").split("|")}
+            options = []
+            for column in option_columns:
+                text_value = (row.get(column) or "").strip()
+                if text_value:
+                    options.append({"text": text_value, "is_correct": column[7:] in correct})
+            questions.append({
+                "module_id": row.get("module_id"),
+                "question_text": row.get("question_text"),
+                "explanation_text": row.get("explanation_text") or None,
+                "options": options,
+            })
+        return questions
+
+    @staticmethod
+    def validate(questions: List[Dict[str, Any]], module_courses: Dict[int, int]) -> List[str]:
+        """
+        Check every question; returns error messages (empty when valid)
+
+        Args:
+            module_courses: module_id -> course_id for modules that exist
+        """
+        errors = []
+        if not questions:
+            errors.append("No questions in import")
+        if len(questions) > MAX_IMPORT_QUESTIONS:
+            errors.append(f"{len(questions)} questions; split imports above {MAX_IMPORT_QUESTIONS}")
+
+        for number, question in enumerate(questions, start=1):
+            where = f"Question {number}"
+            if not isinstance(question, dict):
+                errors.append(f"{where}: expected an object")
+                continue
+            try:
+                module_id = int(question.get("module_id"))
+            except (TypeError, ValueError):
+                errors.append(f"{where}: module_id must be an integer")
+            else:
+                if module_id not in module_courses:
+                    errors.append(f"{where}: module {module_id} not found")
+            if not str(question.get("question_text") or "").strip():
+                errors.append(f"{where}: question_text is empty")
+
+            options = question.get("options")
+            if not isinstance(options, list) or not MIN_OPTIONS <= len(options) <= MAX_OPTIONS:
+                errors.append(f"{where}: needs {MIN_OPTIONS}-{MAX_OPTIONS} options")
+                continue
+            if any(not isinstance(o, dict) or not str(o.get("text") or "").strip() for o in options):
+                errors.append(f"{where}: every option needs text")
+            elif any(not isinstance(o.get("is_correct", False), bool) for o in options):
+                errors.append(f"{where}: is_correct must be true or false")
+            elif not any(o.get("is_correct", False) for o in options):
+                errors.append(f"{where}: no option is marked correct")
+
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+        return errors
+
+    @staticmethod
+    def _module_ids(questions: List[Dict[str, Any]]) -> List[int]:
+        ids = set()
+        for question in questions:
+            try:
+                ids.add(int(question.get("module_id")))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return list(ids)
+
+    @staticmethod
+    async def import_questions(db: AsyncSession, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate and insert questions with their options in one transaction
+
+        Raises:
+            QuestionImportError: If any question is invalid (nothing is written)
+        """
+        module_ids = QuestionImportService._module_ids(questions)
+        module_courses = {}
+        if module_ids:
+            result = await db.execute(
+                select(CurriculumModule.id, CurriculumModule.course_id)
+                .where(CurriculumModule.id.in_(module_ids))
+            )
+            module_courses = dict(result.all())
+
+        errors = QuestionImportService.validate(questions, module_courses)
+        if errors:
+            raise QuestionImportError(errors)
+
+        # executemany + RETURNING is sent as batched multi-row INSERTs;
+        # sort_by_parameter_order keeps returned ids aligned with the input
+        result = await db.execute(
+            insert(QuestionBank).returning(QuestionBank.id, sort_by_parameter_order=True),
+            [
+                {
+                    "module_id": int(q["module_id"]),
+                    "question_text": str(q["question_text"]).strip(),
+                    "explanation_text": q.get("explanation_text") or None,
+                }
+                for q in questions
+            ]
+        )
+        question_ids = result.scalars().all()
+
+        option_rows = [
+            {"question_id": question_id, "option_text": str(o["text"]).strip(), "is_correct": o.get("is_correct", False)}
+            for question_id, q in zip(question_ids, questions)
+            for o in q["options"]
+        ]
+        await db.execute(insert(QuestionOption), option_rows)
+
+        per_module: Dict[int, int] = {}
+        for q in questions:
+            module_id = int(q["module_id"])
+            per_module[module_id] = per_module.get(module_id, 0) + 1
+        course_ids = {module_courses[module_id] for module_id in per_module}
+
+        for module_id in per_module:
+            await notify(db, QUIZ_BANK_CHANNEL, str(module_id))
+        for course_id in course_ids:
+            await notify(db, RETRIEVAL_CHANNEL, f"{course_id}:{os.getpid()}")
+        await db.commit()
+
+        # Other workers hear the notifications; this one drops its copies now
+        for module_id in per_module:
+            quiz_variant_pool.invalidate(module_id)
+        for course_id in course_ids:
+            retrieval_service.invalidate(course_id)
+
+        return {
+            "success": True,
+            "questions_created": len(question_ids),
+            "options_created": len(option_rows),
+            "modules": per_module,
+        }
+
+
+# Singleton instance
+question_import_service = QuestionImportService()
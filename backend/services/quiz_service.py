@@ -2,178 +2,423 @@
 Quiz Service - Quiz generation, scoring, and validation
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, delete
 from models.question_bank import QuestionBank
 from models.question_option import QuestionOption
 from models.quiz_config import QuizConfig
 from models.quiz_attempt import QuizAttempt
-from models.module_progress import ModuleProgress
+from models.quiz_session import QuizSession
+from models.module_progress import ModuleProgress, ProgressStatus
+from models.curriculum_module import CurriculumModule
 from services.config_service import config_service
+from services.enrollment_summary_service import enrollment_summary_service
+from db.shards import shard_of, shard_router
 from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
 import random
+import secrets
+
+logger = logging.getLogger(__name__)
+
+SESSION_PURGE_INTERVAL_SECONDS = 600
+
+
+class QuizSessionError(ValueError):
+    """Raised when a submission does not match a valid quiz session or has no attempts left"""
 
 
 class QuizService:
     """
     Handles quiz generation, scoring, and validation logic
+    
+    Every served quiz leaves a QuizSession with its answer key; a background
+    worker deletes expired ones every SESSION_PURGE_INTERVAL_SECONDS.
     """
     
+    def __init__(self):
+        self._worker: Optional[asyncio.Task] = None
+    
     @staticmethod
-    async def generate_quiz(
+    async def get_quiz_settings(
         db: AsyncSession,
         module_id: int
     ) -> Dict:
-        """
-        Generate a quiz for a module
-        
-        Steps:
-        1. Get quiz config for module (or use defaults)
-        2. Pull random questions from question bank
-        3. Shuffle questions and options
-        4. Return quiz data
-        """
-        # Get quiz config
+        """Get quiz config for a module, falling back to defaults"""
         result = await db.execute(
             select(QuizConfig).where(QuizConfig.module_id == module_id)
         )
         quiz_config = result.scalar_one_or_none()
         
         if not quiz_config:
-            # Use default config
-            total_questions = config_service.DEFAULT_QUIZ_QUESTIONS
-            time_limit = config_service.DEFAULT_QUIZ_TIME_LIMIT_SECONDS
-            pass_score = config_service.DEFAULT_PASS_SCORE_PERCENT
-        else:
-            total_questions = quiz_config.total_questions
-            time_limit = quiz_config.time_limit_seconds
-            pass_score = quiz_config.pass_score_percent
-            
-        # Get all questions for this module
+            return {
+                "total_questions": config_service.DEFAULT_QUIZ_QUESTIONS,
+                "time_limit_seconds": config_service.DEFAULT_QUIZ_TIME_LIMIT_SECONDS,
+                "pass_score_percent": config_service.DEFAULT_PASS_SCORE_PERCENT
+            }
+        return {
+            "total_questions": quiz_config.total_questions,
+            "time_limit_seconds": quiz_config.time_limit_seconds,
+            "pass_score_percent": quiz_config.pass_score_percent
+        }
+    
+    @staticmethod
+    async def load_answer_key(
+        db: AsyncSession,
+        question_ids: List[int]
+    ) -> Dict[str, Dict]:
+        """
+        Load questions and options for the given ids in two queries
+        
+        Returns:
+            Dict keyed by str(question_id) with question text, explanation,
+            correct option id and option texts keyed by str(option_id)
+        """
+        if not question_ids:
+            return {}
+        
+        result = await db.execute(
+            select(QuestionBank).where(QuestionBank.id.in_(question_ids))
+        )
+        answer_key = {
+            str(question.id): {
+                "question_text": question.question_text,
+                "explanation_text": question.explanation_text or "",
+                "correct_option_id": None,
+                "options": {}
+            }
+            for question in result.scalars().all()
+        }
+        
         result = await db.execute(
-            select(QuestionBank)
-            .where(QuestionBank.module_id == module_id)
+            select(QuestionOption).where(QuestionOption.question_id.in_(question_ids))
         )
-        all_questions = result.scalars().all()
+        for opt in result.scalars().all():
+            entry = answer_key[str(opt.question_id)]
+            entry["options"][str(opt.id)] = opt.option_text
+            if opt.is_correct:
+                entry["correct_option_id"] = opt.id
+                
+        return answer_key
+    
+    @staticmethod
+    def score_answers(
+        answers: Dict[int, int],
+        answer_key: Dict[str, Dict],
+        question_ids: List[int]
+    ) -> tuple[int, List[Dict]]:
+        """
+        Score answers to the given questions against an answer key snapshot
         
-        # Select random questions (up to total_questions)
-        num_questions = min(len(all_questions), total_questions)
-        selected_questions = random.sample(list(all_questions), num_questions)
+        Questions without an answer are wrong.
         
-        # Shuffle questions
-        random.shuffle(selected_questions)
+        Returns:
+            (correct_count, explanations for wrong answers)
+        """
+        correct_count = 0
+        explanations = []
+        
+        for question_id in question_ids:
+            selected_option_id = answers.get(question_id)
+            entry = answer_key.get(str(question_id))
+            if entry is None:
+                explanations.append({
+                    "question_text": "",
+                    "selected_option": "",
+                    "correct_option": "",
+                    "explanation": ""
+                })
+                continue
+                
+            correct_option_id = entry["correct_option_id"]
+            if correct_option_id is not None and selected_option_id == correct_option_id:
+                correct_count += 1
+            else:
+                # Add explanation for wrong answer
+                explanations.append({
+                    "question_text": entry["question_text"],
+                    "selected_option": entry["options"].get(str(selected_option_id), ""),
+                    "correct_option": entry["options"].get(str(correct_option_id), ""),
+                    "explanation": entry["explanation_text"]
+                })
+                
+        return correct_count, explanations
+    
+    @staticmethod
+    def build_variant(
+        module_id: int,
+        quiz_settings: Dict,
+        question_ids: List[int],
+        answer_key: Dict[str, Dict]
+    ) -> Dict:
+        """
+        Build one shuffled quiz from already-loaded questions
         
-        # Build quiz structure
+        Args:
+            question_ids: Selected question ids, in the order they are served
+            answer_key: Answer key entries covering at least question_ids
+            
+        Returns:
+            Dict with the client-facing quiz, served question ids and the
+            answer key snapshot for those questions
+        """
         quiz_questions = []
-        for question in selected_questions:
-            # Get options for this question
-            result = await db.execute(
-                select(QuestionOption)
-                .where(QuestionOption.question_id == question.id)
-            )
-            options = result.scalars().all()
+        for question_id in question_ids:
+            entry = answer_key[str(question_id)]
             
             # Shuffle options
-            options_list = list(options)
+            options_list = list(entry["options"].items())
             random.shuffle(options_list)
             
             quiz_questions.append({
-                "question_id": question.id,
-                "question_text": question.question_text,
+                "question_id": question_id,
+                "question_text": entry["question_text"],
                 "options": [
                     {
-                        "option_id": opt.id,
-                        "option_text": opt.option_text
+                        "option_id": int(option_id),
+                        "option_text": option_text
                     }
-                    for opt in options_list
+                    for option_id, option_text in options_list
                 ]
             })
             
         return {
-            "module_id": module_id,
-            "total_questions": num_questions,
-            "time_limit_seconds": time_limit,
-            "pass_score_percent": pass_score,
-            "questions": quiz_questions
+            "quiz": {
+                "module_id": module_id,
+                "total_questions": len(question_ids),
+                "time_limit_seconds": quiz_settings["time_limit_seconds"],
+                "pass_score_percent": quiz_settings["pass_score_percent"],
+                "questions": quiz_questions
+            },
+            "question_ids": list(question_ids),
+            "answer_key": {str(qid): answer_key[str(qid)] for qid in question_ids},
+            "quiz_settings": quiz_settings
         }
     
     @staticmethod
-    async def submit_and_score_quiz(
+    async def generate_quiz(
+        db: AsyncSession,
+        module_id: int,
+        enrollment_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Generate a quiz for a module
+        
+        Steps:
+        1. Take a pre-built variant from the module's variant pool, or
+        2. Build one inline: get quiz config, pull random questions from the
+           question bank, shuffle questions and options
+        3. Record a quiz session with the answer key (when enrollment_id is given)
+        4. Return quiz data
+        """
+        from services.quiz_variant_pool import quiz_variant_pool
+        variant = quiz_variant_pool.acquire(module_id, shard_of(db))
+        
+        if variant is None:
+            quiz_settings = await QuizService.get_quiz_settings(db, module_id)
+            
+            # Get all question ids for this module
+            result = await db.execute(
+                select(QuestionBank.id)
+                .where(QuestionBank.module_id == module_id)
+            )
+            all_question_ids = list(result.scalars().all())
+            
+            # Select random questions (up to total_questions); sample() already returns them shuffled
+            num_questions = min(len(all_question_ids), quiz_settings["total_questions"])
+            selected_ids = random.sample(all_question_ids, num_questions)
+            
+            answer_key = await QuizService.load_answer_key(db, selected_ids)
+            variant = QuizService.build_variant(module_id, quiz_settings, selected_ids, answer_key)
+        
+        # Variants may be shared with the pool, so never mutate the stored quiz
+        quiz_data = dict(variant["quiz"])
+        
+        if enrollment_id is not None:
+            quiz_data["session_id"] = await QuizService.create_session(
+                db,
+                enrollment_id,
+                module_id,
+                variant["question_ids"],
+                variant["answer_key"],
+                variant["quiz_settings"]
+            )
+            
+        return quiz_data
+    
+    @staticmethod
+    async def create_session(
+        db: AsyncSession,
+        enrollment_id: int,
+        module_id: int,
+        question_ids: List[int],
+        answer_key: Dict[str, Dict],
+        quiz_settings: Dict
+    ) -> str:
+        """
+        Store the served quiz so submission can be scored from one lookup
+        
+        Returns:
+            Session token to hand to the client
+        """
+        started_at = datetime.now(timezone.utc)
+        session = QuizSession(
+            token=secrets.token_urlsafe(24),
+            enrollment_id=enrollment_id,
+            module_id=module_id,
+            question_ids=list(question_ids),
+            answer_key_json=answer_key,
+            time_limit_seconds=quiz_settings["time_limit_seconds"],
+            pass_score_percent=quiz_settings["pass_score_percent"],
+            started_at=started_at,
+            expires_at=started_at + timedelta(
+                seconds=quiz_settings["time_limit_seconds"] + config_service.QUIZ_SESSION_TTL_SECONDS
+            )
+        )
+        db.add(session)
+        await db.commit()
+        return session.token
+    
+    @staticmethod
+    async def claim_session(
         db: AsyncSession,
+        session_token: str,
         enrollment_id: int,
         module_id: int,
+        answers: Dict[int, int]
+    ) -> QuizSession:
+        """
+        Fetch an open quiz session and mark it submitted in a single statement
+        
+        The claim is part of the caller's transaction, so a failed submission
+        leaves the session open. A second submit of the same session finds
+        nothing to claim.
+        
+        Raises:
+            QuizSessionError: If the session is unknown, already submitted,
+                expired, or the answers reference questions that were not served
+        """
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            update(QuizSession)
+            .where(
+                QuizSession.token == session_token,
+                QuizSession.enrollment_id == enrollment_id,
+                QuizSession.module_id == module_id,
+                QuizSession.submitted_at.is_(None),
+                QuizSession.expires_at > now
+            )
+            .values(submitted_at=now)
+            .returning(QuizSession)
+            .execution_options(synchronize_session=False)
+        )
+        session = result.scalar_one_or_none()
+        
+        if not session:
+            raise QuizSessionError("Quiz session not found, expired or already submitted")
+            
+        served = set(session.question_ids)
+        if any(question_id not in served for question_id in answers):
+            raise QuizSessionError("Submission contains questions that were not part of this quiz")
+            
+        return session
+    
+    @staticmethod
+    async def purge_expired_sessions(db: AsyncSession) -> int:
+        """Delete quiz sessions past their expiry; returns rows removed"""
+        result = await db.execute(
+            delete(QuizSession).where(QuizSession.expires_at <= datetime.now(timezone.utc))
+        )
+        await db.commit()
+        return result.rowcount
+    
+    async def start(self) -> None:
+        """Start the background purge of expired quiz sessions"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(SESSION_PURGE_INTERVAL_SECONDS)
+            for shard in shard_router.shards:
+                try:
+                    async with shard_router.session(shard) as db:
+                        await self.purge_expired_sessions(db)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Quiz session purge failed on shard %s", shard)
+    
+    @staticmethod
+    async def submit_and_score_quiz(
+        db: AsyncSession,
+        enrollment_id: int,
+        module: CurriculumModule,
         answers: Dict[int, int],  # question_id -> selected_option_id
-        time_taken_seconds: int
+        session_token: str
     ) -> Dict:
         """
-        Score a quiz submission and create quiz attempt record
+        Score a quiz submission, record the attempt and complete the module
+        if it passed
+        
+        Everything the submission decides (score, attempt number, module
+        completion, next-module unlock) comes from the session and the
+        progress row locked by claim_attempt; nothing written here is read
+        back. All writes stay in the caller's transaction, so the caller can
+        add its own (credits, badges) and commit once: a submission is then
+        applied completely or not at all.
+        
+        Only the answers come from the client: the questions a quiz is
+        scored over and the time taken are those the session recorded.
         
         Args:
             enrollment_id: Student enrollment ID
-            module_id: Module ID
+            module: Module the quiz belongs to
             answers: Dict mapping question_id to selected option_id
-            time_taken_seconds: Time taken to complete quiz
+            session_token: Quiz session returned by generate_quiz
             
         Returns:
             Dict with score, pass status, and explanations for wrong answers
+            
+        Raises:
+            QuizSessionError: If session_token does not match an open session,
+                or no attempts are left
         """
-        # Get quiz config for time limit
-        result = await db.execute(
-            select(QuizConfig).where(QuizConfig.module_id == module_id)
+        module_id = module.id
+        # One lookup gives the served questions, answer key and server start time
+        session = await QuizService.claim_session(
+            db, session_token, enrollment_id, module_id, answers
+        )
+        pass_score_percent = session.pass_score_percent
+        elapsed = datetime.now(timezone.utc) - session.started_at
+        time_taken_seconds = int(elapsed.total_seconds())
+        completed_in_time = (
+            elapsed.total_seconds() <= session.time_limit_seconds + config_service.QUIZ_SUBMIT_GRACE_SECONDS
         )
-        quiz_config = result.scalar_one_or_none()
-        time_limit = quiz_config.time_limit_seconds if quiz_config else config_service.DEFAULT_QUIZ_TIME_LIMIT_SECONDS
-        pass_score_percent = quiz_config.pass_score_percent if quiz_config else config_service.DEFAULT_PASS_SCORE_PERCENT
-        
-        # Check if completed in time
-        completed_in_time = time_taken_seconds <= time_limit
-        
-        # Score the quiz
-        total_questions = len(answers)
-        correct_count = 0
-        explanations = []
         
-        for question_id, selected_option_id in answers.items():
-            # Get the question and all options
-            result = await db.execute(
-                select(QuestionBank).where(QuestionBank.id == question_id)
-            )
-            question = result.scalar_one_or_none()
-            
-            result = await db.execute(
-                select(QuestionOption).where(QuestionOption.question_id == question_id)
-            )
-            options = result.scalars().all()
-            
-            # Find correct option and selected option
-            correct_option = next((opt for opt in options if opt.is_correct), None)
-            selected_option = next((opt for opt in options if opt.id == selected_option_id), None)
-            
-            if selected_option and correct_option and selected_option.id == correct_option.id:
-                correct_count += 1
-            else:
-                # Add explanation for wrong answer
-                explanations.append({
-                    "question_text": question.question_text if question else "",
-                    "selected_option": selected_option.option_text if selected_option else "",
-                    "correct_option": correct_option.option_text if correct_option else "",
-                    "explanation": question.explanation_text if question else ""
-                })
+        # Score over every served question; unanswered ones count as wrong
+        total_questions = len(session.question_ids)
+        correct_count, explanations = QuizService.score_answers(
+            answers, session.answer_key_json, session.question_ids
+        )
         
         # Calculate score percentage
         score_percent = (correct_count / total_questions * 100) if total_questions > 0 else 0
         
-        # Get current attempt number
-        result = await db.execute(
-            select(func.count(QuizAttempt.id))
-            .where(
-                QuizAttempt.enrollment_id == enrollment_id,
-                QuizAttempt.module_id == module_id
-            )
-        )
-        attempt_count = result.scalar() or 0
-        attempt_number = attempt_count + 1
+        progress = await QuizService.claim_attempt(db, enrollment_id, module_id)
+        attempt_number = progress.quiz_attempts
         
-        # Create quiz attempt record
+        # Create quiz attempt record; the flush gets its id for the wallet transaction
         quiz_attempt = QuizAttempt(
             enrollment_id=enrollment_id,
             module_id=module_id,
@@ -183,16 +428,32 @@ class QuizService:
             completed_in_time=completed_in_time
         )
         db.add(quiz_attempt)
-        await db.commit()
-        await db.refresh(quiz_attempt)
+        await db.flush()
         
         # Check if passed
         passed = score_percent >= pass_score_percent and completed_in_time
         
-        # Check if module can be marked as completed
-        if passed:
+        # Completed = 100% content consumption + this attempt passed
+        module_completed = (
+            passed
+            and progress.completion_percent >= 100.0
+            and progress.status != ProgressStatus.COMPLETED
+        )
+        next_module_id = None
+        if module_completed:
             from services.progression_service import progression_service
-            await progression_service.check_and_complete_module(db, enrollment_id, module_id)
+            next_module_id = await progression_service.complete_module(db, progress.id, enrollment_id, module)
+        
+        # The attempt touched this module's progress row (and unlocking created
+        # the next one), so the latest of them becomes the current module
+        await enrollment_summary_service.record(
+            db,
+            enrollment_id,
+            module_id=next_module_id or module_id,
+            modules_started=int(next_module_id is not None),
+            modules_completed=int(module_completed),
+            quiz_score=score_percent
+        )
         
         return {
             "attempt_id": quiz_attempt.id,
@@ -205,24 +466,93 @@ class QuizService:
             "passed": passed,
             "pass_score_percent": pass_score_percent,
             "remaining_attempts": max(0, config_service.MAX_QUIZ_ATTEMPTS - attempt_number),
+            "module_completed": module_completed,
             "explanations": explanations
         }
     
+    @staticmethod
+    async def claim_attempt(
+        db: AsyncSession,
+        enrollment_id: int,
+        module_id: int
+    ):
+        """
+        Take the next attempt number for a module
+        
+        One UPDATE ... RETURNING on the module's progress row: its row lock
+        serializes concurrent submits, so a double-submit can neither reuse
+        a number nor slip past the attempt limit. The row lock is held until
+        the caller commits, so the returned progress stays current for it.
+        
+        Returns:
+            Row with the progress id, the new quiz_attempts (the attempt
+            number), completion_percent and status
+        
+        Raises:
+            QuizSessionError: If the attempts are used up or the module's
+                content was never started
+        """
+        result = await db.execute(
+            update(ModuleProgress)
+            .where(
+                ModuleProgress.enrollment_id == enrollment_id,
+                ModuleProgress.module_id == module_id,
+                ModuleProgress.quiz_attempts < config_service.MAX_QUIZ_ATTEMPTS
+            )
+            .values(quiz_attempts=ModuleProgress.quiz_attempts + 1)
+            .returning(
+                ModuleProgress.id,
+                ModuleProgress.quiz_attempts,
+                ModuleProgress.completion_percent,
+                ModuleProgress.status
+            )
+            .execution_options(synchronize_session=False)
+        )
+        progress = result.one_or_none()
+        if progress is not None:
+            return progress
+        
+        if await QuizService.get_attempt_count(db, enrollment_id, module_id) is None:
+            raise QuizSessionError("Please complete all content before taking the quiz")
+        raise QuizSessionError(f"Maximum attempts ({config_service.MAX_QUIZ_ATTEMPTS}) reached")
+    
     @staticmethod
     async def get_attempt_count(
         db: AsyncSession,
         enrollment_id: int,
         module_id: int
-    ) -> int:
-        """Get number of quiz attempts for a module"""
+    ) -> Optional[int]:
+        """Get number of quiz attempts for a module; None if the module has no progress yet"""
         result = await db.execute(
+            select(ModuleProgress.quiz_attempts).where(
+                ModuleProgress.enrollment_id == enrollment_id,
+                ModuleProgress.module_id == module_id
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def sync_attempt_counters(db: AsyncSession, course_id: Optional[int] = None) -> int:
+        """
+        Reset ModuleProgress.quiz_attempts from QuizAttempt rows, e.g. after
+        bulk loads; returns progress rows updated
+        """
+        attempts = (
             select(func.count(QuizAttempt.id))
             .where(
-                QuizAttempt.enrollment_id == enrollment_id,
-                QuizAttempt.module_id == module_id
+                QuizAttempt.enrollment_id == ModuleProgress.enrollment_id,
+                QuizAttempt.module_id == ModuleProgress.module_id
             )
+            .scalar_subquery()
         )
-        return result.scalar() or 0
+        stmt = update(ModuleProgress).values(quiz_attempts=attempts).execution_options(synchronize_session=False)
+        if course_id is not None:
+            stmt = stmt.where(ModuleProgress.module_id.in_(
+                select(CurriculumModule.id).where(CurriculumModule.course_id == course_id)
+            ))
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
     
     @staticmethod
     async def can_take_quiz(
@@ -236,21 +566,19 @@ class QuizService:
         Returns:
             (can_take, reason)
         """
-        # Check attempt count
-        attempt_count = await QuizService.get_attempt_count(db, enrollment_id, module_id)
-        
-        if attempt_count >= config_service.MAX_QUIZ_ATTEMPTS:
-            return False, f"Maximum attempts ({config_service.MAX_QUIZ_ATTEMPTS}) reached"
-            
-        # Check if all content is consumed
+        # Attempt counter and content completion come from the one progress row
         result = await db.execute(
-            select(ModuleProgress).where(
+            select(ModuleProgress.quiz_attempts, ModuleProgress.completion_percent).where(
                 ModuleProgress.enrollment_id == enrollment_id,
                 ModuleProgress.module_id == module_id
             )
         )
-        progress = result.scalar_one_or_none()
+        progress = result.first()
         
+        if progress and progress.quiz_attempts >= config_service.MAX_QUIZ_ATTEMPTS:
+            return False, f"Maximum attempts ({config_service.MAX_QUIZ_ATTEMPTS}) reached"
+            
+        # Check if all content is consumed
         if not progress or progress.completion_percent < 100.0:
             return False, "Please complete all content before taking the quiz"
             
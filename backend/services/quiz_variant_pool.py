@@ -0,0 +1,169 @@
+"""
+Quiz Variant Pool - Pre-generated shuffled quizzes per module
+"""
+from sqlalchemy import select
+from db.shards import shard_router, DEFAULT_SHARD
+from models.question_bank import QuestionBank
+from services.config_service import config_service
+from services.quiz_service import QuizService
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set, Tuple
+import asyncio
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# Channel carrying the module_id whose question bank changed
+QUIZ_BANK_CHANNEL = "quiz_bank_changed"
+
+PoolKey = Tuple[str, int]  # (shard, module_id); module ids repeat across shards
+
+
+class QuizVariantPool:
+    """
+    Keeps a pool of ready-made quiz variants (quiz + answer key) per module
+
+    A background worker fills each module's pool from a cached copy of its
+    question bank, so serving a quiz during an exam surge is a deque pop
+    instead of random sampling plus option queries. The pool is refilled
+    when it drops below the low watermark and discarded whenever the
+    module's question bank or quiz config changes.
+    """
+
+    def __init__(self):
+        self._pools: Dict[PoolKey, Deque[Dict]] = {}
+        self._banks: Dict[PoolKey, Dict] = {}  # -> {"quiz_settings", "answer_key"}
+        self._versions: Dict[PoolKey, int] = {}
+        self._pending: Set[PoolKey] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background refill worker"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refill worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+            self._pending.clear()
+
+    def acquire(self, module_id: int, shard: str = DEFAULT_SHARD) -> Optional[Dict]:
+        """
+        Take a pre-built variant for a module
+
+        Returns:
+            Variant dict from QuizService.build_variant, or None when the pool
+            is empty (the caller then builds one inline)
+        """
+        key = (shard, module_id)
+        pool = self._pools.get(key)
+        variant = pool.popleft() if pool else None
+
+        if not pool or len(pool) < config_service.QUIZ_VARIANT_POOL_LOW_WATERMARK:
+            self._schedule(key)
+
+        return variant
+
+    def warm(self, module_ids: Iterable[int], shard: str = DEFAULT_SHARD) -> None:
+        """Queue modules for pre-generation ahead of a scheduled quiz"""
+        for module_id in module_ids:
+            self._schedule((shard, module_id))
+
+    def invalidate(self, module_id: int) -> None:
+        """
+        Discard variants and cached questions after a question bank change
+
+        Notifications carry only the module id, so the module is dropped on
+        every shard; the others just rebuild once.
+        """
+        for shard in shard_router.shards:
+            self._invalidate((shard, module_id))
+
+    def invalidate_all(self) -> None:
+        """Discard every pool, e.g. after the default quiz settings change"""
+        for key in set(self._pools) | set(self._banks) | self._pending:
+            self._invalidate(key)
+
+    def _invalidate(self, key: PoolKey) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._pools.pop(key, None)
+        self._banks.pop(key, None)
+
+    async def handle_bank_changed(self, payload: Optional[str]) -> None:
+        """Notification handler for QUIZ_BANK_CHANNEL"""
+        if payload:
+            self.invalidate(int(payload))
+        else:
+            self.invalidate_all()
+
+    def _schedule(self, key: PoolKey) -> None:
+        if self._queue is None or key in self._pending:
+            return
+        self._pending.add(key)
+        self._queue.put_nowait(key)
+
+    async def _run(self) -> None:
+        while True:
+            key = await self._queue.get()
+            try:
+                await self._refill(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Quiz variant refill failed for module %s on shard %s", key[1], key[0])
+            finally:
+                self._pending.discard(key)
+
+    async def _load_bank(self, key: PoolKey) -> Dict:
+        shard, module_id = key
+        async with shard_router.session(shard) as db:
+            quiz_settings = await QuizService.get_quiz_settings(db, module_id)
+            result = await db.execute(
+                select(QuestionBank.id).where(QuestionBank.module_id == module_id)
+            )
+            question_ids = list(result.scalars().all())
+            answer_key = await QuizService.load_answer_key(db, question_ids)
+
+        return {"quiz_settings": quiz_settings, "answer_key": answer_key}
+
+    async def _refill(self, key: PoolKey) -> None:
+        module_id = key[1]
+        version = self._versions.get(key, 0)
+
+        bank = self._banks.get(key)
+        if bank is None:
+            bank = await self._load_bank(key)
+            if self._versions.get(key, 0) != version:
+                return  # Invalidated while loading; the next acquire reschedules
+            self._banks[key] = bank
+
+        question_ids = [int(qid) for qid in bank["answer_key"]]
+        if not question_ids:
+            return
+        num_questions = min(len(question_ids), bank["quiz_settings"]["total_questions"])
+
+        pool = self._pools.setdefault(key, deque())
+        while len(pool) < config_service.QUIZ_VARIANT_POOL_SIZE:
+            if self._versions.get(key, 0) != version:
+                return
+            pool.append(QuizService.build_variant(
+                module_id,
+                bank["quiz_settings"],
+                random.sample(question_ids, num_questions),
+                bank["answer_key"]
+            ))
+            # Building is CPU-only; yield so request handlers are not starved
+            await asyncio.sleep(0)
+
+
+quiz_variant_pool = QuizVariantPool()
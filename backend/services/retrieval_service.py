@@ -0,0 +1,328 @@
+"""
+Retrieval Service - Local BM25 search over course material for the chatbot
+"""
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import select, text
+from models.curriculum_module import CurriculumModule
+from models.content_item import ContentItem
+from models.question_bank import QuestionBank
+from core.config import settings
+from db.notify import notify
+from db.shards import shard_of, DEFAULT_SHARD
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Channel carrying "<course_id>:<pid>" when a course's material changes
+RETRIEVAL_CHANNEL = "retrieval_changed"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it its of on or "
+    "that the their then there these this to was what when where which who why will with you".split()
+)
+
+CHUNK_WORDS = 60
+CHUNK_STRIDE = 45
+SNIPPET_CHARS = 300
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(value: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(value.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def chunk_text(value: str) -> List[str]:
+    """Split text into overlapping word windows"""
+    words = value.split()
+    if len(words) <= CHUNK_WORDS:
+        return [" ".join(words)] if words else []
+    return [
+        " ".join(words[start:start + CHUNK_WORDS])
+        for start in range(0, len(words) - CHUNK_WORDS + CHUNK_STRIDE, CHUNK_STRIDE)
+    ]
+
+
+class CourseIndex:
+    """
+    BM25 index over the chunks of one course
+
+    Chunks can be added and removed per source. Postings are compiled
+    lazily into CSR-style NumPy arrays on the first search after a change,
+    so a query is a handful of vectorized adds plus an argpartition.
+    """
+
+    def __init__(self):
+        self._chunks: Dict[int, Tuple[str, str, Counter, int]] = {}  # id -> (title, text, tf, length)
+        self._sources: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._compiled = None
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def upsert(self, source_key: str, title: str, body: str) -> None:
+        """Replace all chunks for a source"""
+        self.remove(source_key)
+        chunk_ids = []
+        for chunk in chunk_text(body) or [title]:
+            terms = tokenize(f"{title} {chunk}")
+            if not terms:
+                continue
+            self._chunks[self._next_id] = (title, chunk, Counter(terms), len(terms))
+            chunk_ids.append(self._next_id)
+            self._next_id += 1
+        if chunk_ids:
+            self._sources[source_key] = chunk_ids
+        self._compiled = None
+
+    def remove(self, source_key: str) -> None:
+        for chunk_id in self._sources.pop(source_key, []):
+            self._chunks.pop(chunk_id, None)
+        self._compiled = None
+
+    def _compile(self):
+        chunk_ids = list(self._chunks)
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = np.empty(len(chunk_ids), dtype=np.float32)
+        for row, chunk_id in enumerate(chunk_ids):
+            _, _, tf, length = self._chunks[chunk_id]
+            lengths[row] = length
+            for term, count in tf.items():
+                rows, counts = postings.setdefault(term, ([], []))
+                rows.append(row)
+                counts.append(count)
+
+        vocab = {term: i for i, term in enumerate(postings)}
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for term, i in vocab.items():
+            indptr[i + 1] = indptr[i] + len(postings[term][0])
+        rows = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        for term, i in vocab.items():
+            rows[indptr[i]:indptr[i + 1]] = postings[term][0]
+            tfs[indptr[i]:indptr[i + 1]] = postings[term][1]
+
+        n = len(chunk_ids)
+        df = np.diff(indptr).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = K1 * (1 - B + B * lengths / max(float(lengths.mean()) if n else 1.0, 1.0))
+        self._compiled = (chunk_ids, vocab, indptr, rows, tfs, idf, norm)
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, str, str]]:
+        """
+        Returns:
+            Up to k (score, title, chunk) tuples, best first
+        """
+        if not self._chunks:
+            return []
+        if self._compiled is None:
+            self._compile()
+        chunk_ids, vocab, indptr, rows, tfs, idf, norm = self._compiled
+
+        scores = np.zeros(len(chunk_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = vocab.get(term)
+            if i is None:
+                continue
+            start, end = indptr[i], indptr[i + 1]
+            hit_rows = rows[start:end]
+            tf = tfs[start:end]
+            # Each row appears once per term, so fancy-index += is safe
+            scores[hit_rows] += idf[i] * tf * (K1 + 1) / (tf + norm[hit_rows])
+
+        hits = np.flatnonzero(scores)
+        if hits.size == 0:
+            return []
+        if hits.size > k:
+            hits = hits[np.argpartition(-scores[hits], k)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+
+        results = []
+        for row in hits:
+            title, chunk, _, _ = self._chunks[chunk_ids[row]]
+            results.append((float(scores[row]), title, chunk))
+        return results
+
+
+class RetrievalService:
+    """
+    Keeps one in-process CourseIndex per course, built on first query
+
+    Sources indexed: module titles/descriptions, active content item
+    titles/descriptions, question text with explanations, and text the
+    content augmentation pipeline extracted (when AUGMENTATION_DATABASE_URI
+    points at its database).
+    """
+
+    def __init__(self):
+        # Keyed by (shard, course_id); course ids repeat across shards
+        self._indexes: Dict[Tuple[str, int], CourseIndex] = {}
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        self._augmentation_engine = None
+
+    async def search(self, db: AsyncSession, course_id: int, query: str, k: int = 3) -> List[Tuple[float, str, str]]:
+        index = await self.get_index(db, course_id)
+        return index.search(query, k)
+
+    async def get_index(self, db: AsyncSession, course_id: int) -> CourseIndex:
+        key = (shard_of(db), course_id)
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = CourseIndex()
+                for source_key, title, body in await self._load_course_sources(db, course_id):
+                    index.upsert(source_key, title, body)
+                self._indexes[key] = index
+        return index
+
+    def invalidate(self, course_id: int) -> None:
+        """Drop a course index on every shard; the next query rebuilds it"""
+        for key in [key for key in self._indexes if key[1] == course_id]:
+            self._indexes.pop(key, None)
+
+    async def handle_course_changed(self, payload: Optional[str]) -> None:
+        """Notification handler for RETRIEVAL_CHANNEL"""
+        if not payload:
+            self._indexes.clear()
+            return
+        course_id, _, pid = payload.partition(":")
+        if pid != str(os.getpid()):
+            self.invalidate(int(course_id))
+
+    async def source_changed(self, db: AsyncSession, source_type: str, source_id: int) -> None:
+        """
+        Re-index one module, content item or question after an admin write
+
+        Updates this worker's index in place and tells other workers to
+        rebuild the course on their next query.
+        """
+        course_id, source = await self._load_source(db, source_type, source_id)
+        if course_id is None:
+            return
+        index = self._indexes.get((shard_of(db), course_id))
+        if index is not None:
+            if source is None:
+                index.remove(f"{source_type}:{source_id}")
+            else:
+                index.upsert(*source)
+
+        await notify(db, RETRIEVAL_CHANNEL, f"{course_id}:{os.getpid()}")
+        await db.commit()
+
+    async def _load_source(self, db: AsyncSession, source_type: str, source_id: int):
+        key = f"{source_type}:{source_id}"
+        if source_type == "module":
+            result = await db.execute(
+                select(CurriculumModule).where(CurriculumModule.id == source_id)
+            )
+            module = result.scalar_one_or_none()
+            if not module:
+                return None, None
+            return module.course_id, (key, module.title, module.description or "")
+
+        if source_type == "content":
+            result = await db.execute(
+                select(ContentItem, CurriculumModule.course_id)
+                .join(CurriculumModule, CurriculumModule.id == ContentItem.module_id)
+                .where(ContentItem.id == source_id)
+            )
+            row = result.first()
+            if not row:
+                return None, None
+            item, course_id = row
+            if not item.active_flag:
+                return course_id, None
+            return course_id, (key, item.title, item.description or "")
+
+        if source_type == "question":
+            result = await db.execute(
+                select(QuestionBank, CurriculumModule.course_id)
+                .join(CurriculumModule, CurriculumModule.id == QuestionBank.module_id)
+                .where(QuestionBank.id == source_id)
+            )
+            row = result.first()
+            if not row:
+                return None, None
+            question, course_id = row
+            return course_id, (key, "Practice question", self._question_text(question))
+
+        raise ValueError(f"Unknown source type: {source_type}")
+
+    @staticmethod
+    def _question_text(question: QuestionBank) -> str:
+        return f"{question.question_text} {question.explanation_text or ''}"
+
+    async def _load_course_sources(self, db: AsyncSession, course_id: int) -> List[Tuple[str, str, str]]:
+        sources = []
+
+        result = await db.execute(
+            select(CurriculumModule).where(CurriculumModule.course_id == course_id)
+        )
+        modules = result.scalars().all()
+        module_ids = [m.id for m in modules]
+        for module in modules:
+            sources.append((f"module:{module.id}", module.title, module.description or ""))
+
+        if module_ids:
+            result = await db.execute(
+                select(ContentItem).where(
+                    ContentItem.module_id.in_(module_ids),
+                    ContentItem.active_flag == True
+                )
+            )
+            for item in result.scalars().all():
+                sources.append((f"content:{item.id}", item.title, item.description or ""))
+
+            result = await db.execute(
+                select(QuestionBank).where(QuestionBank.module_id.in_(module_ids))
+            )
+            for question in result.scalars().all():
+                sources.append((f"question:{question.id}", "Practice question", self._question_text(question)))
+
+        # The augmentation pipeline reads the main database, so its course ids are default-shard ids
+        if shard_of(db) == DEFAULT_SHARD:
+            sources.extend(await self._load_augmented_text(course_id))
+        return sources
+
+    async def _load_augmented_text(self, course_id: int) -> List[Tuple[str, str, str]]:
+        """Extracted source text from the content augmentation database, if configured"""
+        if not settings.AUGMENTATION_DATABASE_URI:
+            return []
+        if self._augmentation_engine is None:
+            self._augmentation_engine = create_async_engine(settings.AUGMENTATION_DATABASE_URI)
+        try:
+            async with self._augmentation_engine.connect() as conn:
+                result = await conn.execute(
+                    text(
+                        "SELECT DISTINCT s.file_id, s.file_name, s.raw_text "
+                        "FROM source_contents s "
+                        "JOIN generation_tasks g ON g.source_file_id = s.file_id "
+                        "WHERE g.course_id = :course_id AND s.raw_text IS NOT NULL"
+                    ),
+                    {"course_id": str(course_id)}
+                )
+                return [
+                    (f"augmented:{file_id}", file_name or "Course material", raw_text)
+                    for file_id, file_name, raw_text in result.all()
+                ]
+        except Exception:
+            logger.exception("Could not load augmented text for course %s", course_id)
+            return []
+
+
+retrieval_service = RetrievalService()
@@ -0,0 +1,206 @@
+"""
+Search Service - Ranked full-text and typeahead search for the admin console
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, or_, literal_column
+from models.user import User
+from models.course import Course
+from models.curriculum_module import CurriculumModule
+from models.question_bank import QuestionBank
+from typing import Dict, Iterable, List, Optional
+import re
+
+SEARCH_TYPES = ("users", "courses", "modules", "questions")
+
+# Must match the config used by the generated search_vector columns; rendered
+# inline because asyncpg would otherwise bind it as VARCHAR, not regconfig
+TEXT_SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+PREFIX_TOKEN_RE = re.compile(r"\w+")
+SNIPPET_CHARS = 160
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def prefix_tsquery(query: str) -> Optional[str]:
+    """
+    Build a to_tsquery() string matching every word as a prefix
+
+    "lin equa" -> "lin:* & equa:*"
+    """
+    tokens = PREFIX_TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+class SearchService:
+    """
+    Search over users, courses, modules and questions
+
+    Courses, modules and questions carry a generated tsvector column with a
+    GIN index, so full-text matches and ts_rank_cd ranking are index-backed.
+    Names, emails, titles and question text have pg_trgm GIN indexes, which
+    serve fuzzy similarity matches (the % operator) and ILIKE lookups.
+    """
+
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        limit: int = 20
+    ) -> Dict[str, List[Dict]]:
+        """
+        Ranked search across entity types
+
+        Returns:
+            {type: [result, ...]} with results best first
+        """
+        query = query.strip()
+        types = [t for t in (types or SEARCH_TYPES) if t in SEARCH_TYPES]
+        if not query:
+            return {t: [] for t in types}
+
+        results = {}
+        for entity_type in types:
+            stmt = getattr(SearchService, f"_search_{entity_type}")(query)
+            result = await db.execute(stmt.limit(limit))
+            results[entity_type] = [dict(row._mapping) for row in result.all()]
+        return results
+
+    @staticmethod
+    def _search_users(query: str):
+        rank = func.greatest(
+            func.similarity(User.name, query),
+            func.similarity(User.email, query)
+        ).label("rank")
+        return (
+            select(User.id, User.name, User.email, User.role, User.school_id, rank)
+            .where(or_(
+                User.name.op("%")(query),
+                User.email.op("%")(query),
+                User.email.ilike(f"{escape_like(query)}%")
+            ))
+            .order_by(rank.desc(), User.id)
+        )
+
+    @staticmethod
+    def _search_courses(query: str):
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = (
+            func.ts_rank_cd(Course.search_vector, ts_query) + func.similarity(Course.title, query)
+        ).label("rank")
+        return (
+            select(Course.id, Course.title, Course.subject, Course.status, rank)
+            .where(or_(Course.search_vector.op("@@")(ts_query), Course.title.op("%")(query)))
+            .order_by(rank.desc(), Course.id)
+        )
+
+    @staticmethod
+    def _search_modules(query: str):
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = (
+            func.ts_rank_cd(CurriculumModule.search_vector, ts_query)
+            + func.similarity(CurriculumModule.title, query)
+        ).label("rank")
+        return (
+            select(CurriculumModule.id, CurriculumModule.course_id, CurriculumModule.title, rank)
+            .where(or_(
+                CurriculumModule.search_vector.op("@@")(ts_query),
+                CurriculumModule.title.op("%")(query)
+            ))
+            .order_by(rank.desc(), CurriculumModule.id)
+        )
+
+    @staticmethod
+    def _search_questions(query: str):
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(QuestionBank.search_vector, ts_query).label("rank")
+        return (
+            select(
+                QuestionBank.id,
+                QuestionBank.module_id,
+                func.left(QuestionBank.question_text, SNIPPET_CHARS).label("question_text"),
+                rank
+            )
+            .where(or_(
+                QuestionBank.search_vector.op("@@")(ts_query),
+                QuestionBank.question_text.ilike(f"%{escape_like(query)}%")
+            ))
+            .order_by(rank.desc(), QuestionBank.id)
+        )
+
+    @staticmethod
+    async def typeahead(
+        db: AsyncSession,
+        query: str,
+        entity_type: str = "users",
+        limit: int = 10
+    ) -> List[Dict]:
+        """
+        Prefix suggestions for one entity type
+
+        Names and titles match at the start of any word, shortest first;
+        questions match every typed word as a prefix, best ranked first.
+
+        Raises:
+            ValueError: If the entity type is unknown
+        """
+        if entity_type not in SEARCH_TYPES:
+            raise ValueError(f"Unknown search type: {entity_type}")
+        query = query.strip()
+        if not query:
+            return []
+
+        pattern = f"{escape_like(query)}%"
+        word_pattern = f"% {pattern}"
+
+        if entity_type == "users":
+            stmt = (
+                select(User.id, User.name, User.email, User.role)
+                .where(or_(
+                    User.name.ilike(pattern),
+                    User.name.ilike(word_pattern),
+                    User.email.ilike(pattern)
+                ))
+                .order_by(func.length(User.name), User.name)
+            )
+        elif entity_type == "courses":
+            stmt = (
+                select(Course.id, Course.title, Course.subject)
+                .where(or_(Course.title.ilike(pattern), Course.title.ilike(word_pattern)))
+                .order_by(func.length(Course.title), Course.title)
+            )
+        elif entity_type == "modules":
+            stmt = (
+                select(CurriculumModule.id, CurriculumModule.course_id, CurriculumModule.title)
+                .where(or_(
+                    CurriculumModule.title.ilike(pattern),
+                    CurriculumModule.title.ilike(word_pattern)
+                ))
+                .order_by(func.length(CurriculumModule.title), CurriculumModule.title)
+            )
+        else:
+            tsquery = prefix_tsquery(query)
+            if tsquery is None:
+                return []
+            ts_query = func.to_tsquery(TEXT_SEARCH_CONFIG, tsquery)
+            stmt = (
+                select(
+                    QuestionBank.id,
+                    QuestionBank.module_id,
+                    func.left(QuestionBank.question_text, SNIPPET_CHARS).label("question_text")
+                )
+                .where(QuestionBank.search_vector.op("@@")(ts_query))
+                .order_by(func.ts_rank_cd(QuestionBank.search_vector, ts_query).desc(), QuestionBank.id)
+            )
+
+        result = await db.execute(stmt.limit(limit))
+        return [dict(row._mapping) for row in result.all()]
+
+
+search_service = SearchService()
@@ -0,0 +1,34 @@
+"""
+Admin configuration updates are validated before they reach any worker
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("changes", [
+    {"admission_max_concurrency": 0},
+    {"admission_limit_quiz_submit": -1},
+    {"admission_max_queue": 0},
+    {"max_attempts": -1},
+    {"default_pass_score_percent": 101},
+])
+async def test_out_of_range_config_is_rejected(client, changes):
+    before = (await client.get("/admin/config")).json()
+
+    response = await client.put("/admin/config", json=changes)
+    assert response.status_code == 422, response.text
+
+    assert (await client.get("/admin/config")).json() == before
+
+
+async def test_config_update_within_budget(client, query_budget):
+    current = (await client.get("/admin/config")).json()["teacher_credits"]["evidence_submission"]
+
+    # The admin's school does not matter: overrides live on the default shard
+    with query_budget("PUT admin:/config"):
+        response = await client.put(
+            "/admin/config", params={"school_id": 1}, json={"teacher_credit_evidence_submission": current}
+        )
+    assert response.status_code == 200, response.text
+    assert response.json()["config"]["teacher_credits"]["evidence_submission"] == current
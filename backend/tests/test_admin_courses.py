@@ -0,0 +1,61 @@
+"""
+Admin course writes reach the cached course outline and chatbot index
+
+Archives courses 5 and 6, college courses only sneha.g@achariya.in's tests
+use.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = {"email": "sneha.g@achariya.in"}
+
+
+async def _warm_caches(client, course_id: int) -> int:
+    """Load the outline and chatbot index of a course; returns its first module id"""
+    response = await client.get(f"/student/course/{course_id}/outline", params=EMAIL)
+    assert response.status_code == 200, response.text
+    response = await client.post("/student/chatbot", params=EMAIL, json={"course_id": course_id, "query": "introduction"})
+    assert response.status_code == 200, response.text
+    response = await client.get(f"/student/course/{course_id}", params=EMAIL)
+    assert response.status_code == 200, response.text
+    return response.json()["modules"][0]["id"]
+
+
+async def _assert_archived(client, course_id: int, module_id: int) -> None:
+    response = await client.get(f"/student/course/{course_id}/outline", params=EMAIL)
+    assert response.status_code == 404
+    response = await client.post("/student/chatbot", params=EMAIL, json={"course_id": course_id, "query": "introduction"})
+    assert response.status_code == 403
+    response = await client.get(f"/student/course/{course_id}", params=EMAIL)
+    assert response.status_code == 404
+    response = await client.get(f"/student/module/{module_id}", params=EMAIL)
+    assert response.status_code == 404
+    response = await client.get(f"/student/module/{module_id}/quiz", params=EMAIL)
+    assert response.status_code == 404
+    response = await client.post(
+        f"/student/module/{module_id}/quiz/submit", params=EMAIL, json={"answers": {}, "session_id": "archived"}
+    )
+    assert response.status_code == 404
+
+
+async def test_archived_course_is_closed_to_students(client, query_budget):
+    module_id = await _warm_caches(client, 6)
+
+    with query_budget("DELETE admin:/courses/{course_id}"):
+        response = await client.delete("/admin/courses/6")
+    assert response.status_code == 200, response.text
+
+    await _assert_archived(client, 6, module_id)
+
+
+async def test_archiving_through_update_drops_cached_course(client, query_budget):
+    module_id = await _warm_caches(client, 5)
+
+    with query_budget("PUT admin:/courses/{course_id}"):
+        response = await client.put("/admin/courses/5", json={
+            "title": None, "description": None, "subject": None, "level": None, "status": "Archived"
+        })
+    assert response.status_code == 200, response.text
+
+    await _assert_archived(client, 5, module_id)
@@ -0,0 +1,88 @@
+"""
+Admission control: priority hand-over, queue deadline and shedding
+
+Uses a private AdmissionService with the worker limited to one request at
+a time.
+"""
+import asyncio
+
+import pytest
+
+from services.admission_service import AdmissionService
+from services.config_service import config_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    monkeypatch.setattr(config_service, "ADMISSION_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(config_service, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 5)
+    return AdmissionService()
+
+
+async def test_freed_slot_goes_to_highest_priority(admission):
+    assert await admission.acquire("dashboard") == (True, 0)
+
+    dashboard = asyncio.ensure_future(admission.acquire("dashboard"))
+    await asyncio.sleep(0)
+    submit = asyncio.ensure_future(admission.acquire("quiz_submit"))
+    await asyncio.sleep(0)
+    assert admission.metrics()["classes"]["dashboard"]["waiting"] == 1
+    assert admission.metrics()["classes"]["quiz_submit"]["waiting"] == 1
+
+    admission.release("dashboard", 0.01)
+    # The submission queued later overtakes the dashboard read
+    assert await asyncio.wait_for(submit, timeout=1) == (True, 0)
+    assert not dashboard.done()
+
+    admission.release("quiz_submit", 0.01)
+    assert await asyncio.wait_for(dashboard, timeout=1) == (True, 0)
+    admission.release("dashboard", 0.01)
+    assert admission.metrics()["in_flight"] == 0
+
+
+async def test_request_queued_past_deadline_is_shed_with_retry_after(admission, monkeypatch):
+    # Requests of this class have been taking 4 seconds
+    assert await admission.acquire("quiz_generate") == (True, 0)
+    admission.release("quiz_generate", 4.0)
+
+    monkeypatch.setattr(config_service, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(config_service, "ADMISSION_LIMIT_QUIZ_GENERATE", 1)
+    assert await admission.acquire("quiz_generate") == (True, 0)
+
+    # One request ahead at 4s each with one slot: retry in 4s
+    assert await admission.acquire("quiz_generate") == (False, 4)
+    metrics = admission.metrics()["classes"]["quiz_generate"]
+    assert (metrics["waiting"], metrics["shed"]) == (0, 1)
+
+    admission.release("quiz_generate", 4.0)
+    assert admission.metrics()["in_flight"] == 0
+
+
+async def test_full_queue_sheds_on_arrival(admission, monkeypatch):
+    monkeypatch.setattr(config_service, "ADMISSION_MAX_QUEUE", 1)
+    assert await admission.acquire("progress") == (True, 0)
+    queued = asyncio.ensure_future(admission.acquire("progress"))
+    await asyncio.sleep(0)
+
+    admitted, retry_after = await asyncio.wait_for(admission.acquire("progress"), timeout=1)
+    assert not admitted and retry_after >= 1
+
+    admission.release("progress", 0.01)
+    assert await asyncio.wait_for(queued, timeout=1) == (True, 0)
+    admission.release("progress", 0.01)
+
+
+async def test_cancelled_waiter_leaves_the_queue(admission):
+    assert await admission.acquire("default") == (True, 0)
+    waiter = asyncio.ensure_future(admission.acquire("default"))
+    await asyncio.sleep(0)
+
+    waiter.cancel()  # Client disconnected while queued
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert admission.metrics()["classes"]["default"]["waiting"] == 0
+    admission.release("default", 0.01)
+    assert admission.metrics()["in_flight"] == 0
@@ -0,0 +1,60 @@
+"""
+Response compression and ETag revalidation of precompressed payloads
+"""
+import pytest
+
+from core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+STUDENT = {"email": "pranav.r@achariya.in"}
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+async def test_large_response_is_compressed_when_accepted(client):
+    response = await client.get("/admin/users", headers=GZIP)
+    assert response.status_code == 200
+    assert len(response.content) >= settings.COMPRESSION_MIN_BYTES
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(response.content)
+
+    response = await client.get("/admin/users", headers=IDENTITY)
+    assert "content-encoding" not in response.headers
+
+
+async def test_small_response_is_sent_as_is(client):
+    response = await client.get("/admin/config", headers=GZIP)
+    assert response.status_code == 200
+    assert len(response.content) < settings.COMPRESSION_MIN_BYTES
+    assert "content-encoding" not in response.headers
+
+
+async def test_outline_revalidates_with_etag(client):
+    response = await client.get("/student/course/1/outline", params=STUDENT, headers=GZIP)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    body = response.content
+
+    response = await client.get(
+        "/student/course/1/outline", params=STUDENT, headers={**GZIP, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # A rebuilt snapshot of unchanged content keeps its ETag, as on any other worker
+    response = await client.put("/admin/courses/1", json={
+        "title": None, "description": None, "subject": None, "level": None, "status": None
+    })
+    assert response.status_code == 200
+    response = await client.get("/student/course/1/outline", params=STUDENT, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = await client.get(
+        "/student/course/1/outline", params=STUDENT, headers={**GZIP, "If-None-Match": 'W/"stale"'}
+    )
+    assert response.status_code == 200
+    assert response.content == body
+    assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,90 @@
+"""
+Live class progress: fan-out by shard, course and section, resync on gaps
+
+Uses a private LiveProgressHub; events are fed to it the way the
+notification listener does.
+"""
+import asyncio
+import json
+
+import pytest
+
+import services.live_progress as live_module
+from db.notify import NotificationListener
+from services.live_progress import LiveProgressHub, LIVE_PROGRESS_CHANNEL, PROGRESS_EVENT, RESYNC_EVENT
+
+pytestmark = pytest.mark.anyio
+
+
+def _payload(course_id=1, section_id=1, shard="default", percent=50.0):
+    return json.dumps({
+        "shard": shard, "course_id": course_id, "section_id": section_id,
+        "event": PROGRESS_EVENT, "data": {"student_id": 7, "completion_percent": percent}
+    })
+
+
+def _parse(frame: str):
+    lines = dict(line.split(": ", 1) for line in frame.strip().splitlines() if not line.startswith("retry"))
+    return lines["event"], json.loads(lines["data"])
+
+
+async def _next(stream):
+    return _parse(await asyncio.wait_for(stream.__anext__(), timeout=5))
+
+
+async def test_events_reach_only_matching_subscribers():
+    hub = LiveProgressHub()
+    stream = hub.stream(1, section_id=1)
+    assert (await _next(stream))[0] == "ready"
+
+    await hub.handle_notification(_payload(section_id=2, percent=10.0))  # Another section
+    await hub.handle_notification(_payload(course_id=2, percent=20.0))  # Another course
+    await hub.handle_notification(_payload(shard="north", percent=30.0))  # Same ids, another shard
+    await hub.handle_notification(_payload(percent=40.0))
+
+    event, data = await _next(stream)
+    assert event == PROGRESS_EVENT
+    assert data == {"student_id": 7, "completion_percent": 40.0, "section_id": 1}
+    await stream.aclose()
+    assert not hub._subscribers
+
+
+async def test_slow_subscriber_gets_resync(monkeypatch):
+    monkeypatch.setattr(live_module, "SUBSCRIBER_QUEUE_SIZE", 2)
+    hub = LiveProgressHub()
+    stream = hub.stream(1)
+    await _next(stream)
+
+    for percent in (10.0, 20.0, 30.0):  # One more than the queue holds
+        await hub.handle_notification(_payload(percent=percent))
+
+    assert (await _next(stream))[0] == RESYNC_EVENT
+    # Queued events were dropped with the resync; new ones flow again
+    await hub.handle_notification(_payload(percent=90.0))
+    assert (await _next(stream))[1]["completion_percent"] == 90.0
+    await stream.aclose()
+
+
+async def test_events_are_delivered_only_after_commit(db):
+    hub = LiveProgressHub()
+    listener = NotificationListener()
+    listener.subscribe(LIVE_PROGRESS_CHANNEL, hub.handle_notification)
+    stream = hub.stream(1, section_id=1)
+    await _next(stream)
+
+    await listener.start()
+    try:
+        # Connecting may have lost events, so the listener's resync comes first
+        assert (await _next(stream))[0] == RESYNC_EVENT
+
+        await hub.publish(db, 1, 1, PROGRESS_EVENT, {"student_id": 7, "completion_percent": 55.0})
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.2)
+        assert not pending.done()
+
+        await db.commit()
+        event, data = _parse(await asyncio.wait_for(pending, timeout=5))
+        assert (event, data["completion_percent"]) == (PROGRESS_EVENT, 55.0)
+    finally:
+        await listener.stop()
+        await stream.aclose()
@@ -0,0 +1,35 @@
+"""
+Responses made by middleware: shed requests and rejected idempotency keys
+"""
+import pytest
+
+from services.admission_service import admission_service
+
+pytestmark = pytest.mark.anyio
+
+ORIGIN = {"Origin": "http://localhost:5173"}
+
+
+async def test_shed_request_is_readable_cross_origin(client, monkeypatch):
+    async def shed(endpoint_class):
+        return False, 3
+
+    monkeypatch.setattr(admission_service, "acquire", shed)
+    response = await client.get("/student/wallet", params={"email": "pranav.r@achariya.in"}, headers=ORIGIN)
+
+    assert response.status_code == 503
+    assert response.headers["access-control-allow-origin"]
+    assert response.headers["retry-after"] == "3"
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
+
+
+async def test_idempotency_key_requires_an_owner(client):
+    response = await client.post(
+        "/student/module/5/quiz/submit",
+        json={"answers": {}, "session_id": "none"},
+        headers={"Idempotency-Key": "anonymous-retry", **ORIGIN},
+    )
+
+    assert response.status_code == 400
+    assert "email" in response.json()["detail"]
+    assert response.headers["access-control-allow-origin"]
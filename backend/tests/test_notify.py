@@ -0,0 +1,49 @@
+"""
+Cross-worker notifications: one full resync per start, payloads from any shard
+"""
+import asyncio
+
+import pytest
+
+from db.notify import NotificationListener, notify
+from db.shards import ShardRouter, shard_router
+
+pytestmark = pytest.mark.anyio
+
+SHARDS = ["default", "north", "south"]
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+
+
+async def test_resync_once_across_shards(db, monkeypatch):
+    # Three "shards" on the test database, each with its own LISTEN connection
+    monkeypatch.setattr(ShardRouter, "shards", property(lambda self: SHARDS))
+    dsn = shard_router.dsn()
+    monkeypatch.setattr(shard_router, "dsn", lambda shard="default": dsn)
+
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+
+    listener = NotificationListener()
+    listener.subscribe("test_notify_channel", handler)
+    await listener.start()
+    try:
+        await _wait_for(lambda: calls)
+        # Every connection is up by now; a late duplicate resync would land here
+        await asyncio.sleep(0.2)
+        assert calls == [None]
+
+        await notify(db, "test_notify_channel", "hello")
+        await db.commit()
+        # Delivered on each of the three connections
+        await _wait_for(lambda: len(calls) == 4)
+        assert calls == [None, "hello", "hello", "hello"]
+    finally:
+        await listener.stop()
@@ -0,0 +1,90 @@
+"""
+Progress log compaction into ModuleProgress snapshots
+
+Uses divya.m@achariya.in in course 1, whose module 2 starts at 60%. No
+other test writes for her.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from db.session import AsyncSessionLocal
+from models.enrollment import Enrollment
+from models.enrollment_summary import EnrollmentSummary
+from models.module_progress import ModuleProgress
+from models.progress_event import ProgressEvent
+from models.student_profile import StudentProfile
+from models.user import User
+from services.progress_log import progress_log
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "divya.m@achariya.in"
+MODULE_ID = 2
+
+
+async def _enrollment_id(db) -> int:
+    result = await db.execute(
+        select(Enrollment.id)
+        .join(StudentProfile, StudentProfile.id == Enrollment.student_id)
+        .join(User, User.id == StudentProfile.user_id)
+        .where(User.email == EMAIL, Enrollment.course_id == 1)
+    )
+    return result.scalar_one()
+
+
+async def _snapshot(db, enrollment_id: int) -> float:
+    db.expire_all()
+    result = await db.execute(
+        select(ModuleProgress.completion_percent)
+        .where(ModuleProgress.enrollment_id == enrollment_id, ModuleProgress.module_id == MODULE_ID)
+    )
+    return result.scalar_one()
+
+
+async def _progress_total(db, enrollment_id: int) -> float:
+    result = await db.execute(
+        select(EnrollmentSummary.progress_total).where(EnrollmentSummary.enrollment_id == enrollment_id)
+    )
+    return result.scalar_one()
+
+
+async def test_compaction_folds_pending_events(db):
+    enrollment_id = await _enrollment_id(db)
+    before = await _snapshot(db, enrollment_id)
+    total_before = await _progress_total(db, enrollment_id)
+
+    for percent in (before + 20, before + 10):
+        _, _, changed = await progress_log.track(db, enrollment_id, MODULE_ID, percent)
+        assert changed
+    await db.commit()
+    # Between milestones only the log is written
+    assert await _snapshot(db, enrollment_id) == before
+
+    assert await progress_log.compact(db) >= 2
+
+    assert await _snapshot(db, enrollment_id) == before + 20
+    assert await _progress_total(db, enrollment_id) == pytest.approx(total_before + 20)
+    result = await db.execute(
+        select(ProgressEvent.id).where(ProgressEvent.enrollment_id == enrollment_id, ProgressEvent.compacted_at.is_(None))
+    )
+    assert result.all() == []
+
+
+async def test_compactors_skip_locked_events(db):
+    enrollment_id = await _enrollment_id(db)
+    before = await _snapshot(db, enrollment_id)
+    await progress_log.track(db, enrollment_id, MODULE_ID, before + 5)
+    await db.commit()
+
+    async with AsyncSessionLocal() as other:
+        # Another compactor holds every pending event
+        await other.execute(
+            select(ProgressEvent.id).where(ProgressEvent.compacted_at.is_(None)).with_for_update()
+        )
+        assert await asyncio.wait_for(progress_log.compact_batch(db), timeout=5) == 0
+        await other.rollback()
+
+    assert await progress_log.compact_batch(db) >= 1
+    assert await _snapshot(db, enrollment_id) == before + 5
@@ -0,0 +1,74 @@
+"""
+Hot endpoints stay within their QUERY_BUDGETS entry on the seeded data
+
+Ids are those of a freshly seeded database: course 1 is the first school
+course, with modules 1-3.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+STUDENT = "pranav.r@achariya.in"
+TEACHER = "hari@achariya.in"
+PRINCIPAL = "principal.school@achariya.in"
+
+READ_ROUTES = [
+    ("GET students:/dashboard", "/student/dashboard", {"email": STUDENT}),
+    ("GET students:/courses", "/student/courses", {"email": STUDENT}),
+    ("GET students:/course/{course_id}", "/student/course/1", {"email": STUDENT}),
+    ("GET students:/course/{course_id}/outline", "/student/course/1/outline", {"email": STUDENT}),
+    ("GET students:/module/{module_id}", "/student/module/2", {"email": STUDENT}),
+    ("GET students:/wallet", "/student/wallet", {"email": STUDENT}),
+    ("GET students:/badges", "/student/badges", {"email": STUDENT}),
+    ("GET teachers:/dashboard", "/teacher/dashboard", {"email": TEACHER}),
+    ("GET teachers:/courses", "/teacher/courses", {"email": TEACHER}),
+    ("GET teachers:/course/{course_id}/students", "/teacher/course/1/students", {"email": TEACHER}),
+    ("GET teachers:/at-risk-students", "/teacher/at-risk-students", {"email": TEACHER}),
+    ("GET teachers:/wallet", "/teacher/wallet", {"email": TEACHER}),
+    ("GET principal:/dashboard", "/principal/dashboard", {"email": PRINCIPAL}),
+    ("GET principal:/completion-by-grade", "/principal/completion-by-grade", {"email": PRINCIPAL}),
+    ("GET principal:/weekly-active", "/principal/weekly-active", {"email": PRINCIPAL}),
+    ("GET principal:/top-performers", "/principal/top-performers", {"email": PRINCIPAL}),
+    ("GET principal:/courses", "/principal/courses", {"email": PRINCIPAL}),
+    ("GET admin:/dashboard", "/admin/dashboard", {}),
+    ("GET admin:/courses", "/admin/courses", {}),
+    ("GET admin:/users", "/admin/users", {}),
+    ("GET admin:/course/{course_id}/modules", "/admin/course/1/modules", {}),
+    ("GET admin:/module/{module_id}/questions", "/admin/module/1/questions", {}),
+    ("GET admin:/search", "/admin/search", {"q": "math"}),
+    ("GET admin:/search/typeahead", "/admin/search/typeahead", {"q": "pra"}),
+]
+
+
+@pytest.mark.parametrize("route, path, params", READ_ROUTES, ids=[route for route, _, _ in READ_ROUTES])
+async def test_read_route_within_budget(client, query_budget, route, path, params):
+    with query_budget(route):
+        response = await client.get(path, params=params)
+    assert response.status_code == 200, response.text
+
+
+async def test_student_batch_within_budget(client, query_budget):
+    parts = [
+        {"id": "dashboard", "path": "/dashboard"},
+        {"id": "courses", "path": "/courses"},
+        {"id": "wallet", "path": "/wallet"},
+        {"id": "badges", "path": "/badges"},
+    ]
+    with query_budget("POST students:/batch"):
+        response = await client.post("/student/batch", params={"email": STUDENT}, json={"requests": parts})
+    assert response.status_code == 200
+    assert [part["status"] for part in response.json()["responses"]] == [200] * len(parts)
+
+
+async def test_track_and_quiz_within_budget(client, query_budget):
+    email = {"email": "arjun.s@achariya.in"}
+    with query_budget("POST students:/module/{module_id}/track"):
+        response = await client.post(
+            "/student/module/2/track", params=email, json={"content_item_id": 4, "progress_percent": 100}
+        )
+    assert response.status_code == 200, response.text
+
+    with query_budget("GET students:/module/{module_id}/quiz"):
+        response = await client.get("/student/module/2/quiz", params=email)
+    assert response.status_code == 200, response.text
+    assert response.json()["questions"]
@@ -0,0 +1,29 @@
+"""
+Question bank imports are validated in full before anything is written
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def _question(*flags):
+    return {
+        "module_id": 1,
+        "question_text": "Which option is right?",
+        "options": [{"text": f"Option {n}", "is_correct": flag} for n, flag in enumerate(flags, start=1)],
+    }
+
+
+@pytest.mark.parametrize("flag", ["false", "0", 1, None])
+async def test_non_boolean_is_correct_is_rejected(client, flag):
+    response = await client.post("/admin/questions/import", json=[_question(flag, True)])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == ["Question 1: is_correct must be true or false"]
+
+
+async def test_question_without_correct_option_is_rejected(client):
+    response = await client.post("/admin/questions/import", json=[_question(False, False)])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == ["Question 1: no option is marked correct"]
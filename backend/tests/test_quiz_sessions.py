@@ -0,0 +1,48 @@
+"""
+Expired quiz sessions are purged in the background
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+import services.quiz_service as quiz_module
+from models.enrollment import Enrollment
+from models.quiz_session import QuizSession
+from services.quiz_service import quiz_service
+
+pytestmark = pytest.mark.anyio
+
+
+def _session(enrollment_id: int, token: str, expires_at: datetime) -> QuizSession:
+    return QuizSession(
+        token=token, enrollment_id=enrollment_id, module_id=1, question_ids=[], answer_key_json={},
+        time_limit_seconds=120, pass_score_percent=100, started_at=expires_at - timedelta(hours=1),
+        expires_at=expires_at
+    )
+
+
+async def test_worker_purges_expired_sessions(db, monkeypatch):
+    enrollment_id = (await db.execute(select(Enrollment.id).limit(1))).scalar_one()
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        _session(enrollment_id, "purge-test-expired", now - timedelta(minutes=1)),
+        _session(enrollment_id, "purge-test-live", now + timedelta(hours=1)),
+    ])
+    await db.commit()
+
+    monkeypatch.setattr(quiz_module, "SESSION_PURGE_INTERVAL_SECONDS", 0)
+    await quiz_service.start()
+    try:
+        for _ in range(50):
+            db.expire_all()
+            result = await db.execute(select(QuizSession.token).where(QuizSession.token.like("purge-test-%")))
+            tokens = set(result.scalars().all())
+            if "purge-test-expired" not in tokens:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await quiz_service.stop()
+
+    assert tokens == {"purge-test-live"}
@@ -0,0 +1,135 @@
+"""
+Quiz submission end to end on the seeded data
+
+Uses aisha.k@achariya.in in course 1 (modules 1-3): module 1 completed,
+module 2 at 60%. No other test writes for her.
+"""
+import pytest
+from sqlalchemy import delete, select
+
+from models.enrollment import Enrollment
+from models.module_progress import ModuleProgress, ProgressStatus
+from models.question_option import QuestionOption
+from models.student_profile import StudentProfile
+from models.user import User
+from models.wallet_account import WalletAccount
+from models.wallet_transaction import WalletTransaction, TransactionType
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = {"email": "aisha.k@achariya.in"}
+
+
+async def _enrollment_id(db, course_id: int) -> int:
+    result = await db.execute(
+        select(Enrollment.id)
+        .join(StudentProfile, StudentProfile.id == Enrollment.student_id)
+        .join(User, User.id == StudentProfile.user_id)
+        .where(User.email == EMAIL["email"], Enrollment.course_id == course_id)
+    )
+    return result.scalar_one()
+
+
+async def _balance(db) -> float:
+    result = await db.execute(
+        select(WalletAccount.balance_credits)
+        .join(User, User.id == WalletAccount.user_id)
+        .where(User.email == EMAIL["email"])
+    )
+    return result.scalar_one()
+
+
+async def test_passing_submit_completes_module_and_credits(client, db, query_budget):
+    enrollment_id = await _enrollment_id(db, 1)
+    # Module 3 has no progress row yet, so completing module 2 must create it
+    await db.execute(
+        delete(ModuleProgress).where(ModuleProgress.enrollment_id == enrollment_id, ModuleProgress.module_id == 3)
+    )
+    await db.commit()
+    balance_before = await _balance(db)
+
+    response = await client.post(
+        "/student/module/2/track", params=EMAIL, json={"content_item_id": 4, "progress_percent": 100}
+    )
+    assert response.status_code == 200, response.text
+    response = await client.get("/student/module/2/quiz", params=EMAIL)
+    assert response.status_code == 200, response.text
+    quiz = response.json()
+
+    question_ids = [question["question_id"] for question in quiz["questions"]]
+    result = await db.execute(
+        select(QuestionOption.question_id, QuestionOption.id)
+        .where(QuestionOption.question_id.in_(question_ids), QuestionOption.is_correct == True)
+    )
+    answers = dict(result.all())
+
+    with query_budget("POST students:/module/{module_id}/quiz/submit"):
+        response = await client.post(
+            "/student/module/2/quiz/submit",
+            params=EMAIL,
+            json={"answers": answers, "time_taken_seconds": 30, "session_id": quiz["session_id"]},
+            headers={"Idempotency-Key": "aisha-module-2-attempt-1"},
+        )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["passed"] and body["module_completed"]
+    assert body["attempt_number"] == 1
+
+    db.expire_all()
+    result = await db.execute(
+        select(ModuleProgress.module_id, ModuleProgress.status, ModuleProgress.quiz_attempts)
+        .where(ModuleProgress.enrollment_id == enrollment_id)
+        .order_by(ModuleProgress.module_id)
+    )
+    assert result.all() == [
+        (1, ProgressStatus.COMPLETED, 2),
+        (2, ProgressStatus.COMPLETED, 1),
+        (3, ProgressStatus.NOT_STARTED, 0),
+    ]
+
+    result = await db.execute(
+        select(WalletTransaction).where(WalletTransaction.reference_id == body["attempt_id"])
+    )
+    transaction = result.scalar_one()
+    assert transaction.reference_type == TransactionType.QUIZ
+    assert transaction.credits_delta > 0
+    assert await _balance(db) == balance_before + transaction.credits_delta
+
+
+
+async def test_unanswered_questions_count_as_wrong(client, db):
+    # Course 2 module 5 is at 60%; finish its content so the quiz opens
+    response = await client.post(
+        "/student/module/5/track", params=EMAIL, json={"content_item_id": 13, "progress_percent": 100}
+    )
+    assert response.status_code == 200, response.text
+    response = await client.get("/student/module/5/quiz", params=EMAIL)
+    assert response.status_code == 200, response.text
+    quiz = response.json()
+
+    # Answer only the first question, correctly
+    first = quiz["questions"][0]["question_id"]
+    result = await db.execute(
+        select(QuestionOption.id).where(QuestionOption.question_id == first, QuestionOption.is_correct == True)
+    )
+    response = await client.post(
+        "/student/module/5/quiz/submit",
+        params=EMAIL,
+        json={"answers": {first: result.scalar_one()}, "session_id": quiz["session_id"]},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["total_questions"] == len(quiz["questions"]) > 1
+    assert body["correct_count"] == 1
+    assert body["score_percent"] == pytest.approx(100 / len(quiz["questions"]))
+    assert not body["passed"] and not body["module_completed"]
+    assert len(body["explanations"]) == len(quiz["questions"]) - 1
+
+
+async def test_submit_requires_a_session(client):
+    response = await client.post(
+        "/student/module/5/quiz/submit",
+        params=EMAIL,
+        json={"answers": {1: 1}, "time_taken_seconds": 1},
+    )
+    assert response.status_code == 422
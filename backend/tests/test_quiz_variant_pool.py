@@ -0,0 +1,85 @@
+"""
+Quiz variant pool: background refill and invalidation on question bank changes
+
+Uses a private QuizVariantPool on module 1, so the app's pool is untouched.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from models.question_bank import QuestionBank
+from services.config_service import config_service
+from services.quiz_variant_pool import QuizVariantPool
+
+pytestmark = pytest.mark.anyio
+
+MODULE_ID = 1
+KEY = ("default", MODULE_ID)
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def pool(seeded_db):
+    pool = QuizVariantPool()
+    await pool.start()
+    yield pool
+    await pool.stop()
+
+
+async def test_warm_fills_pool_with_module_questions(pool, db):
+    result = await db.execute(select(QuestionBank.id).where(QuestionBank.module_id == MODULE_ID))
+    bank = set(result.scalars().all())
+
+    pool.warm([MODULE_ID])
+    await _wait_for(lambda: len(pool._pools.get(KEY, ())) == config_service.QUIZ_VARIANT_POOL_SIZE)
+
+    variant = pool.acquire(MODULE_ID)
+    assert variant is not None
+    assert set(variant["question_ids"]) <= bank
+    assert set(variant["answer_key"]) == {str(qid) for qid in variant["question_ids"]}
+    assert len(pool._pools[KEY]) == config_service.QUIZ_VARIANT_POOL_SIZE - 1
+
+
+async def test_bank_change_discards_variants(pool):
+    pool.warm([MODULE_ID])
+    await _wait_for(lambda: len(pool._pools.get(KEY, ())) == config_service.QUIZ_VARIANT_POOL_SIZE)
+
+    await pool.handle_bank_changed(str(MODULE_ID))
+    assert KEY not in pool._pools and KEY not in pool._banks
+
+    # The empty pool is refilled from a fresh copy of the bank
+    assert pool.acquire(MODULE_ID) is None
+    await _wait_for(lambda: KEY in pool._banks)
+    assert KEY in pool._banks
+
+
+async def test_bank_loaded_across_invalidation_is_dropped(pool, monkeypatch):
+    load_bank = pool._load_bank
+
+    async def load_then_change(key):
+        bank = await load_bank(key)
+        pool.invalidate(key[1])  # The bank changes while the stale copy is in flight
+        return bank
+
+    monkeypatch.setattr(pool, "_load_bank", load_then_change)
+    pool.warm([MODULE_ID])
+    await _wait_for(lambda: not pool._pending)
+
+    assert KEY not in pool._banks
+    assert KEY not in pool._pools
+
+
+async def test_config_resync_discards_every_pool(pool):
+    pool.warm([MODULE_ID, MODULE_ID + 1])
+    await _wait_for(lambda: ("default", MODULE_ID + 1) in pool._pools and not pool._pending)
+
+    await pool.handle_bank_changed(None)
+
+    assert not pool._pools and not pool._banks
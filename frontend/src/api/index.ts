@@ -17,16 +17,22 @@ export const studentApi = {
     getCourses: (email: string) => client.get(`/student/courses?email=${email}`),
     getCourseDetail: (courseId: number, email: string) => 
         client.get(`/student/course/${courseId}?email=${email}`),
+    getCourseOutline: (courseId: number, email: string) =>
+        client.get(`/student/course/${courseId}/outline?email=${email}`),
     getModuleDetail: (moduleId: number, email: string) => 
         client.get(`/student/module/${moduleId}?email=${email}`),
     trackContent: (moduleId: number, data: any, email: string) => 
         client.post(`/student/module/${moduleId}/track?email=${email}`, data),
     getQuiz: (moduleId: number, email: string) => 
         client.get(`/student/module/${moduleId}/quiz?email=${email}`),
-    submitQuiz: (moduleId: number, data: any, email: string) => 
-        client.post(`/student/module/${moduleId}/quiz/submit?email=${email}`, data),
+    // Send the same idempotencyKey when retrying a submit; the server then replays the first result
+    submitQuiz: (moduleId: number, data: any, email: string, idempotencyKey?: string) => 
+        client.post(`/student/module/${moduleId}/quiz/submit?email=${email}`, data,
+            idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined),
     getWallet: (email: string) => client.get(`/student/wallet?email=${email}`),
-    getBadges: (email: string) => client.get(`/student/badges?email=${email}`)
+    getBadges: (email: string) => client.get(`/student/badges?email=${email}`),
+    batch: (email: string, requests: { id: string; path: string }[]) =>
+        client.post(`/student/batch?email=${email}`, { requests })
 };
 
 export const teacherApi = {
@@ -57,15 +63,24 @@ export const adminApi = {
     updateCourse: (courseId: number, data: any) => 
         client.put(`/admin/courses/${courseId}`, data),
     deleteCourse: (courseId: number) => client.delete(`/admin/courses/${courseId}`),
+    purgeCourse: (courseId: number, schoolId?: number) =>
+        client.post(`/admin/courses/${courseId}/purge`, null, { params: { school_id: schoolId } }),
+    getPurgeProgress: (courseId: number, schoolId?: number) =>
+        client.get(`/admin/courses/${courseId}/purge`, { params: { school_id: schoolId } }),
     getModules: (courseId: number) => client.get(`/admin/course/${courseId}/modules`),
     createModule: (data: any) => client.post('/admin/modules', data),
     getContent: (moduleId: number) => client.get(`/admin/module/${moduleId}/content`),
     createContent: (data: any) => client.post('/admin/content', data),
     getUsers: (role?: string) => client.get(`/admin/users${role ? `?role=${role}` : ''}`),
     createUser: (data: any) => client.post('/admin/users', data),
-    getQuestions: (moduleId: number) => client.get(`/admin/module/${moduleId}/questions`),
+    getQuestions: (moduleId: number, params?: { limit?: number; after_id?: number; q?: string }) =>
+        client.get(`/admin/module/${moduleId}/questions`, { params }),
     createQuestion: (data: any) => client.post('/admin/questions', data),
     getConfig: () => client.get('/admin/config'),
     updateConfig: (data: any) => client.put('/admin/config', data),
-    getActivityLogs: (params?: any) => client.get('/admin/activity-logs', { params })
+    getActivityLogs: (params?: any) => client.get('/admin/activity-logs', { params }),
+    getProgressEvents: (params: {
+        since: string; until: string; course_id?: number; enrollment_id?: number;
+        limit?: number; after_id?: number; school_id?: number
+    }) => client.get('/admin/progress-events', { params })
 };